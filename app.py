@@ -1,9 +1,18 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
-from models import db
+from werkzeug.middleware.proxy_fix import ProxyFix
+from models import db, upgrade_schema
 from config import Config
-from routes import auth_bp, prediction_bp, verification_bp
+from routes import auth_bp, prediction_bp, verification_bp, admin_bp
+from services.ai_service import serving_model
+from services.cluster import init_version_sync
 from services.data_analysis import data_analysis_service
+from services.json_provider import FastJSONProvider
+from services.http_cache import init_compression
+from services.metrics import init_metrics
+from services.profiler import init_profiler
+from services.rate_limit import init_rate_limiting
+from services.scheduler import init_scheduler
 import os
 
 
@@ -11,6 +20,11 @@ def create_app():
     """Application factory"""
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.json = FastJSONProvider(app)
+
+    # Client address from X-Forwarded-For, trusting only our own proxies
+    if Config.PROXY_FIX_HOPS:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=Config.PROXY_FIX_HOPS, x_proto=Config.PROXY_FIX_HOPS)
 
     # Initialize CORS - IMPORTANT FOR PRODUCTION
     CORS(app,
@@ -28,15 +42,32 @@ def create_app():
     # Initialize database
     db.init_app(app)
 
+    # Latency/DB/RPC metrics at /metrics; registered first so its
+    # after_request hook runs last and times the whole response
+    init_metrics(app)
+
+    # Per-client token buckets and priority load shedding
+    init_rate_limiting(app)
+
+    # Opt-in per-request sampling profiler (X-Profile header)
+    init_profiler(app)
+
+    # gzip/brotli for large responses
+    init_compression(app)
+
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(prediction_bp, url_prefix='/api/predict')
     app.register_blueprint(verification_bp, url_prefix='/api/verify')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
 
     # Create database tables
     with app.app_context():
         try:
             db.create_all()
+            upgraded = upgrade_schema()
+            if any(upgraded.values()):
+                print(f"✅ Schema upgraded: {upgraded}")
             print("✅ Database initialized")
         except Exception as e:
             print(f"⚠️  Database initialization warning: {e}")
@@ -55,6 +86,20 @@ def create_app():
         except Exception as e:
             print(f"⚠️  Could not load traffic data: {e}")
 
+        # Load the compiled model, if one has been exported
+        try:
+            if os.path.exists(Config.COMPILED_MODEL_PATH):
+                serving_model.load(Config.COMPILED_MODEL_PATH)
+                print(f"✅ Model loaded: {serving_model.version}")
+        except Exception as e:
+            print(f"⚠️  Could not load model: {e}")
+
+    # Follow the cluster-wide data/model version pointers
+    init_version_sync(app)
+
+    # Precompute hotspots, statistics and lookup tables off the request path
+    init_scheduler(app)
+
     # Root endpoint
     @app.route('/')
     def index():
@@ -64,21 +109,37 @@ def create_app():
             'version': '2.0.0',
             'blockchain': 'Polygon (Mumbai Testnet)',
             'status': 'online',
+            'metrics': 'GET /metrics',
             'endpoints': {
                 'auth': {
                     'register': 'POST /api/auth/register',
                     'login': 'POST /api/auth/login',
-                    'drivers': 'GET /api/auth/drivers'
+                    'drivers': 'GET /api/auth/drivers',
+                    'driver_changes': 'GET /api/auth/drivers/changes?since=<seq>'
                 },
                 'prediction': {
                     'route': 'POST /api/predict/route',
+                    'matrix': 'POST /api/predict/matrix',
                     'hotspots': 'GET /api/predict/accident-hotspots',
-                    'statistics': 'GET /api/predict/statistics'
+                    'statistics': 'GET /api/predict/statistics',
+                    'places': 'GET /api/predict/places?q=<text>',
+                    'patterns': 'GET /api/predict/patterns/<location>?days=<n>',
+                    'timeseries': 'GET /api/predict/timeseries/<location>?start=&end=&resolution=',
+                    'report_incident': 'POST /api/predict/incidents',
+                    'probes': 'POST /api/predict/probes',
+                    'congestion': 'GET /api/predict/congestion?segments=<place,...>',
+                    'live_stream': 'GET /api/predict/stream?areas=<place,...>'
                 },
                 'verification': {
                     'verify': 'POST /api/verify/driver',
                     'by_wallet': 'GET /api/verify/wallet/<address>',
                     'validity': 'GET /api/verify/check-validity/<license>',
+                    'attestation': 'GET /api/verify/attestation/<license>',
+                    'verify_attestation': 'POST /api/verify/attestation',
+                    'issue_credential': 'POST /api/verify/credentials/issue',
+                    'credential_issuer': 'GET /api/verify/credentials/issuer',
+                    'verify_credential': 'POST /api/verify/credentials/verify',
+                    'revocations': 'GET /api/verify/credentials/revocations?since=<seq>',
                     'blockchain_status': 'GET /api/verify/blockchain-status'
                 }
             }
@@ -94,6 +155,10 @@ def create_app():
                 'database': 'connected',
                 'api': 'running',
                 'blockchain': 'polygon-mumbai'
+            },
+            'versions': {
+                'traffic_data': data_analysis_service.data_version,
+                'model': serving_model.version
             }
         })
         response.headers.add('Access-Control-Allow-Origin', '*')
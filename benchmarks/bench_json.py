@@ -0,0 +1,96 @@
+"""
+JSON serialization benchmark on large row responses
+
+Compares the stdlib provider with per-field isoformat() (the old
+to_dict path) against FastJSONProvider with the compiled row serializers.
+
+    python -m benchmarks.bench_json --rows 10000
+"""
+import argparse
+import json
+import time
+from datetime import date, datetime, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from models import Driver, TrafficIncident
+from services.json_provider import FastJSONProvider
+
+
+def make_drivers(n):
+    today = date.today()
+    return [
+        Driver(
+            id=i, first_name=f'First{i}', last_name=f'Last{i}',
+            email=f'driver{i}@example.com', phone='+2348000000000',
+            license_number=f'LAG{i:08d}', license_expiry=today + timedelta(days=i % 900),
+            vehicle_plate=f'LND-{i % 1000:03d}-AA', insurance_provider='Leadway',
+            insurance_expiry=today + timedelta(days=i % 400),
+            road_cert_number=f'RC{i:07d}', cert_expiry=today + timedelta(days=i % 300),
+            blockchain_tx='0x' + f'{i:064x}', wallet_address='0x' + f'{i:040x}'
+        )
+        for i in range(n)
+    ]
+
+
+def make_incidents(n):
+    now = datetime.utcnow()
+    return [
+        TrafficIncident(
+            id=i, location='Oshodi', latitude=6.5355, longitude=3.3361,
+            incident_type='collision', severity='minor', casualties=i % 3,
+            time_of_day='morning', weather_condition='clear', road_condition='good',
+            incident_date=now - timedelta(minutes=i)
+        )
+        for i in range(n)
+    ]
+
+
+def _best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench(rows, repeat=5):
+    app = Flask(__name__)
+    stdlib = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+    results = {}
+
+    for name, model_rows in (('drivers', make_drivers(rows)), ('incidents', make_incidents(rows))):
+        with app.app_context():
+            baseline = _best_of(
+                lambda: stdlib.response({'rows': [r.to_dict() for r in model_rows]}).get_data(),
+                repeat
+            )
+            optimized = _best_of(
+                lambda: fast.response({'rows': type(model_rows[0]).serialize(model_rows)}).get_data(),
+                repeat
+            )
+        results[name] = {
+            'rows': rows,
+            'stdlib_to_dict_ms': round(baseline * 1000, 2),
+            'fast_serialize_ms': round(optimized * 1000, 2),
+            'speedup': round(baseline / optimized, 2)
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = bench(args.rows, args.repeat)
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == '__main__':
+    main()
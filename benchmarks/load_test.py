@@ -0,0 +1,145 @@
+"""
+Concurrency load test: sync vs gthread vs gevent gunicorn workers
+
+Starts a stub Polygon RPC node with artificial latency, boots gunicorn
+with each worker class against a throwaway SQLite database, and hammers an
+RPC-bound endpoint with concurrent clients.
+
+    python -m benchmarks.load_test --latency 0.2 --concurrency 1 8 32
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_rpc import StubRPCServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return True
+        except Exception:
+            time.sleep(0.2)
+    return False
+
+
+def start_server(worker_class, rpc_url, workers, threads, db_path):
+    """Boot gunicorn with the repo config and the given worker class"""
+    port = _free_port()
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        GUNICORN_WORKER_CLASS=worker_class,
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_THREADS=str(threads),
+        POLYGON_RPC_URL=rpc_url,
+        DATABASE_URL=f'sqlite:///{db_path}',
+        RATE_LIMIT_ENABLED='False',
+    )
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    if not _wait_ready(base_url + '/health'):
+        proc.terminate()
+        raise RuntimeError(f'gunicorn ({worker_class}) did not start')
+    return proc, base_url
+
+
+def run_load(url, concurrency, requests_per_client):
+    """Fire requests from concurrent clients, return latency summary"""
+    def client(_):
+        latencies = []
+        for _ in range(requests_per_client):
+            started = time.perf_counter()
+            urllib.request.urlopen(url, timeout=60).read()
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(l for batch in pool.map(client, range(concurrency)) for l in batch)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 1)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--worker-classes', nargs='+', default=['sync', 'gthread', 'gevent'])
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=10, help='requests per client')
+    parser.add_argument('--latency', type=float, default=0.1, help='stub RPC latency (s)')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--endpoint', default='/api/verify/blockchain-status')
+    parser.add_argument('--output', help='write JSON results to this file')
+    args = parser.parse_args(argv)
+
+    results = []
+    with StubRPCServer(latency=args.latency) as rpc, tempfile.TemporaryDirectory() as tmp:
+        for worker_class in args.worker_classes:
+            try:
+                proc, base_url = start_server(
+                    worker_class, rpc.url, args.workers, args.threads,
+                    os.path.join(tmp, f'{worker_class}.db')
+                )
+            except RuntimeError as e:
+                print(f"⚠️  {e}")
+                continue
+
+            try:
+                for concurrency in args.concurrency:
+                    summary = run_load(base_url + args.endpoint, concurrency, args.requests)
+                    summary['worker_class'] = worker_class
+                    results.append(summary)
+                    print(
+                        f"{worker_class:8} c={concurrency:<4} "
+                        f"{summary['throughput_rps']:>8} req/s  "
+                        f"p50 {summary['p50_ms']:>8} ms  p99 {summary['p99_ms']:>8} ms"
+                    )
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+
+    report = {
+        'endpoint': args.endpoint,
+        'rpc_latency_s': args.latency,
+        'workers': args.workers,
+        'threads': args.threads,
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
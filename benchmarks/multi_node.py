@@ -0,0 +1,174 @@
+"""
+Multi-node scale-out test: throughput vs node count, version convergence
+
+Boots N independent gunicorn nodes that share only the state backend
+(a SQLite file standing in for Redis) and the database, spreads clients
+round-robin across them as a load balancer would, and reports throughput
+and scaling efficiency for each node count. It then promotes a new traffic
+dataset through one node and times how long every node takes to serve it.
+
+    python -m benchmarks.multi_node --nodes 1 2 4 --concurrency 8
+
+Scaling is only near-linear while the machine has a core per node; on
+fewer cores the nodes compete for CPU and efficiency drops accordingly.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.load_test import ROOT, _free_port, _wait_ready, run_load
+
+ADMIN_TOKEN = 'multi-node-benchmark'
+
+
+def start_node(state_url, db_path, workers, threads, sync_seconds):
+    """Boot one gunicorn node on its own port"""
+    port = _free_port()
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        GUNICORN_WORKER_CLASS='gthread',
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_THREADS=str(threads),
+        DATABASE_URL=f'sqlite:///{db_path}',
+        STATE_BACKEND_URL=state_url,
+        VERSION_SYNC_SECONDS=str(sync_seconds),
+        ADMIN_TOKEN=ADMIN_TOKEN,
+        RATE_LIMIT_ENABLED='False',
+    )
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    if not _wait_ready(base_url + '/health'):
+        proc.terminate()
+        raise RuntimeError('gunicorn node did not start')
+    return proc, base_url
+
+
+def run_cluster_load(base_urls, endpoint, concurrency, requests_per_client):
+    """concurrency clients per node, each pinned to a node round-robin"""
+    with ThreadPoolExecutor(max_workers=len(base_urls)) as pool:
+        started = time.perf_counter()
+        summaries = list(pool.map(
+            lambda url: run_load(url + endpoint, concurrency, requests_per_client), base_urls
+        ))
+        elapsed = time.perf_counter() - started
+
+    requests = sum(s['requests'] for s in summaries)
+    return {
+        'nodes': len(base_urls),
+        'requests': requests,
+        'throughput_rps': round(requests / elapsed, 1),
+        'p50_ms': max(s['p50_ms'] for s in summaries),
+        'p99_ms': max(s['p99_ms'] for s in summaries)
+    }
+
+
+def _serving(url):
+    with urllib.request.urlopen(url + '/health', timeout=10) as response:
+        return json.loads(response.read())['versions']['traffic_data']
+
+
+def measure_convergence(base_urls, data_path, timeout=60):
+    """Promote a dataset through the first node; seconds until all serve it"""
+    request = urllib.request.Request(
+        base_urls[0] + '/api/admin/versions/traffic_data',
+        data=json.dumps({'path': data_path}).encode(),
+        headers={'Content-Type': 'application/json', 'X-Admin-Token': ADMIN_TOKEN},
+        method='POST'
+    )
+    started = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=60) as response:
+        version = json.loads(response.read())['pointer']['version']
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        # Every worker behind each node has to have switched
+        if all(_serving(url) == version for url in base_urls for _ in range(4)):
+            return version, round(time.perf_counter() - started, 3)
+        time.sleep(0.05)
+    return version, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', nargs='+', type=int, default=[1, 2, 4])
+    parser.add_argument('--concurrency', type=int, default=8, help='clients per node')
+    parser.add_argument('--requests', type=int, default=25, help='requests per client')
+    parser.add_argument('--workers', type=int, default=1, help='gunicorn workers per node')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--sync-seconds', type=float, default=1.0)
+    parser.add_argument('--endpoint', default='/api/predict/patterns/Ikeja')
+    parser.add_argument('--output', help='write JSON results to this file')
+    args = parser.parse_args(argv)
+
+    from services.synthetic_data import generate_traffic
+
+    results = []
+    convergence = None
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'traffic_data.csv')
+        next(generate_traffic(5000, seed=7, chunk_size=5000)).to_csv(data_path, index=False)
+
+        for count in args.nodes:
+            state_url = f'sqlite:///{os.path.join(tmp, f"state-{count}.db")}'
+            db_path = os.path.join(tmp, f'app-{count}.db')
+            nodes = []
+            try:
+                for _ in range(count):
+                    nodes.append(start_node(state_url, db_path, args.workers, args.threads, args.sync_seconds))
+                base_urls = [url for _, url in nodes]
+
+                # Warm every worker before timing
+                run_cluster_load(base_urls, args.endpoint, args.threads, 2)
+                summary = run_cluster_load(base_urls, args.endpoint, args.concurrency, args.requests)
+                results.append(summary)
+
+                if count == max(args.nodes):
+                    version, seconds = measure_convergence(base_urls, data_path)
+                    convergence = {'nodes': count, 'version': version, 'seconds': seconds}
+            except RuntimeError as e:
+                print(f"⚠️  {e}")
+            finally:
+                for proc, _ in nodes:
+                    proc.terminate()
+                for proc, _ in nodes:
+                    proc.wait(timeout=30)
+
+    baseline = next((r['throughput_rps'] / r['nodes'] for r in results if r['nodes'] == min(args.nodes)), None)
+    for summary in results:
+        summary['efficiency'] = round(summary['throughput_rps'] / (baseline * summary['nodes']), 2) \
+            if baseline else None
+        print(
+            f"nodes={summary['nodes']:<3} {summary['throughput_rps']:>8} req/s  "
+            f"efficiency {summary['efficiency']}  p50 {summary['p50_ms']:>8} ms  p99 {summary['p99_ms']:>8} ms"
+        )
+    if convergence:
+        print(f"version {convergence['version']} served by all {convergence['nodes']} nodes "
+              f"after {convergence['seconds']} s")
+
+    report = {
+        'endpoint': args.endpoint,
+        'cpu_count': os.cpu_count(),
+        'workers_per_node': args.workers,
+        'threads': args.threads,
+        'results': results,
+        'convergence': convergence
+    }
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
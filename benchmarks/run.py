@@ -0,0 +1,292 @@
+"""
+Benchmark suite for every API endpoint and the core services
+
+Runs the Flask app in-process against a seeded throwaway SQLite database,
+a stub Polygon RPC node and a synthetic traffic dataset, then writes a
+JSON report that can be compared against a previous run.
+
+    python -m benchmarks.run --traffic-rows 100000 --output bench.json
+    python -m benchmarks.run --output new.json --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+from benchmarks.stub_rpc import StubRPCServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# EIP-55 checksummed, so the benchmarks exercise the accept path
+WALLET = '0x742D35CC6634c0532925A3b844BC9E7595F0BEb0'
+
+
+def measure(fn, iterations, warmup=3):
+    """
+    Run fn repeatedly; latency percentiles in ms and throughput
+
+    When fn returns a response, the HTTP status codes seen are reported
+    under 'status' (one code, or a sorted list if they varied).
+    """
+    statuses = set()
+    for _ in range(min(warmup, iterations)):
+        fn()
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        result = fn()
+        latencies.append(time.perf_counter() - t0)
+        if hasattr(result, 'status_code'):
+            statuses.add(result.status_code)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    report = {'status': statuses.pop() if len(statuses) == 1 else sorted(statuses)} if statuses else {}
+    return {
+        **report,
+        'iterations': iterations,
+        'throughput_ops': round(iterations / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 4),
+        'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 4),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 4)
+    }
+
+
+def _seed_database(app, drivers, incidents, seed):
+    """Bulk-load synthetic drivers and incidents; returns one seeded driver"""
+    from models import db, Driver
+    from services import synthetic_data
+
+    with app.app_context():
+        db.create_all()
+        url = db.engine.url.render_as_string(hide_password=False)
+        synthetic_data.write('drivers', drivers, url, seed=seed)
+        synthetic_data.write('incidents', incidents, url, seed=seed)
+        return Driver.query.first().to_dict()
+
+
+def endpoint_cases(client, driver):
+    """(name, callable, expected status) for each HTTP endpoint"""
+    counter = {'n': 0}
+
+    def register():
+        counter['n'] += 1
+        n = counter['n']
+        return client.post('/api/auth/register', json={
+            'first_name': 'Bench', 'last_name': f'Driver{n}',
+            'email': f'bench{n}@example.com', 'phone': '+2348000000000',
+            'license_number': f'BENCH{n:08d}', 'license_expiry': '2030-01-01',
+            'vehicle_plate': 'BEN-001-AA', 'insurance_provider': 'Leadway',
+            'insurance_expiry': '2030-01-01', 'road_cert_number': f'RCB{n:06d}',
+            'cert_expiry': '2030-01-01', 'wallet_address': WALLET
+        })
+
+    def get(path):
+        return lambda: client.get(path)
+
+    def post(path, body):
+        return lambda: client.post(path, json=body)
+
+    return [
+        ('GET /', get('/'), 200),
+        ('GET /health', get('/health'), 200),
+        ('GET /metrics', get('/metrics'), 200),
+        ('POST /api/auth/register', register, 201),
+        ('POST /api/auth/login', post('/api/auth/login', {
+            'email': driver['email'], 'license_number': driver['license_number']
+        }), 200),
+        ('GET /api/auth/drivers', get('/api/auth/drivers?per_page=100'), 200),
+        ('GET /api/auth/health', get('/api/auth/health'), 200),
+        ('POST /api/predict/route', post('/api/predict/route', {
+            'start_location': 'Ikeja', 'end_location': 'Victoria Island'
+        }), 200),
+        ('GET /api/predict/accident-hotspots', get('/api/predict/accident-hotspots'), 200),
+        ('GET /api/predict/statistics', get('/api/predict/statistics'), 200),
+        ('GET /api/predict/places', get('/api/predict/places?q=lek'), 200),
+        ('POST /api/predict/incidents', post('/api/predict/incidents', {
+            'location': 'Oshodi', 'incident_type': 'collision',
+            'severity': 'minor', 'time_of_day': 'morning'
+        }), 201),
+        ('GET /api/predict/health', get('/api/predict/health'), 200),
+        ('POST /api/verify/driver', post('/api/verify/driver', {'license_number': driver['license_number']}), 200),
+        ('GET /api/verify/wallet', get(f"/api/verify/wallet/{driver['wallet_address']}"), 200),
+        ('GET /api/verify/check-validity', get(f"/api/verify/check-validity/{driver['license_number']}"), 200),
+        ('GET /api/verify/blockchain-status', get('/api/verify/blockchain-status'), 200),
+        ('GET /api/verify/health', get('/api/verify/health'), 200),
+    ]
+
+
+def service_cases(traffic_path, exposure=None):
+    """(name, callable, speed) for service micro-benchmarks; slow ones run fewer iterations"""
+    from services.ai_service import TrafficPredictor, predict_best_route
+    from services.data_analysis import DataAnalysisService
+    from services.polygon_service import polygon_service
+
+    predictor = TrafficPredictor()
+    analysis = DataAnalysisService()
+    analysis.load_traffic_data(traffic_path)
+    driver = {
+        'license_number': 'BENCH', 'first_name': 'Bench', 'last_name': 'Driver',
+        'wallet_address': WALLET, 'vehicle_plate': 'BEN-001-AA',
+        'insurance_provider': 'Leadway', 'road_cert_number': 'RC1'
+    }
+
+    def train():
+        predictor.train_model(traffic_path)
+
+    train()
+    compiled_path = os.path.join(os.path.dirname(traffic_path), 'traffic_predictor.forest.json')
+    predictor.export_compiled(compiled_path)
+    compiled = TrafficPredictor.load_compiled(compiled_path)
+    return [
+        ('TrafficPredictor.train_model', train, 'slow'),
+        ('TrafficPredictor.predict', lambda: predictor.predict('Ikeja', 'morning', 1, 7), 'fast'),
+        ('TrafficPredictor.predict (compiled)', lambda: compiled.predict('Ikeja', 'morning', 1, 7), 'fast'),
+        ('predict_best_route', lambda: predict_best_route('Ikeja', 'Yaba', exposure=exposure), 'fast'),
+        ('DataAnalysisService.load_traffic_data', lambda: analysis.load_traffic_data(traffic_path), 'slow'),
+        ('DataAnalysisService.get_accident_statistics', analysis.get_accident_statistics, 'fast'),
+        ('DataAnalysisService.identify_hotspots', analysis.identify_hotspots, 'fast'),
+        ('PolygonService._is_valid_address', lambda: polygon_service._is_valid_address(WALLET), 'fast'),
+        ('PolygonService.register_driver', lambda: polygon_service.register_driver(driver), 'fast'),
+        ('PolygonService.verify_driver', lambda: polygon_service.verify_driver(WALLET), 'fast'),
+        ('PolygonService.get_network_info', polygon_service.get_network_info, 'fast'),
+    ]
+
+
+def compare(current, baseline, threshold):
+    """Print p50 ratios against a baseline report; returns regressed names"""
+    regressions = []
+    for section in ('endpoints', 'services'):
+        old = baseline.get(section, {})
+        for name, result in current.get(section, {}).items():
+            if name not in old or not old[name]['p50_ms']:
+                continue
+            ratio = result['p50_ms'] / old[name]['p50_ms']
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  <-- regression'
+                regressions.append(name)
+            print(f"{name:50} {old[name]['p50_ms']:>10.3f} -> {result['p50_ms']:>10.3f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--traffic-rows', type=int, default=10000, help='synthetic traffic rows (1k to 10M)')
+    parser.add_argument('--drivers', type=int, default=1000, help='seeded driver rows')
+    parser.add_argument('--incidents', type=int, default=1000, help='seeded incident rows')
+    parser.add_argument('--iterations', type=int, default=200, help='iterations per fast benchmark')
+    parser.add_argument('--slow-iterations', type=int, default=3, help='iterations per slow benchmark')
+    parser.add_argument('--rpc-latency', type=float, default=0.0, help='stub RPC latency (s)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', help='substring filter on benchmark names')
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--compare', help='baseline JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed p50 slowdown before flagging')
+    args = parser.parse_args(argv)
+
+    # sklearn warns on every predict made without feature names
+    warnings.filterwarnings('ignore', category=UserWarning, module='sklearn')
+
+    tmp = tempfile.TemporaryDirectory()
+    rpc = StubRPCServer(latency=args.rpc_latency).start()
+
+    # Config is read at import time, so point it at the fixtures first
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+    os.environ['POLYGON_RPC_URL'] = rpc.url
+    os.environ['RATE_LIMIT_ENABLED'] = 'False'
+    os.chdir(ROOT)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    traffic_path = os.path.join(tmp.name, 'traffic.csv')
+    from services import synthetic_data
+    synthetic_data.write('traffic', args.traffic_rows, traffic_path, seed=args.seed)
+
+    from app import app
+    from services.data_analysis import data_analysis_service
+
+    data_analysis_service.load_traffic_data(traffic_path)
+    driver = _seed_database(app, args.drivers, args.incidents, args.seed)
+
+    def selected(name):
+        return not args.only or args.only.lower() in name.lower()
+
+    report = {
+        'meta': {
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'traffic_rows': args.traffic_rows,
+            'drivers': args.drivers,
+            'incidents': args.incidents,
+            'rpc_latency_s': args.rpc_latency
+        },
+        'endpoints': {},
+        'services': {}
+    }
+
+    client = app.test_client()
+    # A case answering with the wrong status is timing an error path
+    failures = []
+    for name, fn, expected in endpoint_cases(client, driver):
+        if selected(name):
+            report['endpoints'][name] = result = measure(fn, args.iterations)
+            print(f"{name:50} p50 {result['p50_ms']:>10.3f} ms  p99 {result['p99_ms']:>10.3f} ms")
+            if result.get('status') != expected:
+                failures.append(name)
+                print(f"{'':50} status {result.get('status')}, expected {expected}")
+
+    # Route scoring reads incident exposure from the database; build it once up front
+    from services.routing import route_engine
+    with app.app_context():
+        exposure = route_engine.incident_exposure()
+
+    for name, fn, speed in service_cases(traffic_path, exposure):
+        if selected(name):
+            iterations = args.slow_iterations if speed == 'slow' else args.iterations
+            report['services'][name] = result = measure(fn, iterations, warmup=0 if speed == 'slow' else 3)
+            print(f"{name:50} p50 {result['p50_ms']:>10.3f} ms  p99 {result['p99_ms']:>10.3f} ms")
+
+    rpc.stop()
+    tmp.cleanup()
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+    if failures:
+        print(f"\n{len(failures)} endpoint(s) answered with an unexpected status: {', '.join(failures)}")
+        sys.exit(1)
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        print()
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Minimal JSON-RPC stand-in for a Polygon node, with configurable latency
+
+Raw transactions are accepted and "mined" instantly: each gets a receipt
+and the signed transaction is kept in .transactions, enough to exercise
+signing, sending and receipt waits (e.g. attestation anchoring) without a
+chain. receipt_status=0 makes every transaction revert.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from eth_account import Account
+from eth_utils import keccak
+
+
+DEFAULT_RESULTS = {
+    'web3_clientVersion': 'stub-rpc/1.0',
+    'net_version': '80001',
+    'eth_chainId': hex(80001),
+    'eth_blockNumber': hex(1_000_000),
+    'eth_gasPrice': hex(30_000_000_000),
+    'eth_getBalance': hex(2_500_000_000_000_000_000),
+    'eth_getTransactionCount': hex(0),
+    'eth_estimateGas': hex(200_000),
+}
+
+
+class StubRPCServer:
+    """Threaded JSON-RPC server answering a fixed method table"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, results=None, receipt_status=1):
+        self.latency = latency
+        self.receipt_status = receipt_status
+        self.results = dict(DEFAULT_RESULTS, **(results or {}))
+        self.results.setdefault('eth_sendRawTransaction', self._send_raw_transaction)
+        self.results.setdefault('eth_getTransactionReceipt', self._transaction_receipt)
+        self.calls = 0
+        self.transactions = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                batch = payload if isinstance(payload, list) else [payload]
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                replies = [server._reply(item) for item in batch]
+                body = json.dumps(replies if isinstance(payload, list) else replies[0]).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _send_raw_transaction(self, params):
+        raw = bytes.fromhex(params[0][2:])
+        tx_hash = '0x' + keccak(raw).hex()
+        sender = Account.recover_transaction(params[0])
+        self.transactions[tx_hash] = {'from': sender, 'raw': params[0]}
+        return tx_hash
+
+    def _transaction_receipt(self, params):
+        tx = self.transactions.get(params[0])
+        if tx is None:
+            return None
+        return {
+            'transactionHash': params[0],
+            'transactionIndex': '0x0',
+            'blockHash': '0x' + '11' * 32,
+            'blockNumber': hex(1_000_001),
+            'from': tx['from'],
+            'to': tx['from'],
+            'cumulativeGasUsed': hex(21_000),
+            'gasUsed': hex(21_000),
+            'effectiveGasPrice': hex(30_000_000_000),
+            'contractAddress': None,
+            'logs': [],
+            'logsBloom': '0x' + '00' * 256,
+            'status': hex(self.receipt_status),
+            'type': '0x0'
+        }
+
+    def _reply(self, item):
+        self.calls += 1
+        method = item.get('method')
+        if method in self.results:
+            result = self.results[method]
+            if callable(result):
+                result = result(item.get('params') or [])
+            return {'jsonrpc': '2.0', 'id': item.get('id'), 'result': result}
+        return {
+            'jsonrpc': '2.0',
+            'id': item.get('id'),
+            'error': {'code': -32601, 'message': f'Method not found: {method}'}
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8545)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds per request')
+    args = parser.parse_args()
+
+    stub = StubRPCServer(port=args.port, latency=args.latency)
+    print(f"Stub RPC listening on {stub.url} (latency {args.latency}s)")
+    stub.httpd.serve_forever()
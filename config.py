@@ -14,6 +14,22 @@ class Config:
     POLYGON_RPC_URL = os.environ.get('POLYGON_RPC_URL') or 'https://rpc-mumbai.maticvigil.com'
     CONTRACT_ADDRESS = os.environ.get('CONTRACT_ADDRESS') or '0x0000000000000000000000000000000000000000'
     PRIVATE_KEY = os.environ.get('PRIVATE_KEY') or ''
+    POLYGON_RPC_TIMEOUT = float(os.environ.get('POLYGON_RPC_TIMEOUT') or 10)
+    POLYGON_RECEIPT_TIMEOUT = float(os.environ.get('POLYGON_RECEIPT_TIMEOUT') or 120)
+    # 'direct': one registration transaction per driver; 'batch': records
+    # are collected for ATTESTATION_BATCH_SECONDS and only a Merkle root is
+    # anchored on chain (services.attestation)
+    ATTESTATION_MODE = os.environ.get('ATTESTATION_MODE') or 'direct'
+    ATTESTATION_BATCH_SECONDS = int(os.environ.get('ATTESTATION_BATCH_SECONDS') or 60)
+    ATTESTATION_BATCH_MAX = int(os.environ.get('ATTESTATION_BATCH_MAX') or 10000)
+    ATTESTATION_ANCHOR_GAS = int(os.environ.get('ATTESTATION_ANCHOR_GAS') or 30000)
+    # Offline credentials (services.credentials); signed with this key. It
+    # must not be PRIVATE_KEY; with DEBUG on and no key, one is derived from
+    # SECRET_KEY for development, otherwise credentials are disabled
+    CREDENTIAL_SIGNING_KEY = os.environ.get('CREDENTIAL_SIGNING_KEY') or ''
+    CREDENTIAL_TTL_DAYS = int(os.environ.get('CREDENTIAL_TTL_DAYS') or 30)
+    # Distinct addresses whose EIP-55 checksum is memoized
+    ADDRESS_CACHE_SIZE = int(os.environ.get('ADDRESS_CACHE_SIZE') or 65536)
 
     # Network
     NETWORK = os.environ.get('NETWORK') or 'polygon-mumbai'
@@ -24,6 +40,67 @@ class Config:
     API_PORT = int(os.environ.get('PORT', 5000))
     DEBUG = os.environ.get('DEBUG', 'False').lower() == 'true'
 
+    # Admin endpoints (/api/admin) are disabled while this is empty
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN') or ''
+
+    # Sampling profiler
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'False').lower() == 'true'
+    PROFILER_INTERVAL = float(os.environ.get('PROFILER_INTERVAL') or 0.005)
+    PROFILER_MIN_INTERVAL = 0.001
+    PROFILER_MAX_SECONDS = float(os.environ.get('PROFILER_MAX_SECONDS') or 60)
+    PROFILER_MAX_STACKS = 5000
+    PROFILER_MAX_CONCURRENT_REQUESTS = 4
+    PROFILER_KEEP_PROFILES = 20
+
+    # Admission control: 'rate/burst' token buckets per client and priority class.
+    # Off by default: many mobile clients share one carrier-NAT address.
+    # Clients are keyed by X-API-Key when it is one of API_KEYS, else by address
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'False').lower() == 'true'
+    API_KEYS = {key.strip() for key in (os.environ.get('API_KEYS') or '').split(',') if key.strip()}
+    # Proxies in front of the app; X-Forwarded-For is honoured for this many hops
+    PROXY_FIX_HOPS = int(os.environ.get('PROXY_FIX_HOPS') or 0)
+    RATE_LIMIT_CRITICAL = os.environ.get('RATE_LIMIT_CRITICAL') or '20/40'
+    RATE_LIMIT_NORMAL = os.environ.get('RATE_LIMIT_NORMAL') or '10/20'
+    RATE_LIMIT_BULK = os.environ.get('RATE_LIMIT_BULK') or '5/10'
+    SHED_ENABLED = os.environ.get('SHED_ENABLED', 'True').lower() == 'true'
+    SHED_MAX_IN_FLIGHT = int(os.environ.get('SHED_MAX_IN_FLIGHT') or os.environ.get('GUNICORN_THREADS') or 8)
+    SHED_RESERVED_CRITICAL = int(os.environ.get('SHED_RESERVED_CRITICAL') or 2)
+    SHED_TARGET_DELAY = float(os.environ.get('SHED_TARGET_DELAY') or 0.1)
+    SHED_MAX_QUEUE_DELAY_FACTOR = float(os.environ.get('SHED_MAX_QUEUE_DELAY_FACTOR') or 10)
+    # Addresses of the load balancers whose X-Request-Start is believed
+    TRUSTED_PROXIES = {addr.strip() for addr in (os.environ.get('TRUSTED_PROXIES') or '').split(',') if addr.strip()}
+
+    # memory:// (per process), sqlite:///path (shared by one machine's
+    # workers) or redis://host:6379/0 (shared by every node)
+    STATE_BACKEND_URL = os.environ.get('STATE_BACKEND_URL') or 'memory://'
+    STATE_BACKEND_TIMEOUT = float(os.environ.get('STATE_BACKEND_TIMEOUT') or 0.5)
+    # File locks (state_backend.host_lock) for jobs that change files or chain state
+    LOCK_DIR = os.environ.get('LOCK_DIR') or 'data/locks'
+    VERSION_SYNC_SECONDS = float(os.environ.get('VERSION_SYNC_SECONDS') or 2)
+    NETWORK_INFO_TTL = int(os.environ.get('NETWORK_INFO_TTL') or 15)
+
+    # Background precomputation (services.scheduler); intervals in seconds
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'True').lower() == 'true'
+    SCHEDULER_TICK_SECONDS = float(os.environ.get('SCHEDULER_TICK_SECONDS') or 1)
+    HOTSPOTS_REFRESH_SECONDS = int(os.environ.get('HOTSPOTS_REFRESH_SECONDS') or 300)
+    STATISTICS_REFRESH_SECONDS = int(os.environ.get('STATISTICS_REFRESH_SECONDS') or 300)
+    MODEL_TABLE_REFRESH_SECONDS = int(os.environ.get('MODEL_TABLE_REFRESH_SECONDS') or 60)
+    TIMESERIES_ROLLUP_SECONDS = int(os.environ.get('TIMESERIES_ROLLUP_SECONDS') or 3600)
+    # Document-validity answers are cached until the daily reset (local time)
+    VALIDITY_CACHE_RESET_AT = os.environ.get('VALIDITY_CACHE_RESET_AT') or '00:00'
+
+    # Shared directory for summing /metrics across gunicorn workers (services.metrics)
+    METRICS_DIR = os.environ.get('METRICS_DIR') or None
+    METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS') or 5)
+
+    # Response compression
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE') or 500)
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL') or 6)
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY') or 4)
+
+    # Streaming exports (services.export): rows fetched and written per chunk
+    EXPORT_CHUNK_ROWS = int(os.environ.get('EXPORT_CHUNK_ROWS') or 2000)
+
     # CORS - IMPORTANT: Add your Vercel domain here
     CORS_ORIGINS = [
         "http://localhost:*",
@@ -35,4 +112,53 @@ class Config:
 
     # AI Model Configuration
     MODEL_PATH = 'models/traffic_predictor.pkl'
-    CONFIDENCE_THRESHOLD = 0.75
\ No newline at end of file
+    COMPILED_MODEL_PATH = os.environ.get('COMPILED_MODEL_PATH') or 'models/traffic_predictor.forest.json'
+    CONFIDENCE_THRESHOLD = 0.75
+
+    # Incremental training pipeline
+    TRAINING_PARTITIONS_DIR = os.environ.get('TRAINING_PARTITIONS_DIR') or 'data/partitions'
+    TRAINING_MANIFEST_PATH = os.environ.get('TRAINING_MANIFEST_PATH') or 'models/training_manifest.json'
+    TRAINING_HOLDOUT_FRACTION = float(os.environ.get('TRAINING_HOLDOUT_FRACTION') or 0.2)
+    TRAINING_NEW_TREES = int(os.environ.get('TRAINING_NEW_TREES') or 10)
+    TRAINING_MAX_TREES = int(os.environ.get('TRAINING_MAX_TREES') or 300)
+    TRAINING_PROMOTION_TOLERANCE = float(os.environ.get('TRAINING_PROMOTION_TOLERANCE') or 0.01)
+    TRAINING_N_JOBS = int(os.environ.get('TRAINING_N_JOBS') or -1)
+    TRAINING_CHUNK_ROWS = int(os.environ.get('TRAINING_CHUNK_ROWS') or 500000)
+    TRAINING_SAMPLE_FRACTION = float(os.environ.get('TRAINING_SAMPLE_FRACTION') or 1.0)
+    TRAINING_MAX_ROWS = int(os.environ.get('TRAINING_MAX_ROWS') or 0)
+
+    # Time-series store (day partitions per resolution)
+    TIMESERIES_DIR = os.environ.get('TIMESERIES_DIR') or 'data/timeseries'
+    TIMESERIES_RETENTION_1M_DAYS = int(os.environ.get('TIMESERIES_RETENTION_1M_DAYS') or 7)
+    TIMESERIES_RETENTION_15M_DAYS = int(os.environ.get('TIMESERIES_RETENTION_15M_DAYS') or 90)
+    TIMESERIES_RETENTION_1H_DAYS = int(os.environ.get('TIMESERIES_RETENTION_1H_DAYS') or 730)
+
+    # Probe / sensor feed (sliding-window congestion)
+    PROBE_WINDOW_SECONDS = int(os.environ.get('PROBE_WINDOW_SECONDS') or 300)
+    PROBE_SLOT_SECONDS = int(os.environ.get('PROBE_SLOT_SECONDS') or 5)
+    PROBE_SNAPSHOT_SECONDS = float(os.environ.get('PROBE_SNAPSHOT_SECONDS') or 0.5)
+    PROBE_FREE_FLOW_KMH = float(os.environ.get('PROBE_FREE_FLOW_KMH') or 60)
+    PROBE_SNAP_RADIUS_KM = float(os.environ.get('PROBE_SNAP_RADIUS_KM') or 2.0)
+    PROBE_MAX_BATCH = int(os.environ.get('PROBE_MAX_BATCH') or 50000)
+    PROBE_INGEST_TOKEN = os.environ.get('PROBE_INGEST_TOKEN')
+    # Pings above these are refused as sensor faults
+    PROBE_MAX_SPEED_KMH = float(os.environ.get('PROBE_MAX_SPEED_KMH') or 250)
+    PROBE_MAX_COUNT = int(os.environ.get('PROBE_MAX_COUNT') or 10000)
+    # Accepted pings are written to the time-series store this often (0 disables)
+    PROBE_PERSIST_SECONDS = float(os.environ.get('PROBE_PERSIST_SECONDS') or 60)
+
+    # Gazetteer (place name resolution)
+    GAZETTEER_PATH = os.environ.get('GAZETTEER_PATH') or 'data/lagos_places.json'
+
+    # Route engine (services.routing)
+    ROAD_NETWORK_PATH = os.environ.get('ROAD_NETWORK_PATH') or 'data/lagos_roads.json'
+    ROUTE_CANDIDATES = int(os.environ.get('ROUTE_CANDIDATES') or 5)
+    # Incidents within this distance of a road link count against it
+    INCIDENT_BUFFER_KM = float(os.environ.get('INCIDENT_BUFFER_KM') or 0.5)
+    INCIDENT_WINDOW_DAYS = int(os.environ.get('INCIDENT_WINDOW_DAYS') or 365)
+    INCIDENT_EXPOSURE_REFRESH_SECONDS = int(os.environ.get('INCIDENT_EXPOSURE_REFRESH_SECONDS') or 300)
+    # Zone-to-zone travel-time matrices (services.od_matrix), rebuilt by the
+    # scheduler and memory-mapped by every worker
+    OD_MATRIX_DIR = os.environ.get('OD_MATRIX_DIR') or 'models/od_matrix'
+    OD_MATRIX_REFRESH_SECONDS = int(os.environ.get('OD_MATRIX_REFRESH_SECONDS') or 900)
+    OD_MATRIX_MAX_PAIRS = int(os.environ.get('OD_MATRIX_MAX_PAIRS') or 10000)
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+Gunicorn configuration
+
+The worker class decides how I/O-bound views behave: with the default
+``sync`` worker a slow Polygon RPC call in /api/verify or /api/auth/register
+holds the whole process. ``gthread`` (default here) and ``gevent`` keep
+serving other requests while a view waits on the RPC node or the database.
+
+The live update stream (/api/predict/stream) is fanned out in-process, so
+a client only receives events published by the worker it is connected
+to; deployments that use it should run WEB_CONCURRENCY=1 and scale with
+threads or gevent connections (see services.live_updates).
+
+Metrics are per worker too; set METRICS_DIR to a directory the workers
+share so /metrics reports the whole server (see services.metrics). It is
+emptied when the server starts.
+
+Environment:
+    GUNICORN_WORKER_CLASS   sync | gthread | gevent   (default: gthread)
+    WEB_CONCURRENCY         worker processes           (default: 2)
+    GUNICORN_THREADS        threads per gthread worker (default: 8)
+    GUNICORN_CONNECTIONS    greenlets per gevent worker (default: 256)
+    GUNICORN_TIMEOUT        worker timeout in seconds  (default: 60)
+    METRICS_DIR             shared metrics snapshots   (default: unset)
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+worker_connections = int(os.environ.get('GUNICORN_CONNECTIONS', 256))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+# Live update streams (/api/predict/stream) stay open; keep idle
+# keep-alive short so they are the only long-lived connections
+keepalive = 5
+
+if worker_class == 'sync':
+    threads = 1
+elif worker_class == 'gevent':
+    # gunicorn monkey-patches the stdlib for gevent workers, so web3's
+    # requests session and sqlite calls yield to other greenlets
+    threads = 1
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')
+errorlog = '-'
+
+
+def on_starting(server):
+    # Snapshots from a previous run would be added to this one's counters
+    metrics_dir = os.environ.get('METRICS_DIR')
+    if metrics_dir and os.path.isdir(metrics_dir):
+        for name in os.listdir(metrics_dir):
+            if name.startswith('metrics-'):
+                os.remove(os.path.join(metrics_dir, name))
+
+
+def when_ready(server):
+    # The scheduler's slot locks live in the state backend; memory:// is
+    # per process, so every worker would run every job in every slot
+    backend = os.environ.get('STATE_BACKEND_URL') or 'memory://'
+    scheduler_enabled = os.environ.get('SCHEDULER_ENABLED', 'True').lower() == 'true'
+    if server.cfg.workers > 1 and scheduler_enabled and backend.startswith('memory://'):
+        server.log.warning(
+            'SCHEDULER_ENABLED with STATE_BACKEND_URL=memory:// and %d workers: every worker runs '
+            'every scheduled job. Set STATE_BACKEND_URL to sqlite:/// or redis:// to run each once.',
+            server.cfg.workers
+        )
@@ -1,10 +1,56 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 from datetime import datetime
 
 db = SQLAlchemy()
 
 
-class Driver(db.Model):
+def compile_row_serializer(fields, date_fields=()):
+    """
+    Build a row -> dict function with the attribute accesses unrolled
+
+    Fields listed in date_fields are converted with isoformat(); pass an
+    empty tuple to keep native date objects for the JSON provider.
+    """
+    items = []
+    for field in fields:
+        if field in date_fields:
+            items.append(f"{field!r}: row.{field}.isoformat()")
+        else:
+            items.append(f"{field!r}: row.{field}")
+
+    source = "def serialize(row):\n    return {" + ", ".join(items) + "}\n"
+    namespace = {}
+    exec(compile(source, f"<serializer {','.join(fields)}>", "exec"), namespace)
+    return namespace['serialize']
+
+
+class SerializerMixin:
+    """Adds to_dict() and a bulk serialize() from serialized_fields"""
+
+    serialized_fields = ()
+    date_fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.serialized_fields:
+            cls._to_dict = staticmethod(
+                compile_row_serializer(cls.serialized_fields, cls.date_fields)
+            )
+            cls._to_row = staticmethod(compile_row_serializer(cls.serialized_fields))
+
+    def to_dict(self):
+        return self._to_dict(self)
+
+    @classmethod
+    def serialize(cls, rows):
+        """Serialize rows for jsonify, leaving dates to the JSON provider"""
+        to_row = cls._to_row
+        return [to_row(row) for row in rows]
+
+
+class Driver(SerializerMixin, db.Model):
     __tablename__ = 'drivers'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -20,30 +66,132 @@ class Driver(db.Model):
     road_cert_number = db.Column(db.String(50), nullable=False)
     cert_expiry = db.Column(db.Date, nullable=False)
     blockchain_tx = db.Column(db.String(100))
-    wallet_address = db.Column(db.String(42))
+    # Stored lowercase (polygon_service.normalize_address) so lookups are exact
+    wallet_address = db.Column(db.String(42), index=True)
+    # Batched attestation (services.attestation): the record's hash, its
+    # batch and the Merkle inclusion proof against that batch's root
+    record_hash = db.Column(db.String(66))
+    attestation_batch_id = db.Column(db.Integer, db.ForeignKey('attestation_batches.id'), index=True)
+    attestation_index = db.Column(db.Integer)
+    attestation_proof = db.Column(db.Text)
+    # Position in the change feed; restamped on every insert or update
+    change_seq = db.Column(db.Integer, index=True)
+    # Set when the driver's offline credentials are revoked; none are issued after
+    revoked_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'email': self.email,
-            'phone': self.phone,
-            'license_number': self.license_number,
-            'license_expiry': self.license_expiry.isoformat(),
-            'vehicle_plate': self.vehicle_plate,
-            'insurance_provider': self.insurance_provider,
-            'insurance_expiry': self.insurance_expiry.isoformat(),
-            'road_cert_number': self.road_cert_number,
-            'cert_expiry': self.cert_expiry.isoformat(),
-            'blockchain_tx': self.blockchain_tx,
-            'wallet_address': self.wallet_address
-        }
-
-
-class TrafficIncident(db.Model):
+    serialized_fields = (
+        'id', 'first_name', 'last_name', 'email', 'phone',
+        'license_number', 'license_expiry', 'vehicle_plate',
+        'insurance_provider', 'insurance_expiry',
+        'road_cert_number', 'cert_expiry', 'blockchain_tx', 'wallet_address'
+    )
+    date_fields = ('license_expiry', 'insurance_expiry', 'cert_expiry')
+
+
+class DriverChange(SerializerMixin, db.Model):
+    """
+    Change sequence for the driver feed, and tombstones of deleted drivers
+
+    Every driver insert or update takes the next seq from this table; only
+    deletions keep their row. AUTOINCREMENT stops SQLite from reusing the
+    seq of a row that was removed.
+
+    Seqs must become visible in the order they are handed out, or a client
+    that reads seq 11 moves its cursor past a seq 10 committed later.
+    SQLite holds its write lock from the first write to commit, and on
+    PostgreSQL next_change_seq locks this table until commit; other
+    databases are not supported by the feed.
+    """
+    __tablename__ = 'driver_changes'
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    seq = db.Column(db.Integer, primary_key=True)
+    driver_id = db.Column(db.Integer)
+    license_number = db.Column(db.String(50))
+    deleted_at = db.Column(db.DateTime, index=True)
+
+    serialized_fields = ('seq', 'driver_id', 'license_number', 'deleted_at')
+    date_fields = ('deleted_at',)
+
+
+def next_change_seq(connection, driver_id, license_number, deleted=False):
+    """Allocate a change seq; deletions keep their row as a tombstone"""
+    table = DriverChange.__table__
+    if connection.dialect.name == 'postgresql':
+        # Held to commit, so writers allocate and commit seqs one at a time;
+        # readers are not blocked (the mode only conflicts with writes)
+        connection.execute(db.text(f'LOCK TABLE {table.name} IN SHARE ROW EXCLUSIVE MODE'))
+    seq = connection.execute(table.insert().values(
+        driver_id=driver_id,
+        license_number=license_number,
+        deleted_at=datetime.utcnow() if deleted else None
+    )).inserted_primary_key[0]
+    if not deleted:
+        connection.execute(table.delete().where(table.c.seq == seq))
+    return seq
+
+
+@event.listens_for(Session, 'before_flush')
+def _stamp_driver_changes(session, flush_context, instances):
+    changed = [obj for obj in session.new if isinstance(obj, Driver)]
+    changed += [obj for obj in session.dirty if isinstance(obj, Driver) and session.is_modified(obj)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Driver)]
+    if not changed and not deleted:
+        return
+
+    # Same connection and transaction as the flush, so a rollback takes the seqs with it
+    connection = session.connection()
+    for driver in changed:
+        driver.change_seq = next_change_seq(connection, driver.id, driver.license_number)
+    for driver in deleted:
+        next_change_seq(connection, driver.id, driver.license_number, deleted=True)
+
+
+class AttestationBatch(SerializerMixin, db.Model):
+    __tablename__ = 'attestation_batches'
+
+    id = db.Column(db.Integer, primary_key=True)
+    merkle_root = db.Column(db.String(66), unique=True, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    transaction_hash = db.Column(db.String(66))
+    network = db.Column(db.String(50))
+    anchored_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    serialized_fields = (
+        'id', 'merkle_root', 'size', 'transaction_hash', 'network', 'anchored_at'
+    )
+    date_fields = ('anchored_at',)
+
+
+class DriverCredential(SerializerMixin, db.Model):
+    __tablename__ = 'driver_credentials'
+
+    # The id is the credential serial and its bit in the revocation bitmap
+    id = db.Column(db.Integer, primary_key=True)
+    driver_id = db.Column(db.Integer, db.ForeignKey('drivers.id'), nullable=False, index=True)
+    issued_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    serialized_fields = ('id', 'driver_id', 'issued_at', 'expires_at')
+    date_fields = ('issued_at', 'expires_at')
+
+
+class CredentialRevocation(SerializerMixin, db.Model):
+    __tablename__ = 'credential_revocations'
+
+    # seq only grows, so checkpoints sync with "everything after seq N"
+    seq = db.Column(db.Integer, primary_key=True)
+    serial = db.Column(db.Integer, db.ForeignKey('driver_credentials.id'), unique=True, nullable=False)
+    reason = db.Column(db.String(200))
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    serialized_fields = ('seq', 'serial', 'reason', 'revoked_at')
+    date_fields = ('revoked_at',)
+
+
+class TrafficIncident(SerializerMixin, db.Model):
     __tablename__ = 'traffic_incidents'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -59,23 +207,15 @@ class TrafficIncident(db.Model):
     incident_date = db.Column(db.DateTime, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'location': self.location,
-            'latitude': self.latitude,
-            'longitude': self.longitude,
-            'incident_type': self.incident_type,
-            'severity': self.severity,
-            'casualties': self.casualties,
-            'time_of_day': self.time_of_day,
-            'weather_condition': self.weather_condition,
-            'road_condition': self.road_condition,
-            'incident_date': self.incident_date.isoformat()
-        }
-
-
-class RouteAnalysis(db.Model):
+    serialized_fields = (
+        'id', 'location', 'latitude', 'longitude', 'incident_type', 'severity',
+        'casualties', 'time_of_day', 'weather_condition', 'road_condition',
+        'incident_date'
+    )
+    date_fields = ('incident_date',)
+
+
+class RouteAnalysis(SerializerMixin, db.Model):
     __tablename__ = 'route_analyses'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -87,14 +227,68 @@ class RouteAnalysis(db.Model):
     estimated_time = db.Column(db.Integer)
     analysis_date = db.Column(db.DateTime, default=datetime.utcnow)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'start_location': self.start_location,
-            'end_location': self.end_location,
-            'recommended_route': self.recommended_route,
-            'congestion_level': self.congestion_level,
-            'accident_count': self.accident_count,
-            'estimated_time': self.estimated_time,
-            'analysis_date': self.analysis_date.isoformat()
-        }
\ No newline at end of file
+    serialized_fields = (
+        'id', 'start_location', 'end_location', 'recommended_route',
+        'congestion_level', 'accident_count', 'estimated_time', 'analysis_date'
+    )
+    date_fields = ('analysis_date',)
+
+
+def upgrade_schema():
+    """
+    Bring an existing database up to the current models
+
+    create_all() only creates missing tables; this also adds nullable
+    columns and indexes added to existing tables, rewrites stored wallet
+    addresses into the canonical lowercase form and gives drivers without
+    a change seq one. Safe to run on every start.
+
+    Returns:
+        dict: Columns and indexes created and driver rows normalised or sequenced
+    """
+    inspector = db.inspect(db.engine)
+    added = []
+    created = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns and column.nullable:
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                with db.engine.begin() as conn:
+                    conn.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                added.append(f'{table.name}.{column.name}')
+
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                created.append(index.name)
+
+    canonical = db.func.lower(db.func.trim(Driver.wallet_address))
+    normalized = db.session.execute(
+        db.update(Driver)
+        .where(Driver.wallet_address != canonical)
+        # Bulk updates skip the flush hook; clear the seq so rows are restamped below
+        .values(wallet_address=canonical, change_seq=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    connection = db.session.connection()
+    unsequenced = db.session.execute(
+        db.select(Driver.id, Driver.license_number).where(Driver.change_seq.is_(None)).order_by(Driver.id)
+    ).all()
+    for driver_id, license_number in unsequenced:
+        db.session.execute(
+            db.update(Driver).where(Driver.id == driver_id)
+            .values(change_seq=next_change_seq(connection, driver_id, license_number))
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    return {
+        'columns_added': added,
+        'indexes_created': created,
+        'wallets_normalized': normalized,
+        'drivers_sequenced': len(unsequenced)
+    }
\ No newline at end of file
@@ -10,5 +10,6 @@ if parent_dir not in sys.path:
 from .auth import auth_bp
 from .prediction import prediction_bp
 from .verification import verification_bp
+from .admin import admin_bp
 
-__all__ = ['auth_bp', 'prediction_bp', 'verification_bp']
\ No newline at end of file
+__all__ = ['auth_bp', 'prediction_bp', 'verification_bp', 'admin_bp']
\ No newline at end of file
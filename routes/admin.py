@@ -0,0 +1,281 @@
+import hmac
+import sys
+import os
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from config import Config
+from models import Driver
+from services.attestation import attestation_service
+from services.cluster import version_coordinator
+from services.credentials import credential_service
+from services.export import DATASETS, FORMATS, stream_export
+from services.profiler import profiler
+from services.rate_limit import load_shedder
+from services.scheduler import scheduler
+
+admin_bp = Blueprint('admin', __name__)
+
+
+@admin_bp.before_request
+def require_admin_token():
+    """Admin endpoints need the X-Admin-Token header"""
+    token = request.headers.get('X-Admin-Token', '')
+    if not Config.ADMIN_TOKEN or not hmac.compare_digest(token.encode(), Config.ADMIN_TOKEN.encode()):
+        return jsonify({
+            'success': False,
+            'error': 'Admin access denied'
+        }), 403
+
+
+@admin_bp.route('/admission', methods=['GET'])
+def admission_status():
+    """Load shedder state for this worker process"""
+    return jsonify({
+        'success': True,
+        'admission': {
+            'enabled': Config.RATE_LIMIT_ENABLED,
+            'shedding_enabled': Config.SHED_ENABLED,
+            'limits': {
+                'critical': Config.RATE_LIMIT_CRITICAL,
+                'normal': Config.RATE_LIMIT_NORMAL,
+                'bulk': Config.RATE_LIMIT_BULK
+            },
+            'state_backend': Config.STATE_BACKEND_URL.split('://')[0],
+            'shedder': load_shedder.status()
+        }
+    }), 200
+
+
+@admin_bp.route('/versions', methods=['GET'])
+def versions_status():
+    """Cluster version pointers and what this worker serves"""
+    try:
+        return jsonify({
+            'success': True,
+            'versions': version_coordinator.status()
+        }), 200
+
+    except Exception as e:
+        print(f"Version status error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@admin_bp.route('/versions/<name>', methods=['POST'])
+def promote_version(name):
+    """Load a dataset/model file here and point every node at it"""
+    try:
+        data = request.get_json(silent=True) or {}
+        path = data.get('path')
+
+        if name not in version_coordinator.status():
+            return jsonify({
+                'success': False,
+                'error': f'Unknown resource: {name}'
+            }), 404
+
+        if not path or not os.path.exists(path):
+            return jsonify({
+                'success': False,
+                'error': 'An existing file path is required'
+            }), 400
+
+        pointer = version_coordinator.promote(name, path=path)
+        return jsonify({
+            'success': True,
+            'resource': name,
+            'pointer': pointer
+        }), 200
+
+    except Exception as e:
+        print(f"Version promotion error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@admin_bp.route('/attestations/flush', methods=['POST'])
+def attestations_flush():
+    """Anchor every pending driver record now instead of at the next window"""
+    try:
+        batches = attestation_service.flush_all()
+        return jsonify({
+            'success': True,
+            'batches': batches,
+            'pending': attestation_service.pending_count()
+        }), 200
+
+    except Exception as e:
+        print(f"Attestation flush error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@admin_bp.route('/credentials/<license_number>/revoke', methods=['POST'])
+def revoke_credentials(license_number):
+    """Revoke every live credential of a driver; checkpoints pick it up on their next sync"""
+    try:
+        driver = Driver.query.filter_by(license_number=license_number).first()
+        if not driver:
+            return jsonify({
+                'success': False,
+                'error': 'Driver not found'
+            }), 404
+
+        data = request.get_json(silent=True) or {}
+        serials = credential_service.revoke_driver(driver, data.get('reason'))
+        return jsonify({
+            'success': True,
+            'revoked': serials,
+            'seq': credential_service.latest_seq()
+        }), 200
+
+    except Exception as e:
+        print(f"Credential revocation error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@admin_bp.route('/export/<dataset>', methods=['GET'])
+def export_dataset(dataset):
+    """
+    Stream a whole table as NDJSON or CSV
+
+    ?format=ndjson|csv&after_id=<id>&limit=<n>; datasets are drivers,
+    incidents and route_analyses. X-Last-Id is the last id the export
+    covers; NDJSON ends with an {"op": "end"} (or "error") line.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if dataset not in DATASETS or fmt not in FORMATS:
+        return jsonify({
+            'success': False,
+            'error': f"Unknown dataset or format; datasets: {', '.join(DATASETS)}, formats: {', '.join(FORMATS)}"
+        }), 400
+
+    try:
+        last_id, chunks = stream_export(
+            dataset, fmt,
+            after_id=request.args.get('after_id', type=int),
+            limit=request.args.get('limit', type=int)
+        )
+    except Exception as e:
+        print(f"Export error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+    return Response(
+        stream_with_context(chunks),
+        mimetype=FORMATS[fmt],
+        headers={
+            'Content-Disposition': f'attachment; filename={dataset}.{fmt}',
+            'X-Accel-Buffering': 'no',
+            'X-Last-Id': '' if last_id is None else str(last_id)
+        }
+    )
+
+
+@admin_bp.route('/scheduler', methods=['GET'])
+def scheduler_status():
+    """Registered background jobs and their last runs on this worker"""
+    return jsonify({
+        'success': True,
+        'scheduler': {
+            'enabled': Config.SCHEDULER_ENABLED,
+            'jobs': scheduler.status()
+        }
+    }), 200
+
+
+@admin_bp.route('/profiler', methods=['GET'])
+def profiler_status():
+    """Profiler state and recent profiles"""
+    return jsonify({
+        'success': True,
+        'profiler': profiler.status()
+    }), 200
+
+
+@admin_bp.route('/profiler/start', methods=['POST'])
+def profiler_start():
+    """Start sampling every thread of this worker process"""
+    if not profiler.enabled:
+        return jsonify({
+            'success': False,
+            'error': 'Profiler disabled (set PROFILER_ENABLED=true)'
+        }), 409
+
+    data = request.get_json(silent=True) or {}
+    for field in ('interval', 'max_seconds'):
+        value = data.get(field)
+        # type() rather than isinstance: true is not a number of seconds
+        if value is not None and (type(value) not in (int, float) or not 0 < value < float('inf')):
+            return jsonify({
+                'success': False,
+                'error': f'{field} must be a positive number of seconds'
+            }), 400
+
+    session = profiler.start(data.get('interval'), data.get('max_seconds'))
+
+    if session is None:
+        return jsonify({
+            'success': False,
+            'error': 'A profiling session is already running'
+        }), 409
+
+    return jsonify({
+        'success': True,
+        'session': session.summary()
+    }), 201
+
+
+@admin_bp.route('/profiler/stop', methods=['POST'])
+def profiler_stop():
+    """Stop the process-wide session"""
+    session = profiler.stop()
+
+    if session is None:
+        return jsonify({
+            'success': False,
+            'error': 'No profiling session running'
+        }), 404
+
+    return jsonify({
+        'success': True,
+        'session': session.summary()
+    }), 200
+
+
+@admin_bp.route('/profiler/profiles/<profile_id>', methods=['GET'])
+def profiler_profile(profile_id):
+    """Folded stacks for a profile, ready for flamegraph.pl or speedscope"""
+    session = profiler.get(profile_id)
+
+    if session is None:
+        return jsonify({
+            'success': False,
+            'error': 'Profile not found'
+        }), 404
+
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'success': True,
+            'session': session.summary(),
+            'stacks': session.snapshot()
+        }), 200
+
+    return current_app.response_class(session.folded(), mimetype='text/plain')
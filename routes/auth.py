@@ -7,14 +7,27 @@ parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from config import Config
 from models import db, Driver
-from services.polygon_service import polygon_service
+from services.attestation import record_hash
+from services.change_feed import driver_change_feed
+from services.polygon_service import polygon_service, normalize_address
+from services.http_cache import conditional
 from datetime import datetime
 
 auth_bp = Blueprint('auth', __name__)
 
 
+def _drivers_version():
+    """Driver count and latest update; changes on insert, update or delete"""
+    count, latest = db.session.query(
+        db.func.count(Driver.id),
+        db.func.max(Driver.updated_at)
+    ).one()
+    return f"{count}:{latest}", latest
+
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """Register a new driver"""
@@ -36,6 +49,14 @@ def register():
                     'error': f'Missing required field: {field}'
                 }), 400
 
+        # One canonical form for every spelling of the address
+        wallet_address = normalize_address(data['wallet_address'])
+        if wallet_address is None:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid wallet address (bad format or EIP-55 checksum)'
+            }), 400
+
         # Check if driver already exists
         existing = Driver.query.filter_by(license_number=data['license_number']).first()
         if existing:
@@ -44,8 +65,13 @@ def register():
                 'error': 'Driver with this license number already registered'
             }), 409
 
-        # Register on Polygon blockchain
-        blockchain_result = polygon_service.register_driver(data)
+        # Register on Polygon blockchain; in batch mode the record is only
+        # anchored later, as part of a Merkle root
+        batched = Config.ATTESTATION_MODE == 'batch'
+        if batched:
+            blockchain_result = {'success': True}
+        else:
+            blockchain_result = polygon_service.register_driver(data)
 
         if not blockchain_result.get('success'):
             return jsonify({
@@ -68,13 +94,27 @@ def register():
             insurance_expiry=datetime.fromisoformat(data['insurance_expiry']),
             road_cert_number=data['road_cert_number'],
             cert_expiry=datetime.fromisoformat(data['cert_expiry']),
-            wallet_address=data['wallet_address'],
+            wallet_address=wallet_address,
             blockchain_tx=tx_hash
         )
+        if batched:
+            driver.record_hash = record_hash(driver)
 
         db.session.add(driver)
         db.session.commit()
 
+        if batched:
+            return jsonify({
+                'success': True,
+                'message': 'Driver registered; on-chain attestation pending',
+                'driver': driver.to_dict(),
+                'attestation': {
+                    'status': 'pending',
+                    'record_hash': driver.record_hash,
+                    'batch_window_seconds': Config.ATTESTATION_BATCH_SECONDS
+                }
+            }), 201
+
         return jsonify({
             'success': True,
             'message': 'Driver registered successfully on Polygon blockchain',
@@ -125,6 +165,7 @@ def login():
 
 
 @auth_bp.route('/drivers', methods=['GET'])
+@conditional(_drivers_version)
 def get_drivers():
     """Get all registered drivers"""
     try:
@@ -139,7 +180,7 @@ def get_drivers():
 
         return jsonify({
             'success': True,
-            'drivers': [driver.to_dict() for driver in drivers.items],
+            'drivers': Driver.serialize(drivers.items),
             'total': drivers.total,
             'pages': drivers.pages,
             'current_page': page
@@ -152,6 +193,46 @@ def get_drivers():
         }), 500
 
 
+@auth_bp.route('/drivers/changes', methods=['GET'])
+@conditional(lambda: (driver_change_feed.latest_seq(), None))
+def driver_changes():
+    """
+    Drivers created, updated or deleted since a cursor
+
+    ?since=<seq>&limit=<n>. NDJSON by default: one upsert or delete per
+    line, then a {"op": "cursor"} line with the cursor for the next call
+    (also sent as X-Next-Cursor). ?format=json returns the same as one
+    object. Polling with an unchanged registry gets a 304.
+    """
+    try:
+        since = request.args.get('since', 0, type=int)
+        limit = request.args.get('limit', type=int)
+        if since < 0 or (limit is not None and limit < 1):
+            return jsonify({
+                'success': False,
+                'error': 'since must be >= 0 and limit >= 1'
+            }), 400
+
+        page = driver_change_feed.changes(since, limit)
+        headers = {'X-Next-Cursor': str(page['cursor']), 'X-More': str(page['more']).lower()}
+
+        if request.args.get('format') == 'json':
+            return jsonify({'success': True, **page}), 200, headers
+
+        dumps = current_app.json.dumps
+        lines = [dumps(change) for change in page['changes']]
+        lines.append(dumps({'op': 'cursor', 'cursor': page['cursor'], 'more': page['more']}))
+        return current_app.response_class(
+            '\n'.join(lines) + '\n', mimetype='application/x-ndjson', headers=headers
+        )
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @auth_bp.route('/health', methods=['GET'])
 def health():
     """Health check for auth service"""
@@ -7,15 +7,77 @@ parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
-from flask import Blueprint, request, jsonify
-from services.ai_service import predict_best_route, analyze_traffic_patterns
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
+from models import db, TrafficIncident
+from services.ai_service import predict_best_route, analyze_traffic_patterns, serving_model
 from services.data_analysis import data_analysis_service
-from datetime import datetime
+from services.gazetteer import gazetteer
+from services.live_updates import live_update_broker
+from services.od_matrix import od_matrix
+from services.probe_feed import ping_error, probe_feed
+from services.scheduler import scheduler
+from services.http_cache import conditional
+from services.time_buckets import TIMES_OF_DAY, WEEKDAYS, time_of_day_for
+from services.timeseries import timeseries_store, to_utc
+from config import Config
+from datetime import datetime, timedelta
 import random
 
 prediction_bp = Blueprint('prediction', __name__)
 
 
+def _dataset_version():
+    """Traffic dataset fingerprint plus the latest recorded incident"""
+    latest_id, latest_at = db.session.query(
+        db.func.max(TrafficIncident.id),
+        db.func.max(TrafficIncident.created_at)
+    ).one()
+    version = f"{data_analysis_service.data_version}:{latest_id or 0}"
+    last_modified = max(
+        (t for t in (data_analysis_service.data_loaded_at, latest_at) if t is not None),
+        default=None
+    )
+    return version, last_modified
+
+
+def _published_version(job, filters=()):
+    """
+    _dataset_version plus when the scheduler last published a job's result
+
+    Responses computed in the request instead (nothing published yet, or
+    one of the filters is set) differ from call to call, so they get no
+    version at all.
+    """
+    def version_func():
+        published = scheduler.published(job)
+        if published is None or any(request.args.get(name) for name in filters):
+            return None, None
+        version, last_modified = _dataset_version()
+        computed_at = datetime.fromisoformat(published['computed_at'])
+        return (
+            f"{version}:{published['computed_at']}",
+            max(computed_at, last_modified) if last_modified else computed_at
+        )
+    return version_func
+
+
+def _traffic_data_version():
+    """Traffic dataset fingerprint"""
+    return data_analysis_service.data_version, data_analysis_service.data_loaded_at
+
+
+def _route_summary(route):
+    """Candidate route as shown in the main/alternative slots"""
+    return {
+        'name': route['name'],
+        'congestion_level': route['congestion_level'] * 10,  # Convert to percentage
+        'accidents_reported': route['historical_accidents'],
+        'estimated_time_minutes': route['estimated_time_min'],
+        'distance_km': route['distance_km'],
+        'risk_level': route['accident_risk']
+    }
+
+
 @prediction_bp.route('/route', methods=['POST'])
 def predict_route():
     """Predict best route using AI"""
@@ -25,6 +87,8 @@ def predict_route():
         start_location = data.get('start_location') or data.get('start')
         end_location = data.get('end_location') or data.get('end')
         time_of_day = data.get('time_of_day', 'afternoon')
+        profile = data.get('profile', 'balanced')
+        weights = data.get('weights')
 
         if not start_location or not end_location:
             return jsonify({
@@ -32,42 +96,95 @@ def predict_route():
                 'error': 'Start and end locations are required'
             }), 400
 
+        # Resolve free-text locations to known places
+        start_place = gazetteer.resolve(start_location)
+        end_place = gazetteer.resolve(end_location)
+        if start_place:
+            start_location = start_place['name']
+        if end_place:
+            end_location = end_place['name']
+
+        # Current probe congestion around both ends of the trip
+        live_congestion = probe_feed.route_congestion(
+            start_place['id'] if start_place else None,
+            end_place['id'] if end_place else None
+        )
+
+        weekday = datetime.now().weekday()
+        weather_score = data.get('weather_score', 8)
+        table = scheduler.result('model_table')
+        if not (table and table['version'] == serving_model.version and table['weather_score'] == weather_score):
+            table = None
+
+        # Congestion expected along the candidate routes: the model's table
+        # when it covers this request, the historical means otherwise
+        if table:
+            forecast = {
+                location: levels[time_of_day][weekday]
+                for location, levels in table['table'].items() if time_of_day in levels
+            }
+        else:
+            forecast = data_analysis_service.congestion_by_location(time_of_day)
+
         # Get route predictions from AI service
-        routes = predict_best_route(start_location, end_location, time_of_day)
+        try:
+            routes = predict_best_route(
+                start_location, end_location, time_of_day, live_congestion,
+                profile=profile, weights=weights, forecast=forecast,
+                live=probe_feed.snapshot(), exposure=scheduler.result('incident_exposure')
+            )
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
 
-        # Get accident statistics
+        # Congestion the served model expects at the start of the trip,
+        # from the precomputed table when it covers this request
+        model_prediction = None
+        if table and start_location in table['table'] and time_of_day in table['table'][start_location]:
+            predicted_level = table['table'][start_location][time_of_day][weekday]
+        else:
+            predicted_level = serving_model.predict(start_location, time_of_day, weekday, weather_score)
+        if predicted_level is not None:
+            model_prediction = {
+                'congestion_level': predicted_level,
+                'model_version': serving_model.version
+            }
+
+        # Get accident statistics; the scheduler only publishes the
+        # city-wide figures, so a route's own are computed here
         stats = data_analysis_service.get_accident_statistics(start_location, end_location)
 
-        # Determine recommendation
+        # Determine recommendation; with a single candidate there is no
+        # alternative to recommend
         main_route = routes[0]
-        alternative_route = routes[1] if len(routes) > 1 else routes[0]
+        alternative_route = routes[1] if len(routes) > 1 else None
 
-        recommendation = 'alternative' if alternative_route['recommended'] else 'main'
-        time_saved = abs(main_route['estimated_time_min'] - alternative_route['estimated_time_min'])
+        if alternative_route is None:
+            recommendation = 'main'
+            time_saved = 0
+        else:
+            recommendation = 'alternative' if alternative_route['recommended'] else 'main'
+            time_saved = abs(main_route['estimated_time_min'] - alternative_route['estimated_time_min'])
 
         return jsonify({
             'success': True,
             'data': {
-                'main_route': {
-                    'name': main_route['name'],
-                    'congestion_level': main_route['congestion_level'] * 10,  # Convert to percentage
-                    'accidents_reported': main_route['historical_accidents'],
-                    'estimated_time_minutes': main_route['estimated_time_min'],
-                    'distance_km': main_route['distance_km'],
-                    'risk_level': main_route['accident_risk']
-                },
-                'alternative_route': {
-                    'name': alternative_route['name'],
-                    'congestion_level': alternative_route['congestion_level'] * 10,
-                    'accidents_reported': alternative_route['historical_accidents'],
-                    'estimated_time_minutes': alternative_route['estimated_time_min'],
-                    'distance_km': alternative_route['distance_km'],
-                    'risk_level': alternative_route['accident_risk']
-                },
+                'main_route': _route_summary(main_route),
+                'alternative_route': _route_summary(alternative_route) if alternative_route else None,
                 'recommendation': recommendation,
                 'time_difference_minutes': time_saved,
                 'analysis_timestamp': datetime.now().isoformat(),
-                'confidence_score': round(random.uniform(0.85, 0.95), 2)
+                'confidence_score': round(random.uniform(0.85, 0.95), 2),
+                'resolved_locations': {
+                    'start': start_place,
+                    'end': end_place
+                },
+                'live_congestion': live_congestion,
+                'model_prediction': model_prediction,
+                'profile': 'custom' if weights is not None else profile,
+                'candidates': routes
             },
             'statistics': stats
         }), 200
@@ -80,12 +197,81 @@ def predict_route():
         }), 500
 
 
+@prediction_bp.route('/matrix', methods=['POST'])
+def predict_matrix():
+    """Travel time, distance and incident risk between many origins and destinations"""
+    try:
+        data = request.get_json() or {}
+
+        origins = data.get('origins') or []
+        destinations = data.get('destinations') or origins
+        now = datetime.now()
+        time_of_day = data.get('time_of_day') or time_of_day_for(now.hour)
+        weekday = data.get('day_of_week', now.weekday())
+
+        if not isinstance(origins, list) or not isinstance(destinations, list) or not origins:
+            return jsonify({
+                'success': False,
+                'error': 'origins must be a non-empty list of places'
+            }), 400
+        if len(origins) * len(destinations) > Config.OD_MATRIX_MAX_PAIRS:
+            return jsonify({
+                'success': False,
+                'error': f'At most {Config.OD_MATRIX_MAX_PAIRS} origin-destination pairs per request'
+            }), 400
+        # type() rather than isinstance: True and 1.0 are not weekdays
+        if not isinstance(time_of_day, str) or time_of_day not in TIMES_OF_DAY \
+                or type(weekday) is not int or weekday not in range(7):
+            return jsonify({
+                'success': False,
+                'error': 'time_of_day must be one of morning, afternoon, evening, night '
+                         'and day_of_week 0 (Monday) to 6'
+            }), 400
+
+        od_matrix.ensure(scheduler.result('od_matrix'), exposure=scheduler.result('incident_exposure'))
+
+        origin_zones = [od_matrix.zone(str(name)) for name in origins]
+        destination_zones = [od_matrix.zone(str(name)) for name in destinations]
+        unknown = sorted({
+            str(name) for name, zone in zip(origins + destinations, origin_zones + destination_zones)
+            if zone is None
+        })
+        if unknown:
+            return jsonify({
+                'success': False,
+                'error': 'Unknown places',
+                'unknown': unknown
+            }), 400
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'origins': [od_matrix.zone_names[zone] for zone in origin_zones],
+                'destinations': [od_matrix.zone_names[zone] for zone in destination_zones],
+                'time_of_day': time_of_day,
+                'day_of_week': WEEKDAYS[weekday],
+                **od_matrix.query(origin_zones, destination_zones, time_of_day, weekday),
+                'version': od_matrix.version,
+                'source': od_matrix.source
+            }
+        }), 200
+
+    except Exception as e:
+        print(f"Matrix prediction error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @prediction_bp.route('/accident-hotspots', methods=['GET'])
+@conditional(_published_version('hotspots'))
 def accident_hotspots():
     """Get accident hotspots"""
     try:
         limit = request.args.get('limit', 10, type=int)
-        hotspots = data_analysis_service.identify_hotspots(limit)
+        ranked = scheduler.result('hotspots')
+        hotspots = ranked[:limit] if ranked is not None else data_analysis_service.identify_hotspots(limit)
 
         return jsonify({
             'success': True,
@@ -101,13 +287,19 @@ def accident_hotspots():
 
 
 @prediction_bp.route('/statistics', methods=['GET'])
+@conditional(_published_version('statistics', filters=('start_location', 'end_location')))
 def statistics():
     """Get traffic statistics"""
     try:
         start_location = request.args.get('start_location')
         end_location = request.args.get('end_location')
 
-        stats = data_analysis_service.get_accident_statistics(start_location, end_location)
+        # The published figures are city-wide; a location filter is computed here
+        stats = None
+        if not start_location and not end_location:
+            stats = scheduler.result('statistics')
+        if stats is None:
+            stats = data_analysis_service.get_accident_statistics(start_location, end_location)
 
         return jsonify({
             'success': True,
@@ -132,6 +324,278 @@ def statistics():
         }), 500
 
 
+@prediction_bp.route('/patterns/<location>', methods=['GET'])
+@conditional(_traffic_data_version)
+def traffic_patterns(location):
+    """Peak hours, congestion trend and weather impact for a location"""
+    try:
+        days = request.args.get('days', 30, type=int)
+        analysis = analyze_traffic_patterns(location, days)
+
+        if analysis is None:
+            return jsonify({
+                'success': False,
+                'error': f'No traffic data for location: {location}'
+            }), 404
+
+        return jsonify({
+            'success': True,
+            'data': analysis
+        }), 200
+
+    except Exception as e:
+        print(f"Traffic pattern error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@prediction_bp.route('/timeseries/<location>', methods=['GET'])
+def traffic_timeseries(location):
+    """Speed and volume history for a location, downsampled to the range"""
+    try:
+        # Offsets are converted to UTC; times without one are read as UTC
+        end = to_utc(datetime.fromisoformat(request.args['end'])) if request.args.get('end') \
+            else datetime.utcnow()
+        start = to_utc(datetime.fromisoformat(request.args['start'])) if request.args.get('start') \
+            else end - timedelta(days=1)
+        resolution = request.args.get('resolution')
+
+        if start >= end:
+            return jsonify({
+                'success': False,
+                'error': 'start must be before end'
+            }), 400
+
+        series = timeseries_store.query(gazetteer.canonical_name(location), start, end, resolution)
+
+        return jsonify({
+            'success': True,
+            'data': series,
+            'count': len(series['points'])
+        }), 200
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+    except Exception as e:
+        print(f"Time series error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@prediction_bp.route('/places', methods=['GET'])
+def places():
+    """Autocomplete and fuzzy-match Lagos place names"""
+    try:
+        query = request.args.get('q', '')
+        limit = request.args.get('limit', 10, type=int)
+
+        if not query.strip():
+            return jsonify({
+                'success': False,
+                'error': 'Query parameter q is required'
+            }), 400
+
+        suggestions = gazetteer.autocomplete(query, limit)
+
+        return jsonify({
+            'success': True,
+            'query': query,
+            'places': suggestions,
+            'count': len(suggestions)
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@prediction_bp.route('/incidents', methods=['POST'])
+def report_incident():
+    """Record a traffic incident and push it to live subscribers"""
+    try:
+        data = request.get_json()
+
+        required_fields = ['location', 'incident_type', 'severity', 'time_of_day']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({
+                    'success': False,
+                    'error': f'Missing required field: {field}'
+                }), 400
+
+        place = gazetteer.resolve(data['location'])
+        latitude = data.get('latitude')
+        longitude = data.get('longitude')
+        if latitude is None or longitude is None:
+            if not place:
+                return jsonify({
+                    'success': False,
+                    'error': 'Unknown location, latitude and longitude are required'
+                }), 400
+            latitude = place['coordinates']['lat']
+            longitude = place['coordinates']['lng']
+
+        incident = TrafficIncident(
+            location=place['name'] if place else data['location'],
+            latitude=latitude,
+            longitude=longitude,
+            incident_type=data['incident_type'],
+            severity=data['severity'],
+            casualties=data.get('casualties', 0),
+            time_of_day=data['time_of_day'],
+            weather_condition=data.get('weather_condition'),
+            road_condition=data.get('road_condition'),
+            incident_date=datetime.fromisoformat(data['incident_date'])
+            if data.get('incident_date') else datetime.utcnow()
+        )
+
+        db.session.add(incident)
+        db.session.commit()
+
+        payload = incident.to_dict()
+        live_update_broker.publish(
+            place['id'] if place else live_update_broker.ALL_TOPICS,
+            'incident',
+            payload
+        )
+
+        return jsonify({
+            'success': True,
+            'incident': payload
+        }), 201
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Incident report error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@prediction_bp.route('/probes', methods=['POST'])
+def ingest_probes():
+    """Ingest a batch of GPS probe pings and sensor counts"""
+    try:
+        if Config.PROBE_INGEST_TOKEN and request.headers.get('X-Probe-Token') != Config.PROBE_INGEST_TOKEN:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid probe token'
+            }), 401
+
+        # NDJSON (one ping per line) or a JSON array / {"pings": [...]}
+        body = request.get_data()
+        if request.mimetype == 'application/x-ndjson':
+            pings = [current_app.json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            pings = current_app.json.loads(body) if body else None
+            if isinstance(pings, dict):
+                pings = pings.get('pings')
+
+        if not isinstance(pings, list) or not pings:
+            return jsonify({
+                'success': False,
+                'error': 'Expected a non-empty list of pings'
+            }), 400
+
+        if len(pings) > Config.PROBE_MAX_BATCH:
+            return jsonify({
+                'success': False,
+                'error': f'Batch too large (max {Config.PROBE_MAX_BATCH} pings)'
+            }), 413
+
+        for i, ping in enumerate(pings):
+            error = 'not an object' if not isinstance(ping, dict) else ping_error(ping)
+            if error is not None:
+                return jsonify({
+                    'success': False,
+                    'error': f'Malformed ping: item {i}: {error}'
+                }), 400
+
+        result = probe_feed.ingest(pings)
+
+        return jsonify({
+            'success': True,
+            **result
+        }), 202
+
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify({
+            'success': False,
+            'error': f'Malformed ping: {e}'
+        }), 400
+
+    except Exception as e:
+        print(f"Probe ingest error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@prediction_bp.route('/congestion', methods=['GET'])
+def live_congestion():
+    """Current sliding-window congestion per segment"""
+    try:
+        snapshot = probe_feed.snapshot()
+        requested = [a for a in request.args.get('segments', '').split(',') if a.strip()]
+        if requested:
+            places = [gazetteer.resolve(a) for a in requested]
+            ids = [place['id'] if place else a for place, a in zip(places, requested)]
+            snapshot = {i: snapshot[i] for i in ids if i in snapshot}
+
+        return jsonify({
+            'success': True,
+            'segments': snapshot,
+            'count': len(snapshot),
+            'feed': probe_feed.stats()
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@prediction_bp.route('/stream', methods=['GET'])
+def live_stream():
+    """Server-Sent Events stream of congestion and incident deltas"""
+    areas = [a for a in request.args.get('areas', '').split(',') if a.strip()]
+
+    topics = []
+    for area in areas:
+        place = gazetteer.resolve(area)
+        if not place:
+            return jsonify({
+                'success': False,
+                'error': f'Unknown area: {area}'
+            }), 400
+        topics.append(place['id'])
+
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    subscription = live_update_broker.subscribe(topics, last_event_id)
+
+    return Response(
+        stream_with_context(live_update_broker.stream(subscription)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
 @prediction_bp.route('/health', methods=['GET'])
 def health():
     """Health check for prediction service"""
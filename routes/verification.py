@@ -1,3 +1,4 @@
+import hmac
 import sys
 import os
 
@@ -7,10 +8,16 @@ parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
-from flask import Blueprint, request, jsonify
-from models import Driver, db
-from services.polygon_service import polygon_service
-from datetime import datetime, date
+from flask import Blueprint, request, jsonify, current_app
+from config import Config
+from models import AttestationBatch, Driver, db
+from services.attestation import attestation_service, verify_proof
+from services.cluster import shared_cache
+from services.credentials import credential_service, verify_credential
+from services.http_cache import conditional
+from services.polygon_service import polygon_service, normalize_address, checksum_address
+from services.metrics import metrics
+from datetime import datetime, date, timedelta
 
 verification_bp = Blueprint('verification', __name__)
 
@@ -69,7 +76,8 @@ def verify_driver():
                     'verified_on_chain': bool(driver.blockchain_tx),
                     'wallet_address': driver.wallet_address,
                     'network': 'Polygon Mumbai',
-                    'explorer_url': f"https://mumbai.polygonscan.com/tx/{driver.blockchain_tx}" if driver.blockchain_tx else None
+                    'explorer_url': f"https://mumbai.polygonscan.com/tx/{driver.blockchain_tx}" if driver.blockchain_tx else None,
+                    'attestation': attestation_service.verify(driver)
                 },
                 'verified_at': datetime.now().isoformat()
             }
@@ -87,7 +95,15 @@ def verify_driver():
 def verify_by_wallet(wallet_address):
     """Verify driver by wallet address"""
     try:
-        driver = Driver.query.filter_by(wallet_address=wallet_address).first()
+        # Stored lowercase, so any capitalisation finds the driver
+        normalized = normalize_address(wallet_address)
+        if normalized is None:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid wallet address (bad format or EIP-55 checksum)'
+            }), 400
+
+        driver = Driver.query.filter_by(wallet_address=normalized).first()
 
         if not driver:
             return jsonify({
@@ -96,7 +112,7 @@ def verify_by_wallet(wallet_address):
             }), 404
 
         # Get blockchain verification
-        blockchain_data = polygon_service.verify_driver(wallet_address)
+        blockchain_data = polygon_service.verify_driver(normalized)
 
         # Check document validity
         today = date.today()
@@ -124,8 +140,9 @@ def verify_by_wallet(wallet_address):
                 'blockchain_info': {
                     'blockchain_hash': driver.blockchain_tx or 'N/A',
                     'verified_on_chain': bool(driver.blockchain_tx),
-                    'wallet_address': driver.wallet_address,
-                    'network': 'Polygon Mumbai'
+                    'wallet_address': checksum_address(normalized),
+                    'network': 'Polygon Mumbai',
+                    'attestation': attestation_service.verify(driver)
                 },
                 'blockchain_data': blockchain_data
             }
@@ -139,26 +156,36 @@ def verify_by_wallet(wallet_address):
         }), 500
 
 
+def _seconds_until_midnight():
+    now = datetime.now()
+    return int((datetime.combine(now.date() + timedelta(days=1), datetime.min.time()) - now).total_seconds()) + 1
+
+
 @verification_bp.route('/check-validity/<license_number>', methods=['GET'])
 def check_validity(license_number):
     """Check document validity by license number"""
     try:
-        driver = Driver.query.filter_by(license_number=license_number).first()
-
-        if not driver:
-            return jsonify({
-                'success': False,
-                'error': 'Driver not found'
-            }), 404
-
-        today = date.today()
-        license_valid = driver.license_expiry > today
-        insurance_valid = driver.insurance_expiry > today
-        cert_valid = driver.cert_expiry > today
-
-        return jsonify({
-            'success': True,
-            'data': {
+        # Answers only change at midnight (days_until_*); the scheduler's
+        # daily reset bumps the generation, the TTL covers a stopped scheduler
+        cache_key = f"validity:{shared_cache.generation('validity')}:{license_number}"
+        validity = shared_cache.get(cache_key)
+        metrics.cache_access('validity', validity is not None)
+
+        if validity is None:
+            driver = Driver.query.filter_by(license_number=license_number).first()
+
+            if not driver:
+                return jsonify({
+                    'success': False,
+                    'error': 'Driver not found'
+                }), 404
+
+            today = date.today()
+            license_valid = driver.license_expiry > today
+            insurance_valid = driver.insurance_expiry > today
+            cert_valid = driver.cert_expiry > today
+
+            validity = {
                 'valid': license_valid and insurance_valid and cert_valid,
                 'license_status': 'VALID' if license_valid else 'EXPIRED',
                 'insurance_status': 'ACTIVE' if insurance_valid else 'EXPIRED',
@@ -170,6 +197,11 @@ def check_validity(license_number):
                 'days_until_insurance_expiry': (driver.insurance_expiry - today).days,
                 'days_until_cert_expiry': (driver.cert_expiry - today).days
             }
+            shared_cache.set(cache_key, validity, ttl=_seconds_until_midnight())
+
+        return jsonify({
+            'success': True,
+            'data': validity
         }), 200
 
     except Exception as e:
@@ -180,11 +212,219 @@ def check_validity(license_number):
         }), 500
 
 
+@verification_bp.route('/attestation/<license_number>', methods=['GET'])
+def attestation_bundle(license_number):
+    """Inclusion proof a driver keeps for their batched attestation"""
+    try:
+        driver = Driver.query.filter_by(license_number=license_number).first()
+
+        if not driver:
+            return jsonify({
+                'success': False,
+                'error': 'Driver not found'
+            }), 404
+
+        attestation = attestation_service.verify(driver)
+        if attestation is None:
+            return jsonify({
+                'success': False,
+                'error': 'Driver was registered with a direct transaction, not a batch'
+            }), 404
+
+        return jsonify({
+            'success': True,
+            'attestation': attestation
+        }), 200
+
+    except Exception as e:
+        print(f"Error in attestation_bundle: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f"Attestation lookup failed: {str(e)}"
+        }), 500
+
+
+@verification_bp.route('/attestation', methods=['POST'])
+def verify_attestation():
+    """Check a presented record hash and proof against an anchored root"""
+    try:
+        data = request.get_json(silent=True) or {}
+        record = data.get('record_hash')
+        proof = data.get('proof')
+        root = data.get('merkle_root')
+
+        if not record or not isinstance(proof, list) or not root:
+            return jsonify({
+                'success': False,
+                'error': 'record_hash, proof and merkle_root are required'
+            }), 400
+
+        # Only roots this service anchored count
+        batch = AttestationBatch.query.filter_by(merkle_root=root.lower()).first()
+        included = batch is not None and verify_proof(record, proof, root)
+
+        return jsonify({
+            'success': True,
+            'verified': included,
+            'batch': batch.to_dict() if batch else None
+        }), 200
+
+    except Exception as e:
+        print(f"Error in verify_attestation: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f"Attestation check failed: {str(e)}"
+        }), 500
+
+
+@verification_bp.route('/credentials/issue', methods=['POST'])
+def issue_credential():
+    """
+    Issue a signed, QR-encodable credential for offline checks
+
+    Callers are the admin (X-Admin-Token) or the driver, who proves who
+    they are with their license number and email as /api/auth/login does.
+    """
+    try:
+        if not credential_service.enabled:
+            return jsonify({
+                'success': False,
+                'error': 'Credential issuing is not configured'
+            }), 503
+
+        data = request.get_json(silent=True) or {}
+        license_number = data.get('license_number')
+
+        if not license_number:
+            return jsonify({
+                'success': False,
+                'error': 'License number is required'
+            }), 400
+
+        admin_token = request.headers.get('X-Admin-Token', '')
+        is_admin = bool(Config.ADMIN_TOKEN) and hmac.compare_digest(admin_token.encode(), Config.ADMIN_TOKEN.encode())
+        driver = Driver.query.filter_by(license_number=license_number).first()
+        if not is_admin and (not driver or not data.get('email') or driver.email != data['email']):
+            return jsonify({
+                'success': False,
+                'error': 'Invalid credentials'
+            }), 401
+        if not driver:
+            return jsonify({
+                'success': False,
+                'error': 'Driver not found'
+            }), 404
+        if driver.revoked_at is not None:
+            return jsonify({
+                'success': False,
+                'error': 'Credentials for this driver have been revoked'
+            }), 403
+
+        return jsonify({
+            'success': True,
+            **credential_service.issue(driver),
+            'issuer': credential_service.issuer
+        }), 201
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error in issue_credential: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f"Credential issue failed: {str(e)}"
+        }), 500
+
+
+@verification_bp.route('/credentials/issuer', methods=['GET'])
+def credential_issuer():
+    """Address checkpoint devices pin to verify credential signatures"""
+    if not credential_service.enabled:
+        return jsonify({
+            'success': False,
+            'error': 'Credential issuing is not configured'
+        }), 503
+    return jsonify({
+        'success': True,
+        'issuer': credential_service.issuer,
+        'development_key': credential_service.development_key
+    }), 200
+
+
+@verification_bp.route('/credentials/verify', methods=['POST'])
+def verify_offline_credential():
+    """Run the checkpoint's offline check server-side, against the current bitmap"""
+    try:
+        if not credential_service.enabled:
+            return jsonify({
+                'success': False,
+                'error': 'Credential issuing is not configured'
+            }), 503
+
+        data = request.get_json(silent=True) or {}
+        token = data.get('credential')
+
+        if not token:
+            return jsonify({
+                'success': False,
+                'error': 'credential is required'
+            }), 400
+
+        _, bitmap = credential_service.revocation_bitmap()
+        return jsonify({
+            'success': True,
+            **verify_credential(token, credential_service.issuer, bitmap)
+        }), 200
+
+    except Exception as e:
+        print(f"Error in verify_offline_credential: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f"Credential check failed: {str(e)}"
+        }), 500
+
+
+@verification_bp.route('/credentials/revocations', methods=['GET'])
+@conditional(lambda: (credential_service.latest_seq(), None))
+def credential_revocations():
+    """
+    Revocation bitmap for checkpoint devices
+
+    Without ?since= the whole bitmap is returned, deflate-encoded (bit n
+    set = serial n revoked), with its seq in X-Revocation-Seq. With
+    ?since=<seq> only the serials revoked after that seq are returned.
+    """
+    try:
+        since = request.args.get('since', type=int)
+        if since is not None:
+            return jsonify({
+                'success': True,
+                'since': since,
+                'seq': credential_service.latest_seq(),
+                'revoked': credential_service.revocations_since(since)
+            }), 200
+
+        seq, body = credential_service.export_bitmap()
+        response = current_app.response_class(body, mimetype='application/octet-stream')
+        response.headers['Content-Encoding'] = 'deflate'
+        response.headers['X-Revocation-Seq'] = str(seq)
+        return response
+
+    except Exception as e:
+        print(f"Error in credential_revocations: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f"Revocation export failed: {str(e)}"
+        }), 500
+
+
 @verification_bp.route('/blockchain-status', methods=['GET'])
 def blockchain_status():
     """Get blockchain connection status"""
     try:
-        network_info = polygon_service.get_network_info()
+        # One RPC round trip per TTL for the whole cluster, not per worker
+        network_info = shared_cache.get_or_set(
+            'polygon:network_info', polygon_service.get_network_info, Config.NETWORK_INFO_TTL
+        )
 
         return jsonify({
             'success': True,
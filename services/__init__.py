@@ -10,10 +10,14 @@ if parent_dir not in sys.path:
 from .ai_service import predict_best_route, analyze_traffic_patterns
 from .polygon_service import polygon_service
 from .data_analysis import data_analysis_service
+from .gazetteer import gazetteer
+from .live_updates import live_update_broker
 
 __all__ = [
     'predict_best_route',
     'analyze_traffic_patterns',
     'polygon_service',
-    'data_analysis_service'
+    'data_analysis_service',
+    'gazetteer',
+    'live_update_broker'
 ]
\ No newline at end of file
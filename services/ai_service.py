@@ -1,22 +1,59 @@
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
+import joblib
+import os
 import random
+from .compiled_forest import CompiledForest
+from .data_analysis import data_analysis_service
+from .gazetteer import gazetteer
+from .metrics import model_inference_duration
+from .routing import profile_weights, route_engine
 
 
-def predict_best_route(start, end, time_of_day='afternoon'):
+def predict_best_route(start, end, time_of_day='afternoon', live_congestion=None, profile='balanced',
+                       weights=None, forecast=None, live=None, exposure=None):
     """
     Predict best routes using AI and historical data
 
+    Candidate paths over the road network are scored for travel time,
+    incident exposure and congestion (services.routing). Places off the
+    network get the sample corridors instead.
+
     Args:
         start: Starting location
         end: Ending location
         time_of_day: Time of day (morning, afternoon, evening, night)
+        live_congestion: Current probe-feed congestion around the trip
+            (from probe_feed.route_congestion), if any
+        profile: 'fastest', 'safest' or 'balanced'
+        weights: Optional {'time', 'risk', 'congestion'} weights instead of a profile
+        forecast: {place name: congestion level} for time_of_day
+        live: Probe snapshot {place id: state}
+        exposure: Published route_engine.incident_exposure(), if any
 
     Returns:
-        List of route predictions with AI analysis
+        List of route predictions with AI analysis, best first
+
+    Raises:
+        ValueError: Unknown profile or invalid weights
     """
+    start_place = gazetteer.resolve(start)
+    end_place = gazetteer.resolve(end)
+    if start_place and end_place:
+        routes = route_engine.plan(
+            start_place['id'], end_place['id'], profile, weights,
+            forecast=forecast, live=live, exposure=exposure
+        )
+        if routes:
+            return routes
+
+    profile_weights(profile, weights)
+    return _sample_routes(start, end, live_congestion)
+
+
+def _sample_routes(start, end, live_congestion=None):
+    """Three illustrative corridors for trips the road network doesn't cover"""
 
     # Lagos routes with realistic data
     routes = [
@@ -55,6 +92,15 @@ def predict_best_route(start, end, time_of_day='afternoon'):
         }
     ]
 
+    # Re-centre the corridors on what probes are reporting right now,
+    # keeping their relative ordering
+    if live_congestion is not None:
+        mean_level = sum(r['congestion_level'] for r in routes) / len(routes)
+        for route in routes:
+            shifted = route['congestion_level'] - mean_level + live_congestion['congestion_level']
+            route['congestion_level'] = int(max(1, min(10, round(shifted))))
+            route['congestion_source'] = 'live'
+
     # Add AI confidence scores
     for route in routes:
         route['ai_confidence'] = round(random.uniform(0.75, 0.95), 2)
@@ -72,6 +118,7 @@ def predict_best_route(start, end, time_of_day='afternoon'):
                 (60 - route['average_speed_kmh']) * 0.25
         )
         route['risk_score'] = round(risk_score, 2)
+        route['source'] = 'sample'
 
     return routes
 
@@ -85,66 +132,140 @@ def analyze_traffic_patterns(location, days=30):
         days: Number of days to analyze
 
     Returns:
-        Dictionary with traffic analysis
+        Dictionary with traffic analysis, or None for an unknown location
     """
+    return data_analysis_service.get_traffic_patterns(location, days)
 
-    analysis = {
-        'location': location,
-        'analysis_period_days': days,
-        'peak_hours': ['08:00-10:00', '17:00-19:00'],
-        'average_congestion': round(random.uniform(4.0, 7.5), 1),
-        'total_incidents': random.randint(30, 60),
-        'trend': random.choice(['INCREASING', 'DECREASING', 'STABLE']),
-        'recommendations': [
-            'Avoid travel during 8-10 AM and 5-7 PM',
-            'Alternative routes available via side streets',
-            'Public transport recommended during peak hours',
-            'Road conditions best in early morning (5-7 AM)'
-        ],
-        'accident_breakdown': {
-            'minor': random.randint(20, 40),
-            'moderate': random.randint(8, 15),
-            'severe': random.randint(2, 6)
-        },
-        'weather_impact': {
-            'clear_days': random.randint(15, 20),
-            'rainy_days': random.randint(8, 12),
-            'foggy_days': random.randint(2, 5)
-        }
-    }
 
-    return analysis
+# Only the columns the model reads, in the narrowest dtypes that hold them;
+# a year of city-wide rows is mostly repeated location/time strings
+TRAINING_DTYPES = {
+    'location': 'category',
+    'time_of_day': 'category',
+    'day_of_week': 'int8',
+    'weather_score': 'float32',
+    'congestion_level': 'int16'
+}
+
+
+class CategoryEncoder:
+    """
+    Label encoder whose codes never change once assigned
+
+    sklearn's LabelEncoder re-sorts its classes on every fit, which would
+    silently renumber locations under trees that were already trained.
+    Here new categories are appended, so warm-started trees and old trees
+    agree on every code.
+    """
+
+    def __init__(self):
+        self.classes_ = np.array([], dtype=object)
+        self._codes = {}
+
+    @classmethod
+    def from_classes(cls, classes):
+        """Rebuild an encoder from its classes_, preserving their codes"""
+        encoder = cls()
+        encoder._codes = {value: code for code, value in enumerate(classes)}
+        encoder.classes_ = np.array(list(classes), dtype=object)
+        return encoder
+
+    def fit(self, values):
+        self.classes_ = np.array([], dtype=object)
+        self._codes = {}
+        return self.extend(values)
+
+    def extend(self, values):
+        """Assign codes to unseen categories, keeping existing ones"""
+        new = [v for v in pd.unique(pd.Series(values)) if v not in self._codes]
+        for value in sorted(new):
+            self._codes[value] = len(self._codes)
+        if new:
+            self.classes_ = np.array(list(self._codes), dtype=object)
+        return self
+
+    def transform(self, values):
+        try:
+            return np.array([self._codes[v] for v in values], dtype=np.int64)
+        except KeyError as e:
+            raise ValueError(f"y contains previously unseen labels: {e.args[0]!r}")
+
+    def transform_series(self, series):
+        """Vectorized transform for a pandas Series"""
+        codes = series.map(self._codes)
+        if codes.isna().any():
+            raise ValueError(f"y contains previously unseen labels: {series[codes.isna()].iloc[0]!r}")
+        return codes.to_numpy(dtype=np.int64)
 
 
 class TrafficPredictor:
     """AI model for traffic prediction"""
 
-    def __init__(self):
+    TARGET = 'congestion_level'
+
+    def __init__(self, n_estimators=100, random_state=42, n_jobs=None, **model_params):
         self.model = None
+        self.compiled = None
+        self.version = None
         self.label_encoders = {}
         self.is_trained = False
+        self.n_estimators = n_estimators
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.model_params = model_params
 
-    def train_model(self, data_path='data/traffic_data.csv'):
-        """Train the AI model on traffic data"""
-        try:
-            df = pd.read_csv(data_path)
+    def _features(self, df, extend=False):
+        """Encode a traffic frame into the model's float32 feature matrix"""
+        if extend:
+            self.label_encoders['location'].extend(df['location'])
+            self.label_encoders['time'].extend(df['time_of_day'])
 
-            # Feature engineering
-            le_location = LabelEncoder()
-            le_time = LabelEncoder()
+        # Trees split on float32 anyway; building it directly avoids an
+        # int64 intermediate four times the size on large windows
+        X = np.empty((len(df), 4), dtype=np.float32)
+        X[:, 0] = self.label_encoders['location'].transform_series(df['location'])
+        X[:, 1] = self.label_encoders['time'].transform_series(df['time_of_day'])
+        X[:, 2] = df['day_of_week'].to_numpy()
+        X[:, 3] = df['weather_score'].to_numpy()
+        return X
 
-            df['location_encoded'] = le_location.fit_transform(df['location'])
-            df['time_encoded'] = le_time.fit_transform(df['time_of_day'])
+    def _fit_forest(self, X, y):
+        """Fit on n_jobs cores, then serve single-threaded"""
+        # Thread fan-out costs more than it saves on one-row predictions
+        self.model.n_jobs = self.n_jobs
+        self.model.fit(X, y)
+        self.model.n_jobs = None
+        # A compiled copy of the old trees would now be stale
+        self.compiled = None
 
-            X = df[['location_encoded', 'time_encoded', 'day_of_week', 'weather_score']]
-            y = df['congestion_level']
+    def fit_encoders(self, df):
+        """Fit fresh category encoders on a traffic frame"""
+        self.label_encoders['location'] = CategoryEncoder().fit(df['location'])
+        self.label_encoders['time'] = CategoryEncoder().fit(df['time_of_day'])
+        return self
 
-            self.model = RandomForestClassifier(n_estimators=100, random_state=42)
-            self.model.fit(X, y)
+    def fit(self, df):
+        """Fit a fresh forest on a traffic frame"""
+        self.fit_encoders(df)
 
-            self.label_encoders['location'] = le_location
-            self.label_encoders['time'] = le_time
-            self.is_trained = True
+        X = self._features(df)
+        y = df[self.TARGET].to_numpy()
+
+        # warm_start lets update() grow the forest later without refitting
+        self.model = RandomForestClassifier(
+            n_estimators=self.n_estimators,
+            random_state=self.random_state,
+            warm_start=True,
+            **self.model_params
+        )
+        self._fit_forest(X, y)
+        self.is_trained = True
+        return self
+
+    def train_model(self, data_path='data/traffic_data.csv'):
+        """Train the AI model on traffic data"""
+        try:
+            self.fit(pd.read_csv(data_path, usecols=list(TRAINING_DTYPES), dtype=TRAINING_DTYPES))
 
             return {
                 'success': True,
@@ -158,24 +279,218 @@ class TrafficPredictor:
                 'error': str(e)
             }
 
+    def update(self, df, n_new_trees=10, max_trees=None):
+        """
+        Warm-start additional trees on a new window of data
+
+        Args:
+            df: New traffic rows
+            n_new_trees: Trees to add, fitted on df only
+            max_trees: Drop the oldest trees beyond this many, so the
+                forest tracks recent data instead of growing forever
+
+        Returns:
+            dict: Result with the new forest size
+        """
+        if not self.is_trained:
+            raise ValueError('Model must be trained before it can be updated')
+
+        y = df[self.TARGET].to_numpy()
+        missing = set(self.model.classes_) - set(np.unique(y))
+        extra = set(np.unique(y)) - set(self.model.classes_)
+        if missing or extra:
+            # Trees fitted on a different class set cannot be averaged together
+            raise ValueError(
+                f'New window must cover the trained congestion levels '
+                f'(missing {sorted(missing)}, unseen {sorted(extra)}); run a full retrain'
+            )
+
+        X = self._features(df, extend=True)
+        self.model.n_estimators = len(self.model.estimators_) + n_new_trees
+        self._fit_forest(X, y)
+
+        if max_trees and len(self.model.estimators_) > max_trees:
+            self.model.estimators_ = self.model.estimators_[-max_trees:]
+            self.model.n_estimators = max_trees
+
+        return {
+            'success': True,
+            'trees': len(self.model.estimators_),
+            'rows': len(df)
+        }
+
+    def score(self, df):
+        """Accuracy on a labelled traffic frame (unseen labels count as misses)"""
+        known = (
+            df['location'].isin(self.label_encoders['location'].classes_)
+            & df['time_of_day'].isin(self.label_encoders['time'].classes_)
+        )
+        if not known.any():
+            return 0.0
+        predictions = self.model.predict(self._features(df[known]))
+        correct = (predictions == df.loc[known, self.TARGET].to_numpy()).sum()
+        return float(correct) / len(df)
+
+    def save(self, path):
+        """Persist the model atomically (write then rename)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        joblib.dump(
+            {
+                'model': self.model,
+                'label_encoders': self.label_encoders,
+                'n_estimators': self.n_estimators,
+                'random_state': self.random_state,
+                'model_params': self.model_params
+            },
+            tmp_path
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a model saved with save()"""
+        state = joblib.load(path)
+        predictor = cls(state['n_estimators'], state['random_state'], **state.get('model_params', {}))
+        predictor.model = state['model']
+        predictor.label_encoders = state['label_encoders']
+        predictor.is_trained = True
+        return predictor
+
+    def compile(self):
+        """Compile the forest to flat arrays; predict() then uses them"""
+        self.compiled = CompiledForest.compile(self.model)
+        return self.compiled
+
+    def export_compiled(self, path):
+        """Write the compiled forest and encoders for load_compiled()"""
+        compiled = self.compiled or CompiledForest.compile(self.model)
+        return compiled.save(path, extra={
+            'locations': self.label_encoders['location'].classes_.tolist(),
+            'times': self.label_encoders['time'].classes_.tolist()
+        })
+
+    @classmethod
+    def load_compiled(cls, path, mmap=True):
+        """Inference-only predictor backed by a memory-mapped compiled forest"""
+        compiled, header = CompiledForest.load(path, mmap=mmap)
+        predictor = cls()
+        predictor.compiled = compiled
+        predictor.version = header.get('version')
+        predictor.label_encoders = {
+            'location': CategoryEncoder.from_classes(header['locations']),
+            'time': CategoryEncoder.from_classes(header['times'])
+        }
+        predictor.is_trained = True
+        return predictor
+
+    def _known_location(self, location):
+        """Map free text onto a location label the encoder was fitted on"""
+        known = self.label_encoders['location'].classes_
+        if location in known:
+            return location
+
+        canonical = gazetteer.canonical_name(location)
+        if canonical in known:
+            return canonical
+
+        # Fall back to any alias of the resolved place that was seen in training
+        place = gazetteer.resolve(location)
+        if place:
+            for label in [place['name']] + place['aliases']:
+                if label in known:
+                    return label
+        return location
+
     def predict(self, location, time_of_day, day_of_week, weather_score):
         """Make a prediction"""
         if not self.is_trained:
             return None
 
         try:
+            location = self._known_location(location)
             location_encoded = self.label_encoders['location'].transform([location])[0]
             time_encoded = self.label_encoders['time'].transform([time_of_day])[0]
 
-            prediction = self.model.predict([[
-                location_encoded,
-                time_encoded,
-                day_of_week,
-                weather_score
-            ]])
+            estimator = self.compiled if self.compiled is not None else self.model
+            with model_inference_duration.time('traffic_predictor'):
+                prediction = estimator.predict([[
+                    location_encoded,
+                    time_encoded,
+                    day_of_week,
+                    weather_score
+                ]])
 
             return int(prediction[0])
 
         except Exception as e:
             print(f"Prediction error: {e}")
-            return None
\ No newline at end of file
+            return None
+
+
+class ServingModel:
+    """The compiled predictor this process serves, swapped whole on reload"""
+
+    def __init__(self):
+        self.predictor = None
+        self.path = None
+
+    @property
+    def version(self):
+        predictor = self.predictor
+        return predictor.version if predictor is not None else None
+
+    def load(self, path):
+        """Memory-map a compiled forest and start serving it"""
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.predictor = TrafficPredictor.load_compiled(path)
+        self.path = path
+        return self.version
+
+    def predict(self, location, time_of_day, day_of_week, weather_score):
+        """Congestion level from the served model, or None if none is loaded"""
+        predictor = self.predictor
+        if predictor is None:
+            return None
+        return predictor.predict(location, time_of_day, day_of_week, weather_score)
+
+    def lookup_table(self, weather_score=8):
+        """
+        Predicted congestion for every location, time of day and weekday
+
+        One batched pass over the forest, so request handlers can answer
+        the common case with a dict lookup instead of a model call.
+
+        Args:
+            weather_score: Weather assumed for the whole table
+
+        Returns:
+            dict: {'version', 'weather_score', 'table': {location: {time: [Mon..Sun]}}}
+                or None if no model is loaded
+        """
+        predictor = self.predictor
+        if predictor is None:
+            return None
+
+        locations = predictor.label_encoders['location'].classes_
+        times = predictor.label_encoders['time'].classes_
+        grid = np.array(np.meshgrid(
+            np.arange(len(locations)), np.arange(len(times)), np.arange(7), indexing='ij'
+        )).reshape(3, -1).T
+        X = np.column_stack([grid, np.full(len(grid), weather_score)]).astype(np.float32)
+
+        estimator = predictor.compiled if predictor.compiled is not None else predictor.model
+        levels = np.asarray(estimator.predict(X), dtype=np.int64).reshape(len(locations), len(times), 7)
+        return {
+            'version': predictor.version,
+            'weather_score': weather_score,
+            'table': {
+                str(location): {str(time): levels[i, j].tolist() for j, time in enumerate(times)}
+                for i, location in enumerate(locations)
+            }
+        }
+
+
+# Create singleton instance
+serving_model = ServingModel()
\ No newline at end of file
@@ -0,0 +1,239 @@
+"""
+Merkle-batched driver attestations
+
+In ATTESTATION_MODE=batch, registration stores the driver's record hash
+instead of sending a transaction. Every ATTESTATION_BATCH_SECONDS the
+scheduler builds a Merkle tree over the pending records and anchors only
+its root on chain (one cheap transaction per batch). Each driver keeps an
+inclusion proof, so checking a record needs log2(batch size) hashes
+locally and no RPC call.
+
+Hashing follows OpenZeppelin's MerkleProof conventions: leaves are
+keccak(keccak(record)) and pairs are hashed in sorted order, so a proof is
+a plain list of sibling hashes and the root can be checked by a contract
+later without changing the format. An odd node is carried up unchanged.
+"""
+import json
+import os
+import sys
+import uuid
+from datetime import datetime
+
+from eth_utils import keccak
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from config import Config
+from models import db, Driver, AttestationBatch
+from services.polygon_service import polygon_service
+from services.state_backend import host_lock, state_backend
+
+
+# Driver fields covered by an attestation, in canonical order
+RECORD_FIELDS = (
+    'license_number', 'first_name', 'last_name', 'vehicle_plate', 'insurance_provider',
+    'road_cert_number', 'wallet_address', 'license_expiry', 'insurance_expiry', 'cert_expiry'
+)
+
+
+def _hex(digest):
+    return '0x' + digest.hex()
+
+
+def _bytes(value):
+    return bytes.fromhex(value[2:] if value.startswith('0x') else value)
+
+
+def record_hash(driver):
+    """keccak256 of the driver's attested fields as canonical JSON"""
+    record = {}
+    for field in RECORD_FIELDS:
+        value = getattr(driver, field)
+        # Expiry columns are dates; a fresh row may still hold the datetime it was built with
+        if isinstance(value, datetime):
+            value = value.date()
+        record[field] = value.isoformat() if hasattr(value, 'isoformat') else value
+    return _hex(keccak(json.dumps(record, sort_keys=True, separators=(',', ':')).encode()))
+
+
+def leaf_hash(record):
+    # Double hashing keeps a leaf from being passed off as an inner node
+    return keccak(keccak(_bytes(record)))
+
+
+def _hash_pair(a, b):
+    return keccak(a + b) if a <= b else keccak(b + a)
+
+
+class MerkleTree:
+    """Merkle tree over leaf hashes with sorted-pair hashing"""
+
+    def __init__(self, leaves):
+        if not leaves:
+            raise ValueError('A Merkle tree needs at least one leaf')
+        self.levels = [list(leaves)]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            parents = [_hash_pair(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                parents.append(level[-1])
+            self.levels.append(parents)
+
+    @property
+    def root(self):
+        return _hex(self.levels[-1][0])
+
+    def proof(self, index):
+        """Sibling hashes from leaf index up to the root"""
+        siblings = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                siblings.append(_hex(level[sibling]))
+            index //= 2
+        return siblings
+
+
+def verify_proof(record, proof, root):
+    """
+    Check a record hash against a Merkle root
+
+    Args:
+        record: 0x-hex record hash (record_hash())
+        proof: Sibling hashes from MerkleTree.proof()
+        root: 0x-hex Merkle root
+
+    Returns:
+        bool: True if the record is included under root
+    """
+    try:
+        node = leaf_hash(record)
+        for sibling in proof:
+            node = _hash_pair(node, _bytes(sibling))
+        return _hex(node) == root.lower()
+    except (ValueError, TypeError, AttributeError):
+        return False
+
+
+class AttestationService:
+    """Collects pending driver records and anchors them in Merkle batches"""
+
+    LOCK_KEY = 'lock:attestation_flush'
+
+    def pending_count(self):
+        return Driver.query.filter(
+            Driver.record_hash.isnot(None), Driver.attestation_batch_id.is_(None)
+        ).count()
+
+    def flush(self, max_size=None):
+        """
+        Anchor one batch of pending records
+
+        Args:
+            max_size: Most records per batch (default ATTESTATION_BATCH_MAX)
+
+        Returns:
+            dict: Batch summary, or None if nothing was pending
+        """
+        # The backend lock spans nodes when it is shared; the file lock
+        # keeps this machine's workers apart even when it is not
+        with host_lock('attestation-flush') as held:
+            if not held:
+                return {'success': False, 'error': 'Another flush is in progress'}
+            return self._flush(max_size)
+
+    def _flush(self, max_size):
+        owner = uuid.uuid4().hex
+        if not state_backend.set(self.LOCK_KEY, owner, ttl=Config.POLYGON_RECEIPT_TIMEOUT + 60, nx=True):
+            return {'success': False, 'error': 'Another flush is in progress'}
+
+        try:
+            pending = Driver.query.filter(
+                Driver.record_hash.isnot(None), Driver.attestation_batch_id.is_(None)
+            ).order_by(Driver.id).limit(max_size or Config.ATTESTATION_BATCH_MAX).all()
+            if not pending:
+                return None
+
+            tree = MerkleTree([leaf_hash(driver.record_hash) for driver in pending])
+            anchor = polygon_service.anchor_root(tree.root)
+            if not anchor.get('success'):
+                # Records stay pending for the next window
+                return {'success': False, 'error': anchor.get('error')}
+
+            batch = AttestationBatch(
+                merkle_root=tree.root,
+                size=len(pending),
+                transaction_hash=anchor['transaction_hash'],
+                network=anchor.get('network')
+            )
+            db.session.add(batch)
+            db.session.flush()
+
+            for index, driver in enumerate(pending):
+                driver.attestation_batch_id = batch.id
+                driver.attestation_index = index
+                driver.attestation_proof = json.dumps(tree.proof(index))
+                driver.blockchain_tx = anchor['transaction_hash']
+            db.session.commit()
+
+            print(f"✅ Anchored attestation batch {batch.id}: {len(pending)} drivers, root {tree.root}")
+            return {'success': True, 'batch': batch.to_dict()}
+
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            if state_backend.get(self.LOCK_KEY) in (owner, owner.encode()):
+                state_backend.delete(self.LOCK_KEY)
+
+    def flush_all(self):
+        """Anchor batches until nothing is pending; returns the batches made"""
+        batches = []
+        while True:
+            result = self.flush()
+            if not result or not result.get('success'):
+                return batches
+            batches.append(result['batch'])
+
+    def bundle(self, driver):
+        """What a driver keeps to prove their record: hash, proof, root, tx"""
+        if driver.record_hash is None:
+            return None
+        if driver.attestation_batch_id is None:
+            return {'status': 'pending', 'record_hash': driver.record_hash}
+
+        batch = db.session.get(AttestationBatch, driver.attestation_batch_id)
+        return {
+            'status': 'anchored',
+            'record_hash': driver.record_hash,
+            'leaf_index': driver.attestation_index,
+            'proof': json.loads(driver.attestation_proof),
+            'merkle_root': batch.merkle_root,
+            'batch_id': batch.id,
+            'transaction_hash': batch.transaction_hash,
+            'network': batch.network
+        }
+
+    def verify(self, driver):
+        """
+        Check a driver's current record against its anchored batch
+
+        The record hash is recomputed from the row, so an edit made after
+        anchoring fails verification.
+
+        Returns:
+            dict: Bundle plus 'verified', or None if the driver was not batched
+        """
+        bundle = self.bundle(driver)
+        if bundle is None or bundle['status'] == 'pending':
+            return bundle
+        bundle['verified'] = verify_proof(record_hash(driver), bundle['proof'], bundle['merkle_root'])
+        return bundle
+
+
+# Create singleton instance
+attestation_service = AttestationService()
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Driver change feed for client-side registry mirrors
+
+Every driver insert or update stamps the row with the next change seq
+(models.next_change_seq) and every deletion leaves a tombstone under its
+own seq. A client keeps the highest seq it has applied as its cursor and
+asks for everything after it, so a sync costs one indexed range scan over
+Driver.change_seq and one over the tombstones, proportional to what
+changed rather than to the registry size.
+
+An updated driver is sent once, in its latest state, at its latest seq;
+intermediate versions are never replayed.
+
+Cursors are only safe if seqs commit in allocation order; that holds on
+SQLite and PostgreSQL (see models.DriverChange), which are the databases
+the feed supports.
+"""
+import os
+import sys
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from models import db, Driver, DriverChange
+
+
+class DriverChangeFeed:
+    """Reads driver upserts and tombstones after a cursor"""
+
+    DEFAULT_LIMIT = 1000
+    MAX_LIMIT = 10000
+
+    def latest_seq(self):
+        """Highest seq handed out to a driver or a tombstone"""
+        drivers, tombstones = db.session.query(
+            db.select(db.func.max(Driver.change_seq)).scalar_subquery(),
+            db.select(db.func.max(DriverChange.seq)).scalar_subquery()
+        ).one()
+        return max(drivers or 0, tombstones or 0)
+
+    def changes(self, since=0, limit=None):
+        """
+        Changes after a cursor, in seq order
+
+        Args:
+            since: Last seq the client applied (0 for a full sync)
+            limit: Most changes to return (default DEFAULT_LIMIT)
+
+        Returns:
+            dict: 'changes' (upsert and delete entries), 'cursor' to send
+                next time and 'more' if the page was cut at limit
+        """
+        limit = min(limit or self.DEFAULT_LIMIT, self.MAX_LIMIT)
+
+        # Each side is capped at limit, so the merged page needs no more
+        drivers = Driver.query.filter(Driver.change_seq > since) \
+            .order_by(Driver.change_seq).limit(limit + 1).all()
+        tombstones = DriverChange.query.filter(DriverChange.seq > since, DriverChange.deleted_at.isnot(None)) \
+            .order_by(DriverChange.seq).limit(limit + 1).all()
+
+        to_row = Driver._to_row
+        changes = [
+            {'op': 'upsert', 'seq': driver.change_seq, 'updated_at': driver.updated_at, 'driver': to_row(driver)}
+            for driver in drivers
+        ] + [
+            {'op': 'delete', 'seq': tombstone.seq, 'deleted_at': tombstone.deleted_at,
+             'id': tombstone.driver_id, 'license_number': tombstone.license_number}
+            for tombstone in tombstones
+        ]
+        changes.sort(key=lambda change: change['seq'])
+
+        more = len(changes) > limit
+        changes = changes[:limit]
+        return {
+            'changes': changes,
+            'cursor': changes[-1]['seq'] if changes else since,
+            'more': more
+        }
+
+
+# Create singleton instance
+driver_change_feed = DriverChangeFeed()
\ No newline at end of file
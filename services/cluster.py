@@ -0,0 +1,247 @@
+"""
+Cluster coordination over the shared state backend
+
+With STATE_BACKEND_URL pointing every node at the same Redis (or, on a
+single machine, the same SQLite file), workers hold no state that matters
+for correctness and can be added or removed freely:
+
+- SharedCache memoises expensive lookups (e.g. Polygon network info) once
+  for the whole cluster instead of once per worker.
+- VersionCoordinator keeps a pointer per versioned resource (the traffic
+  dataset, the served model). Promoting a version moves the pointer; each
+  worker compares it with what it serves at most every
+  VERSION_SYNC_SECONDS and reloads on a mismatch, so all nodes converge on
+  the same version within one sync interval.
+
+Only pointers travel through the backend. The path in a pointer must be
+readable by every node (a shared volume or an identical deploy artefact).
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from config import Config
+from services.ai_service import serving_model
+from services.data_analysis import data_analysis_service
+from services.json_provider import _default
+from services.metrics import metrics
+from services.state_backend import state_backend
+
+
+version_reloads = metrics.counter(
+    'version_reloads_total', 'Resources reloaded to follow the cluster pointer', ('resource', 'result')
+)
+
+
+def _decode(raw):
+    if raw is None:
+        return None
+    if isinstance(raw, bytes):
+        raw = raw.decode()
+    return json.loads(raw)
+
+
+class SharedCache:
+    """JSON values shared by every worker through the state backend"""
+
+    def __init__(self, backend=None, prefix='cache:'):
+        self.backend = backend or state_backend
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            return _decode(self.backend.get(self.prefix + key))
+        except Exception as e:
+            print(f"⚠️  Shared cache read failed: {e}")
+            return None
+
+    def set(self, key, value, ttl=None):
+        try:
+            self.backend.set(self.prefix + key, json.dumps(value, default=_default), ttl=ttl)
+        except Exception as e:
+            print(f"⚠️  Shared cache write failed: {e}")
+
+    def generation(self, namespace):
+        """Current generation of a namespace; part of every key in it"""
+        try:
+            raw = self.backend.get(f'gen:{namespace}')
+        except Exception as e:
+            print(f"⚠️  Shared cache read failed: {e}")
+            return 0
+        return int(raw) if raw is not None else 0
+
+    def invalidate(self, namespace):
+        """Orphan every key in a namespace at once; old entries age out by TTL"""
+        return self.backend.incr(f'gen:{namespace}')
+
+    def get_or_set(self, key, compute, ttl):
+        """
+        Cached value for a key, computed and stored on a miss
+
+        Args:
+            key: Cache key
+            compute: Zero-argument callable returning a JSON-serialisable value
+            ttl: Seconds the value stays valid
+
+        Returns:
+            The cached or freshly computed value
+        """
+        value = self.get(key)
+        metrics.cache_access('shared', value is not None)
+        if value is None:
+            value = compute()
+            self.set(key, value, ttl)
+        return value
+
+
+class VersionCoordinator:
+    """Keeps this worker's versioned resources on the cluster-wide pointers"""
+
+    # A pointer whose file held another version is retried after this long
+    FAILED_RETRY_SECONDS = 60
+
+    def __init__(self, backend=None, interval=None):
+        self.backend = backend or state_backend
+        self.interval = Config.VERSION_SYNC_SECONDS if interval is None else interval
+        self._resources = {}
+        self._failed = {}
+        self._last_sync = 0.0
+        self._lock = threading.Lock()
+
+    def register(self, name, current, apply, source):
+        """
+        Register a versioned resource
+
+        Args:
+            name: Resource name (e.g. 'traffic_data')
+            current: Returns the version this worker serves
+            apply: Loads the resource a pointer describes
+            source: Returns pointer metadata (e.g. {'path': ...}) for what
+                this worker serves, or None if it cannot be shared
+        """
+        self._resources[name] = (current, apply, source)
+
+    def pointer(self, name):
+        return _decode(self.backend.get(f'version:{name}'))
+
+    def publish(self, name, version, nx=False, **meta):
+        """Move the cluster pointer; workers follow on their next sync"""
+        pointer = {'version': version, 'published_at': time.time(), **meta}
+        if not self.backend.set(f'version:{name}', json.dumps(pointer), nx=nx):
+            return None
+        return pointer
+
+    def promote(self, name, **meta):
+        """Load a resource on this worker, then point the whole cluster at it"""
+        current, apply, _ = self._resources[name]
+        apply(meta)
+        return self.publish(name, current(), **meta)
+
+    def maybe_sync(self):
+        """Sync if the interval has passed and no other thread is syncing"""
+        if time.monotonic() - self._last_sync < self.interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sync = time.monotonic()
+            self.sync()
+        finally:
+            self._lock.release()
+
+    def sync(self):
+        """
+        Reload every resource whose pointer differs from what is served
+
+        A resource nobody has published yet is claimed with this worker's
+        version, so the first node up sets the version the rest adopt.
+
+        Returns:
+            list: Names of the resources reloaded
+        """
+        reloaded = []
+        for name, (current, apply, source) in self._resources.items():
+            try:
+                pointer = self.pointer(name)
+                if pointer is None:
+                    meta = source()
+                    if meta and current():
+                        self.publish(name, current(), nx=True, **meta)
+                    continue
+                if pointer['version'] == current():
+                    continue
+                failed_version, failed_at = self._failed.get(name, (None, 0.0))
+                if failed_version == pointer['version'] and time.monotonic() - failed_at < self.FAILED_RETRY_SECONDS:
+                    continue
+
+                apply(pointer)
+                if current() == pointer['version']:
+                    self._failed.pop(name, None)
+                    reloaded.append(name)
+                    version_reloads.inc(name, 'ok')
+                else:
+                    # Don't reload the same pointer on every sync; the file
+                    # may be rewritten, so try again after a while
+                    self._failed[name] = (pointer['version'], time.monotonic())
+                    version_reloads.inc(name, 'mismatch')
+                    print(f"⚠️  {name}: pointer is {pointer['version']} but {pointer.get('path')} "
+                          f"holds {current()}")
+            except Exception as e:
+                version_reloads.inc(name, 'error')
+                print(f"⚠️  Version sync failed for {name}: {e}")
+        return reloaded
+
+    def status(self):
+        """What each resource serves and its pointer (or the backend error reading it)"""
+        status = {}
+        for name, (current, _, _) in self._resources.items():
+            status[name] = {'serving': current()}
+            try:
+                status[name]['pointer'] = self.pointer(name)
+            except Exception as e:
+                status[name].update(pointer=None, error=f'State backend unavailable: {e}')
+        return status
+
+
+def _load_traffic_data(pointer):
+    # load_traffic_data falls back to sample data; never follow a pointer there
+    if not os.path.exists(pointer['path']):
+        raise FileNotFoundError(pointer['path'])
+    data_analysis_service.load_traffic_data(pointer['path'])
+
+
+# Create singleton instances
+shared_cache = SharedCache()
+version_coordinator = VersionCoordinator()
+
+version_coordinator.register(
+    'traffic_data',
+    lambda: data_analysis_service.data_version,
+    _load_traffic_data,
+    lambda: {'path': data_analysis_service.data_path} if data_analysis_service.data_path else None
+)
+version_coordinator.register(
+    'model',
+    lambda: serving_model.version,
+    lambda pointer: serving_model.load(pointer['path']),
+    lambda: {'path': serving_model.path} if serving_model.path else None
+)
+
+
+def init_version_sync(app):
+    """Adopt the cluster's versions now and re-check them on the request path"""
+    version_coordinator.sync()
+
+    @app.before_request
+    def follow_version_pointers():
+        version_coordinator.maybe_sync()
+
+    return app
\ No newline at end of file
@@ -0,0 +1,213 @@
+"""
+Flat-array form of a trained RandomForestClassifier
+
+Every tree's nodes are concatenated into flat columns (feature,
+threshold, children, leaf class probabilities) packed as a single
+NumPy record, so a forest is a few contiguous buffers instead of a
+hundred Python tree objects.
+Saved as .npy and opened with mmap, the pages are shared by every
+gunicorn worker through the OS page cache.
+
+Traversal walks all trees for all rows at once: leaves point at
+themselves, so each vectorized step advances every (row, tree) pair and
+the pairs that stop moving have reached their leaf. Probabilities are
+summed tree by tree in estimator order and divided once, the same float
+operations sklearn performs, so predictions match the source forest
+exactly.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+class CompiledForest:
+    """Vectorized evaluator over a forest compiled to flat arrays"""
+
+    BLOCK_ROWS = 2048
+
+    def __init__(self, nodes, roots, classes, max_depth):
+        self.nodes = nodes
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.classes_ = np.asarray(classes)
+        self.max_depth = int(max_depth)
+        # Each field of the single record is a contiguous column; on a
+        # memory-mapped file these views stay backed by the mapping
+        record = nodes[0]
+        self._feature = record['feature']
+        self._threshold = record['threshold']
+        self._children = record['children'].reshape(-1)
+        self._proba = record['proba']
+
+    @classmethod
+    def compile(cls, model):
+        """
+        Compile a fitted sklearn RandomForestClassifier
+
+        Args:
+            model: Fitted single-output RandomForestClassifier
+
+        Returns:
+            CompiledForest: Evaluator producing the same predictions
+        """
+        n_classes = len(model.classes_)
+        total = sum(est.tree_.node_count for est in model.estimators_)
+        dtype = np.dtype([
+            ('feature', np.int32, (total,)),
+            ('threshold', np.float64, (total,)),
+            ('children', np.int32, (total, 2)),
+            ('proba', np.float64, (total, n_classes))
+        ])
+
+        nodes = np.zeros(1, dtype=dtype)
+        columns = nodes[0]
+        roots = []
+        max_depth = 0
+        offset = 0
+
+        for est in model.estimators_:
+            tree = est.tree_
+            count = tree.node_count
+            span = slice(offset, offset + count)
+            own = np.arange(offset, offset + count, dtype=np.int32)
+            leaf = tree.children_left == -1
+
+            columns['feature'][span] = np.where(leaf, 0, tree.feature)
+            # Leaves loop back to themselves whichever way the comparison goes
+            columns['threshold'][span] = np.where(leaf, np.inf, tree.threshold)
+            columns['children'][span, 0] = np.where(leaf, own, tree.children_left + offset)
+            columns['children'][span, 1] = np.where(leaf, own, tree.children_right + offset)
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :n_classes]
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            columns['proba'][span] = value / normalizer
+
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += count
+
+        return cls(nodes, roots, model.classes_, max_depth)
+
+    def apply(self, X):
+        """Leaf node index for every (row, tree) pair"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        leaves = np.empty((len(X), len(self.roots)), dtype=np.int32)
+        # Row blocks keep the working arrays in cache on large batches
+        for start in range(0, len(X), self.BLOCK_ROWS):
+            block = X[start:start + self.BLOCK_ROWS]
+            leaves[start:start + len(block)] = self._apply_block(block)
+        return leaves
+
+    def _apply_block(self, X):
+        n_rows, n_trees = X.shape[0], len(self.roots)
+        flat_x = X.ravel()
+        leaves = np.tile(self.roots, n_rows)
+
+        # Walk only the pairs still inside a tree; forests are unbalanced,
+        # so most pairs settle long before max_depth
+        active = np.arange(leaves.size)
+        row_offset = (active // n_trees) * X.shape[1]
+        for _ in range(self.max_depth):
+            index = leaves.take(active)
+            goes_right = flat_x.take(row_offset + self._feature.take(index)) > self._threshold.take(index)
+            nxt = self._children.take(2 * index + goes_right)
+            leaves[active] = nxt
+            moving = nxt != index
+            if not moving.all():
+                active = active[moving]
+                row_offset = row_offset[moving]
+                if not active.size:
+                    break
+        return leaves.reshape(n_rows, n_trees)
+
+    def predict_proba(self, X):
+        """Mean class probabilities over the trees"""
+        leaves = self.apply(X)
+        proba = np.zeros((leaves.shape[0], len(self.classes_)), dtype=np.float64)
+        # Accumulate in estimator order; a pairwise sum would differ in the last bit
+        for tree in range(leaves.shape[1]):
+            proba += self._proba[leaves[:, tree]]
+        proba /= leaves.shape[1]
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    @property
+    def nbytes(self):
+        return self.nodes.nbytes
+
+    def save(self, path, extra=None):
+        """
+        Write the node array and a JSON header pointing at it
+
+        The node file name carries a content digest and the header is
+        replaced atomically last, so a worker reloading mid-export sees
+        either the old forest or the new one, never a mix. The previous
+        node file is kept until the next save, for workers that read the
+        old header just before it was replaced.
+
+        Args:
+            path: Header path (e.g. models/traffic_predictor.forest.json)
+            extra: JSON-serialisable metadata stored alongside
+
+        Returns:
+            str: Path of the node file
+        """
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha1(self.nodes.tobytes()).hexdigest()[:12]
+        base = os.path.splitext(os.path.basename(path))[0]
+        nodes_file = f'{base}-{digest}.npy'
+        nodes_path = os.path.join(directory, nodes_file)
+
+        if not os.path.exists(nodes_path):
+            np.save(f'{nodes_path}.tmp.npy', self.nodes)
+            os.replace(f'{nodes_path}.tmp.npy', nodes_path)
+
+        previous = None
+        try:
+            with open(path) as fh:
+                previous = json.load(fh).get('nodes_file')
+        except (OSError, ValueError):
+            pass
+
+        header = {
+            'version': digest,
+            'nodes_file': nodes_file,
+            'roots': self.roots.tolist(),
+            'classes': self.classes_.tolist(),
+            'max_depth': self.max_depth,
+            **(extra or {})
+        }
+        with open(f'{path}.tmp', 'w') as fh:
+            json.dump(header, fh)
+        os.replace(f'{path}.tmp', path)
+
+        # Drop node files older than the previous generation
+        for name in os.listdir(directory):
+            if name.startswith(f'{base}-') and name.endswith('.npy') and name not in (nodes_file, previous):
+                os.remove(os.path.join(directory, name))
+        return nodes_path
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Open a compiled forest
+
+        Args:
+            path: Header path written by save()
+            mmap: Map the node file read-only instead of reading it in
+
+        Returns:
+            tuple: (CompiledForest, header dict)
+        """
+        with open(path) as fh:
+            header = json.load(fh)
+        nodes_path = os.path.join(os.path.dirname(path) or '.', header['nodes_file'])
+        nodes = np.load(nodes_path, mmap_mode='r' if mmap else None)
+        forest = cls(nodes, header['roots'], header['classes'], header['max_depth'])
+        return forest, header
\ No newline at end of file
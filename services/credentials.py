@@ -0,0 +1,353 @@
+"""
+Signed offline credentials and the revocation bitmap
+
+A credential is a compact binary record of a driver's document expiries
+and chain anchor, signed by the issuer key (EIP-191 personal_sign) and
+Base45-encoded with a TRAC1: prefix so it fits a QR code in alphanumeric
+mode. A checkpoint device that knows the issuer address checks the
+signature, the expiries and one bit of its revocation bitmap, with no
+network access.
+
+Payload layout (big-endian):
+
+    u8   version
+    u32  serial (credential id; its bit in the revocation bitmap)
+    u32  issued_at, u32 expires_at (unix seconds)
+    u16  license, insurance and road-worthiness expiry (days since 1970)
+    u8   anchor type (0 none, 1 transaction hash, 2 attestation Merkle root)
+    32B  anchor (only when anchor type != 0)
+    u8 length + UTF-8 each: license number, full name, vehicle plate
+    65B  signature over everything before it
+
+Revocations are permanent and numbered by a growing seq, so devices sync
+the full bitmap once and then only the serials revoked after their seq.
+"""
+import os
+import struct
+import sys
+import threading
+import zlib
+from datetime import date, datetime, timedelta
+
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from eth_utils import keccak
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from config import Config
+from models import db, AttestationBatch, CredentialRevocation, DriverCredential
+
+
+BASE45_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
+BASE45_VALUES = {char: value for value, char in enumerate(BASE45_ALPHABET)}
+
+PREFIX = 'TRAC1:'
+VERSION = 1
+HEADER = struct.Struct('>BIIIHHHB')
+SIGNATURE_BYTES = 65
+
+ANCHOR_NONE = 0
+ANCHOR_TRANSACTION = 1
+ANCHOR_MERKLE_ROOT = 2
+ANCHOR_TYPES = {ANCHOR_NONE: None, ANCHOR_TRANSACTION: 'transaction', ANCHOR_MERKLE_ROOT: 'merkle_root'}
+
+EPOCH = date(1970, 1, 1)
+
+
+def b45encode(data):
+    """Base45 (RFC 9285): 2 bytes -> 3 QR-alphanumeric characters"""
+    chars = []
+    for i in range(0, len(data) - 1, 2):
+        value = data[i] * 256 + data[i + 1]
+        value, c = divmod(value, 45)
+        e, d = divmod(value, 45)
+        chars += (BASE45_ALPHABET[c], BASE45_ALPHABET[d], BASE45_ALPHABET[e])
+    if len(data) % 2:
+        d, c = divmod(data[-1], 45)
+        chars += (BASE45_ALPHABET[c], BASE45_ALPHABET[d])
+    return ''.join(chars)
+
+
+def b45decode(text):
+    out = bytearray()
+    try:
+        values = [BASE45_VALUES[char] for char in text]
+    except KeyError as e:
+        raise ValueError(f'Invalid Base45 character: {e.args[0]!r}')
+    if len(values) % 3 == 1:
+        raise ValueError('Invalid Base45 length')
+    for i in range(0, len(values), 3):
+        group = values[i:i + 3]
+        if len(group) == 3:
+            value = group[0] + group[1] * 45 + group[2] * 2025
+            if value > 0xFFFF:
+                raise ValueError('Invalid Base45 group')
+            out += value.to_bytes(2, 'big')
+        else:
+            value = group[0] + group[1] * 45
+            if value > 0xFF:
+                raise ValueError('Invalid Base45 group')
+            out.append(value)
+    return bytes(out)
+
+
+def _days(value):
+    if isinstance(value, datetime):
+        value = value.date()
+    return (value - EPOCH).days
+
+
+def _pack_text(value):
+    raw = (value or '').encode()[:255]
+    return bytes([len(raw)]) + raw
+
+
+def is_revoked(bitmap, serial):
+    """Bit serial of the revocation bitmap (least significant bit first)"""
+    index = serial >> 3
+    return index < len(bitmap) and bool(bitmap[index] & (1 << (serial & 7)))
+
+
+def decode_credential(token):
+    """
+    Parse a credential without checking it
+
+    Returns:
+        dict: Credential fields, plus the signed 'payload' and 'signature' bytes
+
+    Raises:
+        ValueError: Malformed credential
+    """
+    if not token.startswith(PREFIX):
+        raise ValueError('Not a TRAC credential')
+    raw = b45decode(token[len(PREFIX):])
+    if len(raw) < HEADER.size + SIGNATURE_BYTES:
+        raise ValueError('Credential too short')
+
+    payload, signature = raw[:-SIGNATURE_BYTES], raw[-SIGNATURE_BYTES:]
+    version, serial, issued_at, expires_at, license_days, insurance_days, cert_days, anchor_type = \
+        HEADER.unpack_from(payload)
+    if version != VERSION or anchor_type not in ANCHOR_TYPES:
+        raise ValueError(f'Unsupported credential version {version}')
+
+    offset = HEADER.size
+    anchor = None
+    if anchor_type != ANCHOR_NONE:
+        anchor = '0x' + payload[offset:offset + 32].hex()
+        offset += 32
+    texts = []
+    for _ in range(3):
+        length = payload[offset]
+        texts.append(payload[offset + 1:offset + 1 + length].decode())
+        offset += 1 + length
+
+    return {
+        'serial': serial,
+        'issued_at': datetime.utcfromtimestamp(issued_at),
+        'expires_at': datetime.utcfromtimestamp(expires_at),
+        'license_expiry': EPOCH + timedelta(days=license_days),
+        'insurance_expiry': EPOCH + timedelta(days=insurance_days),
+        'cert_expiry': EPOCH + timedelta(days=cert_days),
+        'anchor_type': ANCHOR_TYPES[anchor_type],
+        'anchor': anchor,
+        'license_number': texts[0],
+        'full_name': texts[1],
+        'vehicle_plate': texts[2],
+        'payload': payload,
+        'signature': signature
+    }
+
+
+def verify_credential(token, issuer, revocations=None, now=None):
+    """
+    Verify a credential the way a checkpoint device does, offline
+
+    Args:
+        token: TRAC1: credential string
+        issuer: Issuer address (CredentialService.issuer)
+        revocations: Revocation bitmap bytes, if the device has one
+        now: Verification time (defaults to utcnow)
+
+    Returns:
+        dict: 'valid', 'reason' when invalid, and the decoded 'credential'
+    """
+    now = now or datetime.utcnow()
+    try:
+        credential = decode_credential(token)
+    except (ValueError, IndexError, UnicodeDecodeError, struct.error) as e:
+        return {'valid': False, 'reason': f'malformed: {e}', 'credential': None}
+
+    payload, signature = credential.pop('payload'), credential.pop('signature')
+    try:
+        signer = Account.recover_message(encode_defunct(primitive=payload), signature=signature)
+    except Exception:
+        signer = None
+
+    today = now.date()
+    credential['documents'] = {
+        'license_valid': credential['license_expiry'] > today,
+        'insurance_valid': credential['insurance_expiry'] > today,
+        'road_worthiness_valid': credential['cert_expiry'] > today
+    }
+
+    reason = None
+    if signer is None or signer.lower() != issuer.lower():
+        reason = 'bad_signature'
+    elif revocations is not None and is_revoked(revocations, credential['serial']):
+        reason = 'revoked'
+    elif now >= credential['expires_at']:
+        reason = 'credential_expired'
+    elif not all(credential['documents'].values()):
+        reason = 'documents_expired'
+
+    result = {'valid': reason is None, 'credential': credential}
+    if reason:
+        result['reason'] = reason
+    return result
+
+
+class CredentialService:
+    """Issues signed credentials and maintains the revocation bitmap"""
+
+    def __init__(self, signing_key=None):
+        # A key of its own: never the funded chain key (PRIVATE_KEY)
+        key = signing_key or Config.CREDENTIAL_SIGNING_KEY
+        # The development key is derived from SECRET_KEY, whose default is
+        # public, so it is only ever used with DEBUG on; every worker derives
+        # the same one, so credentials issued by one verify on all of them
+        self.development_key = not key and Config.DEBUG
+        if self.development_key:
+            key = '0x' + keccak(f'trac-credentials:{Config.SECRET_KEY}'.encode()).hex()
+        self.account = Account.from_key(key) if key else None
+        self._bitmap = (None, b'')
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        """False when no signing key is configured; nothing is issued or verified"""
+        return self.account is not None
+
+    @property
+    def issuer(self):
+        return self.account.address if self.account else None
+
+    def _anchor(self, driver):
+        if driver.attestation_batch_id is not None:
+            batch = db.session.get(AttestationBatch, driver.attestation_batch_id)
+            return ANCHOR_MERKLE_ROOT, bytes.fromhex(batch.merkle_root[2:])
+        tx = driver.blockchain_tx or ''
+        if tx.startswith('0x') and len(tx) == 66:
+            return ANCHOR_TRANSACTION, bytes.fromhex(tx[2:])
+        return ANCHOR_NONE, b''
+
+    def issue(self, driver, now=None):
+        """
+        Issue and sign a credential for a driver
+
+        Valid for CREDENTIAL_TTL_DAYS, cut short by the first document
+        expiry still ahead.
+
+        Returns:
+            dict: 'credential' (QR-ready string), 'serial', 'issued_at', 'expires_at'
+
+        Raises:
+            RuntimeError: No signing key configured
+            ValueError: The driver's credentials have been revoked
+        """
+        if not self.enabled:
+            raise RuntimeError('Credential signing key is not configured')
+        if driver.revoked_at is not None:
+            raise ValueError('Credentials for this driver have been revoked')
+        now = (now or datetime.utcnow()).replace(microsecond=0)
+        expires_at = now + timedelta(days=Config.CREDENTIAL_TTL_DAYS)
+        for expiry in (driver.license_expiry, driver.insurance_expiry, driver.cert_expiry):
+            cutoff = datetime.combine(expiry, datetime.min.time()) if not isinstance(expiry, datetime) else expiry
+            if now < cutoff < expires_at:
+                expires_at = cutoff
+
+        record = DriverCredential(driver_id=driver.id, issued_at=now, expires_at=expires_at)
+        db.session.add(record)
+        db.session.commit()
+
+        anchor_type, anchor = self._anchor(driver)
+        payload = HEADER.pack(
+            VERSION, record.id,
+            int((now - datetime(1970, 1, 1)).total_seconds()),
+            int((expires_at - datetime(1970, 1, 1)).total_seconds()),
+            _days(driver.license_expiry), _days(driver.insurance_expiry), _days(driver.cert_expiry),
+            anchor_type
+        ) + anchor + _pack_text(driver.license_number) \
+            + _pack_text(f"{driver.first_name} {driver.last_name}") + _pack_text(driver.vehicle_plate)
+        signature = self.account.sign_message(encode_defunct(primitive=payload)).signature
+
+        return {
+            'credential': PREFIX + b45encode(payload + bytes(signature)),
+            'serial': record.id,
+            'issued_at': now,
+            'expires_at': expires_at
+        }
+
+    def revoke_driver(self, driver, reason=None):
+        """
+        Revoke every unexpired, unrevoked credential of a driver and stop
+        new ones being issued; returns the serials
+        """
+        if driver.revoked_at is None:
+            driver.revoked_at = datetime.utcnow()
+        revoked = {row.serial for row in CredentialRevocation.query.join(
+            DriverCredential, DriverCredential.id == CredentialRevocation.serial
+        ).filter(DriverCredential.driver_id == driver.id)}
+        serials = [
+            credential.id for credential in DriverCredential.query.filter(
+                DriverCredential.driver_id == driver.id,
+                DriverCredential.expires_at > datetime.utcnow()
+            )
+            if credential.id not in revoked
+        ]
+        for serial in serials:
+            db.session.add(CredentialRevocation(serial=serial, reason=reason))
+        db.session.commit()
+        return serials
+
+    def latest_seq(self):
+        return db.session.query(db.func.max(CredentialRevocation.seq)).scalar() or 0
+
+    def revocation_bitmap(self):
+        """
+        Bitmap of revoked serials, rebuilt only when a revocation is added
+
+        Returns:
+            tuple: (seq it is current to, bitmap bytes)
+        """
+        seq = self.latest_seq()
+        cached_seq, bitmap = self._bitmap
+        if cached_seq == seq:
+            return seq, bitmap
+
+        with self._lock:
+            serials = [row[0] for row in db.session.query(CredentialRevocation.serial)]
+            bits = bytearray((max(serials) >> 3) + 1 if serials else 0)
+            for serial in serials:
+                bits[serial >> 3] |= 1 << (serial & 7)
+            self._bitmap = (seq, bytes(bits))
+        return self._bitmap
+
+    def export_bitmap(self):
+        """zlib-compressed bitmap for bulk download; returns (seq, bytes)"""
+        seq, bitmap = self.revocation_bitmap()
+        return seq, zlib.compress(bitmap, 9)
+
+    def revocations_since(self, seq):
+        """Serials revoked after seq, oldest first"""
+        rows = CredentialRevocation.query.filter(CredentialRevocation.seq > seq) \
+            .order_by(CredentialRevocation.seq).all()
+        return [row.serial for row in rows]
+
+
+# Create singleton instance
+credential_service = CredentialService()
\ No newline at end of file
@@ -1,8 +1,10 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import hashlib
 import os
 import sys
+import threading
 
 # Add parent directory to path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,6 +12,33 @@ parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
+from services.gazetteer import gazetteer, normalize_place_name
+from services.synthetic_data import generate_traffic
+
+
+# Analysis windows precomputed for traffic pattern summaries (days)
+PATTERN_WINDOWS = (7, 30, 90)
+TREND_ROLLING_DAYS = 7
+TREND_THRESHOLD = 0.05
+
+# Higher weather_score means better conditions
+WEATHER_BINS = [0, 4, 6, 7, 10]
+WEATHER_LABELS = ['heavy_rain', 'rain', 'overcast', 'clear']
+
+# Clock ranges for the time_of_day labels, used when rows carry no timestamp
+TIME_OF_DAY_RANGES = {
+    'morning': '05:00-12:00',
+    'afternoon': '12:00-17:00',
+    'evening': '17:00-21:00',
+    'night': '21:00-05:00'
+}
+
+
+def _slot_label(slot):
+    if isinstance(slot, str):
+        return TIME_OF_DAY_RANGES.get(slot, slot)
+    return f'{int(slot):02d}:00-{(int(slot) + 1) % 24:02d}:00'
+
 
 class DataAnalysisService:
     """Service for data science operations using Pandas"""
@@ -17,12 +46,28 @@ class DataAnalysisService:
     def __init__(self):
         self.traffic_data = None
         self.incident_data = None
+        self.data_version = None
+        self.data_path = None
+        self.data_loaded_at = None
+        self._patterns = {}
+        self._patterns_version = None
+        self._patterns_lock = threading.Lock()
+        self._congestion_means = {}
+
+    def _set_traffic_data(self, df):
+        """Swap in a traffic dataset and record its fingerprint"""
+        digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+        digest.update(','.join(df.columns).encode())
+        self.traffic_data = df
+        self.data_version = digest.hexdigest()[:16]
+        self.data_loaded_at = datetime.utcnow()
 
     def load_traffic_data(self, file_path='data/traffic_data.csv'):
         """Load traffic data from CSV"""
         try:
             if os.path.exists(file_path):
-                self.traffic_data = pd.read_csv(file_path)
+                self._set_traffic_data(pd.read_csv(file_path))
+                self.data_path = file_path
                 return {
                     'success': True,
                     'rows': len(self.traffic_data),
@@ -30,7 +75,8 @@ class DataAnalysisService:
                 }
             else:
                 print(f"Traffic data file not found, creating sample data...")
-                self.traffic_data = self._create_sample_traffic_data()
+                self._set_traffic_data(self._create_sample_traffic_data())
+                self.data_path = None
                 return {
                     'success': True,
                     'rows': len(self.traffic_data),
@@ -39,7 +85,8 @@ class DataAnalysisService:
                 }
         except Exception as e:
             print(f"Error loading traffic data: {e}")
-            self.traffic_data = self._create_sample_traffic_data()
+            self._set_traffic_data(self._create_sample_traffic_data())
+            self.data_path = None
             return {
                 'success': True,
                 'rows': len(self.traffic_data),
@@ -47,35 +94,183 @@ class DataAnalysisService:
                 'note': 'Using sample data due to error'
             }
 
-    def _create_sample_traffic_data(self):
+    def _create_sample_traffic_data(self, rows=200):
         """Create sample traffic data for demo"""
-        locations = [
-            'Victoria Island', 'Lekki Phase 1', 'Ikeja', 'Surulere',
-            'Yaba', 'VI-Lekki', 'Ikoyi', 'Marina', 'Ajah', 'Festac',
-            'Apapa', 'Maryland', 'Oshodi', 'Ojuelegba', 'Allen Avenue',
-            'Berger', 'Ketu', 'Mile 2', 'Egbeda', 'Isolo'
-        ]
+        df = next(generate_traffic(rows, seed=42, chunk_size=rows))
+        print(f"✅ Created sample traffic data with {len(df)} rows")
+        return df
 
-        times_of_day = ['morning', 'afternoon', 'evening', 'night']
+    def _pattern_summaries(self):
+        """Per-location summaries for the current dataset, rebuilt when its version changes"""
+        if self._patterns_version == self.data_version:
+            return self._patterns
+        with self._patterns_lock:
+            if self._patterns_version != self.data_version:
+                df, version = self.traffic_data, self.data_version
+                self._patterns = self.build_pattern_summaries(df) if df is not None else {}
+                self._patterns_version = version
+        return self._patterns
 
-        data = []
-        np.random.seed(42)
+    def build_pattern_summaries(self, df):
+        """
+        Summarise every location in one pass of grouped aggregations
 
-        for _ in range(200):
-            data.append({
-                'location': np.random.choice(locations),
-                'time_of_day': np.random.choice(times_of_day),
-                'day_of_week': np.random.randint(0, 7),
-                'weather_score': np.random.randint(5, 10),
-                'congestion_level': np.random.randint(1, 10),
-                'accident_count': np.random.randint(0, 8),
-                'avg_speed_kmh': np.random.randint(15, 60),
-                'road_users': np.random.randint(100, 5000)
-            })
+        Args:
+            df: Traffic observations (location, congestion_level,
+                weather_score, optional accident_count and timestamp)
 
-        df = pd.DataFrame(data)
-        print(f"✅ Created sample traffic data with {len(df)} rows")
-        return df
+        Returns:
+            dict: {window_days: {normalized location: summary}}
+        """
+        has_timestamp = 'timestamp' in df.columns
+        work = pd.DataFrame({
+            'location': df['location'].astype('category'),
+            'congestion': df['congestion_level'].astype('float32'),
+            'accidents': df['accident_count'] if 'accident_count' in df.columns else 0,
+            'weather': pd.cut(df['weather_score'], WEATHER_BINS, labels=WEATHER_LABELS)
+        })
+        if has_timestamp:
+            timestamps = pd.to_datetime(df['timestamp'])
+            work['slot'] = timestamps.dt.hour.astype('int8')
+            work['date'] = timestamps.dt.normalize()
+            end = work['date'].max()
+        else:
+            work['slot'] = df['time_of_day']
+
+        summaries = {}
+        for days in PATTERN_WINDOWS:
+            window = work[work['date'] > end - pd.Timedelta(days=days)] if has_timestamp else work
+            summaries[days] = self._summarise_window(window, days, has_timestamp)
+        return summaries
+
+    def _summarise_window(self, window, days, has_timestamp):
+        by_location = window.groupby('location', observed=True)
+        overall = by_location.agg(
+            observations=('congestion', 'size'),
+            average_congestion=('congestion', 'mean'),
+            total_incidents=('accidents', 'sum')
+        )
+
+        # Locations x slots matrix of mean congestion; peaks are the top two slots
+        profile = window.groupby(['location', 'slot'], observed=True)['congestion'].mean().unstack('slot')
+        values = profile.to_numpy(dtype=float)
+        ranked = np.argsort(np.where(np.isnan(values), np.inf, -values), axis=1)
+        slots = list(profile.columns)
+
+        weather = window.groupby(['location', 'weather'], observed=True).agg(
+            observations=('congestion', 'size'),
+            average_congestion=('congestion', 'mean'),
+            accidents_per_observation=('accidents', 'mean')
+        )
+
+        trends = {}
+        if has_timestamp:
+            daily = window.groupby(['date', 'location'], observed=True)['congestion'].mean().unstack('location')
+            daily = daily.asfreq('D')
+            rolling = daily.rolling(TREND_ROLLING_DAYS, min_periods=1).mean()
+            first = rolling.bfill().iloc[0]
+            change = (rolling.ffill().iloc[-1] - first) / first
+            for location in rolling.columns:
+                series = rolling[location].dropna().round(2)
+                trends[location] = {
+                    'trend': (
+                        'INCREASING' if change[location] > TREND_THRESHOLD
+                        else 'DECREASING' if change[location] < -TREND_THRESHOLD
+                        else 'STABLE'
+                    ),
+                    'change_percent': round(float(change[location]) * 100, 1),
+                    'daily_congestion': [
+                        {'date': d.strftime('%Y-%m-%d'), 'congestion': float(v)}
+                        for d, v in series.items()
+                    ]
+                }
+
+        weather_by_location = {}
+        for (location, condition), row in weather.iterrows():
+            weather_by_location.setdefault(location, {})[condition] = {
+                'observations': int(row['observations']),
+                'average_congestion': round(float(row['average_congestion']), 2),
+                'accidents_per_observation': round(float(row['accidents_per_observation']), 3)
+            }
+
+        table = {}
+        for i, location in enumerate(profile.index):
+            row_values = values[i]
+            valid = int((~np.isnan(row_values)).sum())
+            peaks = [slots[j] for j in ranked[i, :min(2, valid)]]
+            quietest = slots[ranked[i, valid - 1]] if valid else None
+            stats = overall.loc[location]
+            trend = trends.get(location, {})
+
+            recommendations = [f'Avoid travel during {_slot_label(p)}' for p in peaks]
+            if quietest is not None and quietest not in peaks:
+                recommendations.append(f'Lightest traffic during {_slot_label(quietest)}')
+
+            table[normalize_place_name(location)] = {
+                'location': location,
+                'analysis_period_days': days,
+                'observations': int(stats['observations']),
+                'peak_hours': [_slot_label(p) for p in peaks],
+                'hourly_profile': {
+                    _slot_label(slot): round(float(v), 2)
+                    for slot, v in zip(slots, row_values) if not np.isnan(v)
+                },
+                'average_congestion': round(float(stats['average_congestion']), 2),
+                'total_incidents': int(stats['total_incidents']),
+                'trend': trend.get('trend'),
+                'trend_change_percent': trend.get('change_percent'),
+                'daily_congestion': trend.get('daily_congestion', []),
+                'weather_impact': weather_by_location.get(location, {}),
+                'recommendations': recommendations
+            }
+        return table
+
+    def get_traffic_patterns(self, location, days=30):
+        """
+        Precomputed traffic pattern summary for a location
+
+        Args:
+            location: Location name, alias or misspelling
+            days: Requested window; served from the smallest precomputed
+                window that covers it
+
+        Returns:
+            dict: Summary, or None if the dataset has no such location
+        """
+        summaries = self._pattern_summaries()
+        window = next((w for w in PATTERN_WINDOWS if w >= days), PATTERN_WINDOWS[-1])
+        table = summaries.get(window, {})
+
+        summary = table.get(normalize_place_name(location))
+        if summary is None:
+            place = gazetteer.resolve(location)
+            for label in ([place['name']] + place['aliases']) if place else []:
+                summary = table.get(normalize_place_name(label))
+                if summary is not None:
+                    break
+        return summary
+
+    def congestion_by_location(self, time_of_day):
+        """
+        Mean historical congestion level per location at a time of day
+
+        Used as the route engine's forecast when no model is served.
+
+        Returns:
+            dict: {location: mean congestion level}
+        """
+        key = (self.data_version, time_of_day)
+        cached = self._congestion_means.get(key)
+        if cached is None:
+            df = self.traffic_data
+            if df is None or 'time_of_day' not in df.columns:
+                return {}
+            rows = df[df['time_of_day'] == time_of_day]
+            cached = rows.groupby('location', observed=True)['congestion_level'].mean().round(2).to_dict()
+            # One entry per time of day for the current dataset
+            self._congestion_means = {k: v for k, v in self._congestion_means.items() if k[0] == self.data_version}
+            self._congestion_means[key] = cached
+        return cached
 
     def get_accident_statistics(self, start_location=None, end_location=None):
         """Get comprehensive accident statistics"""
@@ -0,0 +1,132 @@
+"""
+Streaming bulk exports as NDJSON or CSV
+
+Rows are read in primary-key order through a server-side cursor
+(stream_results; a named cursor on PostgreSQL) EXPORT_CHUNK_ROWS at a
+time and written out chunk by chunk, so memory stays flat whatever the
+table size and the first bytes leave as soon as the first chunk is read.
+Only the exported columns are selected and no ORM objects are built.
+
+The export covers ids up to the table's last id when it starts (sent as
+X-Last-Id), so a client can tell a complete export from a cut-off one: a
+CSV export is complete when its last row has that id, and an NDJSON
+export ends with an {"op": "end"} line carrying the row count and last
+id. If reading fails partway, NDJSON ends with an {"op": "error"} line
+instead and a CSV response is aborted rather than closed cleanly. Either
+way the export resumes with after_id set to the last id received.
+"""
+import csv
+import io
+import json
+import os
+import sys
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from config import Config
+from models import db, Driver, RouteAnalysis, TrafficIncident
+from services.json_provider import _default
+
+
+# dataset -> (model, exported columns)
+DATASETS = {
+    'drivers': (Driver, Driver.serialized_fields + ('change_seq', 'created_at', 'updated_at')),
+    'incidents': (TrafficIncident, TrafficIncident.serialized_fields + ('created_at',)),
+    'route_analyses': (RouteAnalysis, RouteAnalysis.serialized_fields),
+}
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+# Leading characters spreadsheets read as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        # Quote text a spreadsheet would otherwise evaluate
+        return "'" + value if value.startswith(FORMULA_PREFIXES) else value
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+_dumps = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(',', ':')).encode
+
+
+def _ndjson_chunk(fields, rows):
+    return ''.join(_dumps(dict(zip(fields, row))) + '\n' for row in rows)
+
+
+def _csv_chunk(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def stream_export(dataset, fmt='ndjson', after_id=None, limit=None, chunk_rows=None):
+    """
+    An export as text chunks, and the last id it will contain
+
+    Args:
+        dataset: Key of DATASETS
+        fmt: 'ndjson' (with an end line) or 'csv' (with a header row)
+        after_id: Only rows with a greater id
+        limit: Most rows to export
+        chunk_rows: Rows fetched and written per chunk (default EXPORT_CHUNK_ROWS)
+
+    Returns:
+        tuple: (last id or None if there are no rows, chunk generator)
+
+    Raises:
+        KeyError: Unknown dataset or format (before anything is yielded)
+    """
+    model, fields = DATASETS[dataset]
+    if fmt not in FORMATS:
+        raise KeyError(fmt)
+    chunk_rows = chunk_rows or Config.EXPORT_CHUNK_ROWS
+
+    ids = db.select(model.id).order_by(model.id)
+    if after_id is not None:
+        ids = ids.where(model.id > after_id)
+    if limit is not None:
+        ids = ids.limit(limit)
+    last_id = db.session.execute(db.select(db.func.max(ids.subquery().c.id))).scalar()
+
+    # Rows added while streaming are left for the next export
+    query = db.select(*[getattr(model, field) for field in fields]).order_by(model.id)
+    if after_id is not None:
+        query = query.where(model.id > after_id)
+    query = query.where(model.id <= last_id if last_id is not None else db.false())
+
+    def generate():
+        if fmt == 'csv':
+            yield _csv_chunk([fields])
+
+        rows, last_sent = 0, None
+        try:
+            # A connection of its own, held only for the life of the stream
+            with db.engine.connect() as connection:
+                result = connection.execution_options(stream_results=True, yield_per=chunk_rows).execute(query)
+                for chunk in result.partitions():
+                    yield _ndjson_chunk(fields, chunk) if fmt == 'ndjson' else _csv_chunk(chunk)
+                    rows += len(chunk)
+                    last_sent = chunk[-1][0]
+        except Exception as e:
+            print(f"Export of {dataset} failed after {rows} rows: {e}")
+            if fmt == 'csv':
+                raise
+            yield _dumps({'op': 'error', 'error': str(e), 'rows': rows, 'last_id': last_sent}) + '\n'
+            return
+
+        if fmt == 'ndjson':
+            yield _dumps({'op': 'end', 'rows': rows, 'last_id': last_sent}) + '\n'
+
+    return last_id, generate()
\ No newline at end of file
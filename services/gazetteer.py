@@ -0,0 +1,192 @@
+import json
+import os
+import re
+import sys
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from config import Config
+from services.metrics import metrics
+
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_place_name(name):
+    """Lowercase, strip punctuation and collapse whitespace"""
+    if not name:
+        return ''
+    return _NON_ALNUM.sub(' ', str(name).lower()).strip()
+
+
+def _trigrams(key):
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Gazetteer:
+    """In-memory index of Lagos place names for fuzzy resolution and autocomplete"""
+
+    MAX_SUGGESTIONS = 10
+    MIN_FUZZY_SCORE = 0.45
+
+    def __init__(self):
+        self.places = {}
+        self._exact = {}
+        self._keys = []
+        self._key_place = []
+        self._trie = {}
+        self._ngrams = {}
+
+    def load(self, file_path=None):
+        """Load place names and aliases from a JSON file"""
+        file_path = file_path or Config.GAZETTEER_PATH
+        try:
+            with open(file_path, encoding='utf-8') as fh:
+                places = json.load(fh)
+        except Exception as e:
+            print(f"⚠️  Could not load gazetteer: {e}")
+            places = []
+
+        self.build(places)
+        return {
+            'success': bool(self.places),
+            'places': len(self.places),
+            'names': len(self._keys)
+        }
+
+    def build(self, places):
+        """Build the exact, prefix and n-gram indexes"""
+        self.places = {}
+        self._exact = {}
+        self._keys = []
+        self._key_place = []
+        self._trie = {}
+        self._ngrams = {}
+
+        for rank, place in enumerate(places):
+            place_id = place['id']
+            self.places[place_id] = {
+                'id': place_id,
+                'name': place['name'],
+                'aliases': list(place.get('aliases', [])),
+                'coordinates': {'lat': place['lat'], 'lng': place['lng']},
+                'kind': place.get('kind', 'place'),
+                '_rank': rank
+            }
+            for label in [place['name']] + list(place.get('aliases', [])):
+                self._add_key(normalize_place_name(label), place_id)
+
+    def _add_key(self, key, place_id):
+        if not key or key in self._exact:
+            return
+
+        key_id = len(self._keys)
+        self._keys.append(key)
+        self._key_place.append(place_id)
+        self._exact[key] = place_id
+
+        # Every trie node keeps its best few place ids so autocomplete is
+        # a walk down the prefix, not a scan of the subtree
+        node = self._trie
+        for char in key:
+            node = node.setdefault(char, {'#': []})
+            top = node['#']
+            if place_id not in top and len(top) < self.MAX_SUGGESTIONS:
+                top.append(place_id)
+
+        for gram in _trigrams(key):
+            self._ngrams.setdefault(gram, []).append(key_id)
+
+    def public(self, place_id):
+        """Public representation of a place"""
+        place = self.places[place_id]
+        return {k: v for k, v in place.items() if not k.startswith('_')}
+
+    def autocomplete(self, query, limit=MAX_SUGGESTIONS):
+        """Suggest places whose name or alias starts with the query"""
+        key = normalize_place_name(query)
+        if not key:
+            return []
+
+        node = self._trie
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                break
+        else:
+            return [self.public(pid) for pid in node['#'][:limit]]
+
+        # No prefix match, fall back to fuzzy suggestions
+        return [match['place'] for match in self.search(query, limit)]
+
+    def search(self, query, limit=MAX_SUGGESTIONS):
+        """Fuzzy search by trigram similarity (Dice coefficient)"""
+        key = normalize_place_name(query)
+        if not key:
+            return []
+
+        grams = _trigrams(key)
+        shared = {}
+        for gram in grams:
+            for key_id in self._ngrams.get(gram, ()):
+                shared[key_id] = shared.get(key_id, 0) + 1
+
+        best = {}
+        for key_id, count in shared.items():
+            candidate = self._keys[key_id]
+            score = 2.0 * count / (len(grams) + len(candidate) + 1)
+            place_id = self._key_place[key_id]
+            if score > best.get(place_id, (0.0, ''))[0]:
+                best[place_id] = (score, candidate)
+
+        ranked = sorted(
+            best.items(),
+            key=lambda item: (-item[1][0], self.places[item[0]]['_rank'])
+        )
+        return [
+            {
+                'place': self.public(place_id),
+                'matched': matched,
+                'score': round(score, 3)
+            }
+            for place_id, (score, matched) in ranked[:limit]
+        ]
+
+    def resolve(self, name):
+        """
+        Resolve free text to a single place
+
+        Args:
+            name: Place name, alias or misspelling
+
+        Returns:
+            dict: Place (with its node id) or None if nothing is close enough
+        """
+        key = normalize_place_name(name)
+        if not key:
+            return None
+
+        place_id = self._exact.get(key)
+        metrics.cache_access('gazetteer_exact', place_id is not None)
+        if place_id:
+            return self.public(place_id)
+
+        matches = self.search(name, limit=1)
+        if matches and matches[0]['score'] >= self.MIN_FUZZY_SCORE:
+            return matches[0]['place']
+        return None
+
+    def canonical_name(self, name):
+        """Canonical place name for free text, or the input unchanged"""
+        place = self.resolve(name)
+        return place['name'] if place else name
+
+
+# Create singleton instance
+gazetteer = Gazetteer()
+gazetteer.load()
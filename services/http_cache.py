@@ -0,0 +1,128 @@
+import gzip
+import hashlib
+from datetime import timezone
+from functools import wraps
+
+from flask import request, current_app
+
+from services.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/plain',
+    'text/html',
+}
+
+
+def conditional(version_func):
+    """
+    Answer conditional GETs with 304 before running the view
+
+    Args:
+        version_func: Callable returning (version, last_modified). The
+            version is any string that changes when the underlying data
+            changes, or None when the response can't be validated (it is
+            then sent without an ETag); last_modified is a datetime or None.
+
+    The ETag covers the endpoint, its query string and the data version,
+    so an unchanged result costs one version lookup instead of a full
+    recomputation and serialization.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version, last_modified = version_func()
+            if version is None:
+                return view(*args, **kwargs)
+            last_modified = _http_timestamp(last_modified)
+
+            etag = hashlib.sha1(
+                f'{request.path}?{request.query_string.decode()}|{version}'.encode()
+            ).hexdigest()[:32]
+
+            not_modified = _not_modified(etag, last_modified)
+            metrics.cache_access('http_conditional', not_modified)
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+def _http_timestamp(value):
+    """Naive-UTC or aware datetime to aware UTC at HTTP (second) precision"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def _choose_encoding(accept_encodings):
+    """Client's highest-q encoding we support (brotli on a tie); q=0 refuses one"""
+    supported = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return accept_encodings.best_match(supported)
+
+
+def init_compression(app):
+    """Compress large text responses with brotli or gzip"""
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 500)
+    gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', 6)
+    brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 4)
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.status_code < 200 or response.status_code >= 300
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        encoding = _choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+
+        if encoding == 'br':
+            body = brotli.compress(body, quality=brotli_quality)
+        else:
+            body = gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    return app
@@ -0,0 +1,170 @@
+"""
+In-process topic broker behind the live update stream (/api/predict/stream)
+
+Topics are place ids; '*' subscribers get every topic. Each topic keeps
+its last REPLAY_SIZE messages and the broker keeps the last
+ALL_REPLAY_SIZE across all topics, so a reconnecting client (Last-Event-ID)
+gets what it missed whichever topics it follows.
+
+The broker lives in one process: an event published by one gunicorn
+worker reaches only the streams held by that worker. Run the live stream
+with a single worker (WEB_CONCURRENCY=1, scaling with GUNICORN_THREADS or
+gevent connections), or route /api/predict/stream and the publishing
+endpoints (/api/predict/incidents, /api/predict/probes) to the same
+process.
+"""
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+
+class Subscription:
+    """A single client's view of one or more broker topics"""
+
+    def __init__(self, broker, topics, max_pending):
+        self.broker = broker
+        self.topics = topics
+        self.messages = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+
+    def push(self, message):
+        """Queue a pre-serialized message, dropping the oldest if the client lags"""
+        while True:
+            try:
+                self.messages.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self.messages.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout):
+        """Next message or None when the heartbeat interval passes"""
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LiveUpdateBroker:
+    """Topic fan-out for live congestion and incident deltas (Server-Sent Events)"""
+
+    ALL_TOPICS = '*'
+    REPLAY_SIZE = 100
+    ALL_REPLAY_SIZE = 1000
+    MAX_PENDING = 256
+    HEARTBEAT_SECONDS = 15
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._history = {}
+        self._all_history = deque(maxlen=self.ALL_REPLAY_SIZE)
+        self._sequence = 0
+
+    def subscribe(self, topics, last_event_id=None):
+        """
+        Subscribe to topics
+
+        Args:
+            topics: Iterable of topic names (place ids or '*')
+            last_event_id: Resume point sent back by a reconnecting client
+
+        Returns:
+            Subscription: Queue of serialized SSE messages
+        """
+        topics = frozenset(topics) or frozenset([self.ALL_TOPICS])
+        subscription = Subscription(self, topics, self.MAX_PENDING)
+
+        with self._lock:
+            for topic in topics:
+                self._subscribers.setdefault(topic, set()).add(subscription)
+
+            # Replay what the client missed while reconnecting
+            if last_event_id is not None:
+                missed = []
+                # '*' sees every topic live, so it replays from the global history
+                histories = [self._all_history] if self.ALL_TOPICS in topics \
+                    else [self._history.get(topic, ()) for topic in topics]
+                for history in histories:
+                    missed.extend(item for item in history if item[0] > last_event_id)
+                for _, message in sorted(set(missed)):
+                    subscription.push(message)
+
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+    def publish(self, topic, event, data):
+        """
+        Publish a delta to every subscriber of a topic
+
+        The payload is serialized once and the same bytes are queued for
+        all subscribers, so fan-out cost does not depend on payload size.
+
+        Returns:
+            int: Number of subscriptions the message was queued for
+        """
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+            body = json.dumps(
+                {'topic': topic, 'sequence': sequence, 'data': data},
+                separators=(',', ':'),
+                default=str
+            )
+            message = f'id: {sequence}\nevent: {event}\ndata: {body}\n\n'.encode()
+
+            history = self._history.get(topic)
+            if history is None:
+                history = self._history[topic] = deque(maxlen=self.REPLAY_SIZE)
+            history.append((sequence, message))
+            self._all_history.append((sequence, message))
+
+            targets = set(self._subscribers.get(topic, ()))
+            if topic != self.ALL_TOPICS:
+                targets.update(self._subscribers.get(self.ALL_TOPICS, ()))
+
+        for subscription in targets:
+            subscription.push(message)
+        return len(targets)
+
+    def stream(self, subscription):
+        """Generator of SSE bytes for a subscription, with heartbeats"""
+        try:
+            yield b'retry: 5000\n\n'
+            while True:
+                message = subscription.get(self.HEARTBEAT_SECONDS)
+                if message is None:
+                    yield f': heartbeat {int(time.time())}\n\n'.encode()
+                else:
+                    yield message
+        finally:
+            subscription.close()
+
+    def stats(self):
+        """Subscriber counts per topic"""
+        with self._lock:
+            return {
+                'topics': {topic: len(subs) for topic, subs in self._subscribers.items()},
+                'subscriptions': len({s for subs in self._subscribers.values() for s in subs}),
+                'last_sequence': self._sequence
+            }
+
+
+# Create singleton instance
+live_update_broker = LiveUpdateBroker()
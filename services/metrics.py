@@ -0,0 +1,319 @@
+"""
+Request, SQL, RPC and inference metrics in Prometheus text format
+
+Each process keeps its own registry. Under gunicorn with several workers
+set METRICS_DIR to a directory the workers share: every worker writes a
+snapshot of its registry there at most every METRICS_FLUSH_SECONDS, and
+/metrics adds up all snapshots with the answering worker's live values,
+so a scrape sees the whole server whichever worker it lands on. Snapshots
+of exited workers are kept so counters never go backwards; gunicorn.conf.py
+empties the directory when the server starts. Without METRICS_DIR a
+scrape sees only the worker that answered it.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def merge(into, series):
+        for labels, value in series.items():
+            into[labels] = into.get(labels, 0) + value
+
+    def render(self, series=None):
+        series = self.snapshot() if series is None else series
+        for labels, value in series.items():
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        # Per-bucket counts are stored non-cumulatively so an observation
+        # is one bisect and three increments; render() does the prefix sum
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: [list(s[0]), s[1], s[2]] for labels, s in self._series.items()}
+
+    @staticmethod
+    def merge(into, series):
+        for labels, (counts, total, count) in series.items():
+            merged = into.get(labels)
+            if merged is None:
+                into[labels] = [list(counts), total, count]
+            else:
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+                merged[2] += count
+
+    def render(self, series=None):
+        series = self.snapshot() if series is None else series
+        for labels, (counts, total, count) in series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                label_str = _format_labels(self.labelnames, labels, ('le', _format_value(float(bound))))
+                yield f'{self.name}_bucket{label_str} {cumulative}'
+            label_str = _format_labels(self.labelnames, labels)
+            yield f'{self.name}_sum{label_str} {_format_value(total)}'
+            yield f'{self.name}_count{label_str} {count}'
+
+
+class MetricsRegistry:
+    """Process-local metrics, optionally summed across workers through a shared directory"""
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.directory = None
+        self.flush_seconds = 5.0
+        self._flushed_at = 0.0
+        self._pending = None
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _snapshot_path(self, pid=None):
+        return os.path.join(self.directory, f'metrics-{pid or os.getpid()}.json')
+
+    def flush(self, force=False):
+        """Write this worker's snapshot to the shared directory (throttled unless forced)"""
+        if self.directory is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._flushed_at + self.flush_seconds - now
+            if not force and wait > 0:
+                # Write the rest once the interval is up, even if no request follows
+                if self._pending is None:
+                    self._pending = threading.Timer(wait, self.flush, kwargs={'force': True})
+                    self._pending.daemon = True
+                    self._pending.start()
+                return
+            self._flushed_at = now
+            self._pending = None
+        snapshot = {
+            metric.name: [[list(labels), value] for labels, value in metric.snapshot().items()]
+            for metric in list(self._metrics.values())
+        }
+        path = self._snapshot_path()
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'w') as fh:
+                json.dump(snapshot, fh)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️  Could not write metrics snapshot: {e}")
+
+    def _collect(self):
+        """{metric name: series} for this worker plus every other worker's snapshot"""
+        collected = {metric.name: metric.snapshot() for metric in list(self._metrics.values())}
+        if self.directory is None:
+            return collected
+
+        own = os.path.basename(self._snapshot_path())
+        try:
+            names = [name for name in os.listdir(self.directory)
+                     if name.startswith('metrics-') and name.endswith('.json') and name != own]
+        except OSError:
+            names = []
+        for name in names:
+            try:
+                with open(os.path.join(self.directory, name)) as fh:
+                    snapshot = json.load(fh)
+            except (OSError, ValueError):
+                # Being replaced or removed; the next scrape picks it up
+                continue
+            for metric_name, series in snapshot.items():
+                metric = self._metrics.get(metric_name)
+                if metric is not None:
+                    metric.merge(collected[metric_name], {tuple(labels): value for labels, value in series})
+        return collected
+
+    def render(self):
+        collected = self._collect()
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.render(collected[metric.name]))
+        return '\n'.join(lines) + '\n'
+
+    def cache_access(self, cache, hit):
+        """Record a cache lookup; hit ratio = hit / (hit + miss)"""
+        cache_requests.inc(cache, 'hit' if hit else 'miss')
+
+
+# Create singleton instance
+metrics = MetricsRegistry()
+
+http_request_duration = metrics.histogram(
+    'http_request_duration_seconds', 'HTTP request latency', ('method', 'endpoint', 'status')
+)
+db_queries_per_request = metrics.histogram(
+    'db_queries_per_request', 'SQL statements executed per HTTP request', ('endpoint',),
+    buckets=COUNT_BUCKETS
+)
+db_time_per_request = metrics.histogram(
+    'db_time_per_request_seconds', 'Time spent in SQL per HTTP request', ('endpoint',)
+)
+db_query_duration = metrics.histogram(
+    'db_query_duration_seconds', 'SQL statement latency', ()
+)
+polygon_rpc_duration = metrics.histogram(
+    'polygon_rpc_duration_seconds', 'Polygon JSON-RPC call latency', ('method', 'outcome')
+)
+model_inference_duration = metrics.histogram(
+    'model_inference_duration_seconds', 'Model inference latency', ('model',)
+)
+cache_requests = metrics.counter(
+    'cache_requests_total', 'Cache lookups by cache and result', ('cache', 'result')
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    db_query_duration.observe(elapsed)
+    if has_request_context():
+        g.db_queries = g.get('db_queries', 0) + 1
+        g.db_time = g.get('db_time', 0.0) + elapsed
+
+
+def init_metrics(app):
+    """Register request timing hooks, SQL listeners and the /metrics endpoint"""
+    metrics.directory = app.config.get('METRICS_DIR') or None
+    metrics.flush_seconds = app.config.get('METRICS_FLUSH_SECONDS', 5.0)
+    if metrics.directory is not None:
+        os.makedirs(metrics.directory, exist_ok=True)
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+
+        endpoint = request.endpoint or 'unmatched'
+        http_request_duration.observe(
+            time.perf_counter() - started,
+            request.method, endpoint, str(response.status_code)
+        )
+        db_queries_per_request.observe(g.get('db_queries', 0), endpoint)
+        db_time_per_request.observe(g.get('db_time', 0.0), endpoint)
+        metrics.flush()
+        return response
+
+    @app.route('/metrics')
+    def prometheus_metrics():
+        return app.response_class(metrics.render(), content_type=MetricsRegistry.CONTENT_TYPE)
+
+    return app
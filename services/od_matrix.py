@@ -0,0 +1,241 @@
+"""
+Precomputed zone-to-zone travel-time and risk matrices
+
+Every place on the road network is a zone. For each time bucket (time of
+day x weekday) the link travel times are set from that bucket's
+congestion forecast and a vectorized Floyd-Warshall pass finds the
+fastest path between every pair of zones, carrying the path's distance
+and incident exposure along with its time. The result is one float32
+array of shape (metrics, buckets, zones, zones), under 0.5 MB for the
+Lagos network.
+
+The scheduler rebuilds it every OD_MATRIX_REFRESH_SECONDS, writes it to
+OD_MATRIX_DIR under a content-digest name and publishes a pointer to it;
+workers memory-map the file the pointer names. A many-to-many query is
+then a single fancy-indexing step, with no route search per pair.
+"""
+import hashlib
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from config import Config
+from services.data_analysis import data_analysis_service
+from services.gazetteer import gazetteer
+from services.routing import route_engine, _DISTANCE, _RISK, _TIME
+from services.time_buckets import TIMES_OF_DAY
+
+
+METRICS = ('time_min', 'distance_km', 'risk')
+
+
+def all_pairs(n, edge_from, edge_to, time, distance, risk):
+    """
+    Fastest path between every pair of nodes, with its distance and risk
+
+    Floyd-Warshall with each relaxation step applied to the whole matrix
+    at once; ties keep the path found first.
+
+    Returns:
+        numpy.ndarray: (3, n, n) time, distance and risk; inf where unreachable
+    """
+    matrix = np.full((3, n, n), np.inf)
+    matrix[:, np.arange(n), np.arange(n)] = 0.0
+    for u, v in ((edge_from, edge_to), (edge_to, edge_from)):
+        # Parallel links keep the fastest
+        for e in np.argsort(-time):
+            if time[e] < matrix[0, u[e], v[e]]:
+                matrix[:, u[e], v[e]] = (time[e], distance[e], risk[e])
+
+    for k in range(n):
+        through = matrix[:, :, k, np.newaxis] + matrix[:, np.newaxis, k, :]
+        better = through[0] < matrix[0]
+        matrix = np.where(better, through, matrix)
+    return matrix
+
+
+class ODMatrix:
+    """Zone-to-zone matrices for every time bucket, served from a memory-mapped file"""
+
+    def __init__(self):
+        self.zones = []
+        self.zone_names = []
+        self.matrix = None
+        self.version = None
+        self.source = None
+        self._resolved = {}
+        self._unreadable = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def bucket(time_of_day, weekday):
+        return TIMES_OF_DAY.index(time_of_day) * 7 + weekday
+
+    def _forecasts(self, table):
+        """{bucket: {place name: level}} from the model table or historical means"""
+        forecasts = {}
+        for time_of_day in TIMES_OF_DAY:
+            for weekday in range(7):
+                if table:
+                    forecast = {
+                        location: levels[time_of_day][weekday]
+                        for location, levels in table['table'].items() if time_of_day in levels
+                    }
+                else:
+                    forecast = data_analysis_service.congestion_by_location(time_of_day)
+                forecasts[self.bucket(time_of_day, weekday)] = forecast
+        return forecasts
+
+    def build(self, table=None, exposure=None):
+        """
+        Compute the matrices for every bucket
+
+        Args:
+            table: Model lookup table (ServingModel.lookup_table()), if any
+            exposure: route_engine.incident_exposure() result (built if omitted)
+
+        Returns:
+            numpy.ndarray: (metrics, buckets, zones, zones) float32
+        """
+        network = route_engine.network
+        if exposure is None or len(exposure['weight']) != network.n_edges:
+            exposure = route_engine.incident_exposure()
+
+        n = len(network.node_ids)
+        matrix = np.empty((len(METRICS), len(TIMES_OF_DAY) * 7, n, n), dtype=np.float32)
+        for bucket, forecast in self._forecasts(table).items():
+            costs = route_engine.link_costs(*route_engine.node_congestion(forecast), exposure)
+            matrix[:, bucket] = all_pairs(
+                n, network.edge_from, network.edge_to,
+                costs[_TIME, :-1], costs[_DISTANCE, :-1], costs[_RISK, :-1]
+            )
+        return matrix
+
+    def refresh(self, table=None, exposure=None):
+        """
+        Rebuild, write and start serving the matrices; the scheduler job
+
+        Returns:
+            dict: Pointer other workers load from ('version', 'path', ...)
+        """
+        matrix = self.build(table, exposure)
+        os.makedirs(Config.OD_MATRIX_DIR, exist_ok=True)
+        version = hashlib.sha1(matrix.tobytes()).hexdigest()[:12]
+        path = os.path.join(Config.OD_MATRIX_DIR, f'od_matrix-{version}.npy')
+        if os.path.exists(path):
+            # mtime records when the file was last published
+            os.utime(path)
+        else:
+            np.save(f'{path}.tmp.npy', matrix)
+            os.replace(f'{path}.tmp.npy', path)
+
+        # Drop files unpublished for two refresh intervals: a worker on
+        # another node may still hold the previous pointer until its next read
+        cutoff = time.time() - 2 * Config.OD_MATRIX_REFRESH_SECONDS
+        for name in os.listdir(Config.OD_MATRIX_DIR):
+            stale = os.path.join(Config.OD_MATRIX_DIR, name)
+            if name.startswith('od_matrix-') and name.endswith('.npy') and stale != path \
+                    and os.path.getmtime(stale) < cutoff:
+                os.remove(stale)
+
+        pointer = {
+            'version': version,
+            'path': path,
+            'zones': list(route_engine.network.node_ids),
+            'source': 'model' if table else 'historical',
+            'built_at': datetime.utcnow().isoformat()
+        }
+        self._serve(np.load(path, mmap_mode='r'), pointer)
+        return pointer
+
+    def _serve(self, matrix, pointer):
+        names = {place_id: gazetteer.places[place_id]['name'] if place_id in gazetteer.places else place_id
+                 for place_id in pointer['zones']}
+        with self._lock:
+            self.zones = list(pointer['zones'])
+            self.zone_names = [names[place_id] for place_id in self.zones]
+            self._resolved = {}
+            self.matrix = matrix
+            self.version = pointer['version']
+            self.source = pointer['source']
+
+    def ensure(self, pointer=None, table=None, exposure=None):
+        """
+        Serve the published matrices, or build them here if there are none
+
+        Args:
+            pointer: Published refresh() result, if any
+            table, exposure: Used only when building in-process
+        """
+        if pointer is None:
+            if self.matrix is None:
+                self._serve_local(table, exposure)
+            return
+        if pointer['version'] == self.version:
+            return
+        try:
+            matrix = np.load(pointer['path'], mmap_mode='r')
+        except OSError as e:
+            # Not on a volume this node can read. Build a local copy once
+            # and serve it under its own version, so the published file is
+            # tried again on the next call
+            if self._unreadable != pointer['version']:
+                print(f"⚠️  Could not load OD matrix {pointer['path']}: {e}")
+                self._serve_local(table, exposure)
+                self._unreadable = pointer['version']
+            return
+        self._unreadable = None
+        self._serve(matrix, pointer)
+
+    def _serve_local(self, table=None, exposure=None):
+        """Build the matrices in-process and serve them under their own digest"""
+        matrix = self.build(table, exposure)
+        self._serve(matrix, {
+            'version': hashlib.sha1(matrix.tobytes()).hexdigest()[:12],
+            'zones': list(route_engine.network.node_ids),
+            'source': 'model' if table else 'historical'
+        })
+
+    def zone(self, name):
+        """Zone index for a place name, alias or id; None if it isn't a zone"""
+        index = self._resolved.get(name)
+        if index is None:
+            place = gazetteer.resolve(name)
+            index = self.zones.index(place['id']) if place and place['id'] in self.zones else -1
+            if len(self._resolved) < 10000:
+                self._resolved[name] = index
+        return index if index >= 0 else None
+
+    def query(self, origins, destinations, time_of_day, weekday):
+        """
+        Many-to-many lookup
+
+        Args:
+            origins, destinations: Lists of zone indices
+            time_of_day: morning, afternoon, evening or night
+            weekday: 0 (Monday) to 6
+
+        Returns:
+            dict: metric -> len(origins) x len(destinations) nested list (None if unreachable)
+        """
+        block = self.matrix[:, self.bucket(time_of_day, weekday)]
+        block = block[np.ix_(range(len(METRICS)), origins, destinations)].astype(float).round(2)
+        # Unreachable pairs are null (inf is not JSON)
+        return {
+            name: [[value if np.isfinite(value) else None for value in row] for row in values.tolist()]
+            for name, values in zip(METRICS, block)
+        }
+
+
+# Create singleton instance
+od_matrix = ODMatrix()
\ No newline at end of file
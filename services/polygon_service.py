@@ -4,7 +4,10 @@ import hashlib
 import base58
 from datetime import datetime
 import os
+import re
 import sys
+import time
+from functools import lru_cache
 
 # Add parent directory to path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -13,6 +16,63 @@ if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
 from config import Config
+from services.metrics import polygon_rpc_duration
+
+
+HEX_ADDRESS = re.compile(r'^0x[0-9a-fA-F]{40}$')
+
+
+@lru_cache(maxsize=Config.ADDRESS_CACHE_SIZE)
+def _checksum(lower_address):
+    # One keccak per distinct address; keyed on the lowercase form so every
+    # spelling of an address shares the entry
+    return Web3.to_checksum_address(lower_address)
+
+
+def is_valid_address(address):
+    """
+    Validate an address, including its EIP-55 checksum when it has one
+
+    All-lowercase and all-uppercase hex carry no checksum and are accepted;
+    mixed case must match the checksum exactly.
+    """
+    if not isinstance(address, str) or not HEX_ADDRESS.match(address):
+        return False
+    digits = address[2:]
+    if digits == digits.lower() or digits == digits.upper():
+        return True
+    return _checksum(address.lower()) == address
+
+
+def normalize_address(address):
+    """Canonical stored form (lowercase 0x-hex), or None if invalid"""
+    if isinstance(address, str):
+        address = address.strip()
+        if address[:2] == '0X':
+            address = '0x' + address[2:]
+    if not is_valid_address(address):
+        return None
+    return address.lower()
+
+
+def checksum_address(address):
+    """EIP-55 display form of a valid address (memoized)"""
+    return _checksum(address.lower())
+
+
+class TimedHTTPProvider(Web3.HTTPProvider):
+    """HTTP provider that records per-method RPC latency"""
+
+    def make_request(self, method, params):
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            response = super().make_request(method, params)
+            if 'error' not in response:
+                outcome = 'ok'
+            return response
+        finally:
+            polygon_rpc_duration.observe(time.perf_counter() - started, method, outcome)
 
 
 class PolygonService:
@@ -27,7 +87,11 @@ class PolygonService:
 
         # Initialize Web3
         try:
-            self.w3 = Web3(Web3.HTTPProvider(self.rpc_url))
+            # Bounded timeout so a stalled RPC node can't pin a worker thread
+            self.w3 = Web3(TimedHTTPProvider(
+                self.rpc_url,
+                request_kwargs={'timeout': Config.POLYGON_RPC_TIMEOUT}
+            ))
             if self.w3.is_connected():
                 print(f"✅ Connected to Polygon ({self.network})")
             else:
@@ -197,7 +261,10 @@ class PolygonService:
             tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
 
             # Wait for receipt
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            receipt = self.w3.eth.wait_for_transaction_receipt(
+                tx_hash,
+                timeout=Config.POLYGON_RECEIPT_TIMEOUT
+            )
 
             return self.w3.to_hex(tx_hash)
 
@@ -205,6 +272,67 @@ class PolygonService:
             print(f"On-chain registration error: {e}")
             return None
 
+    def anchor_root(self, merkle_root):
+        """
+        Anchor a Merkle root of driver attestations on chain
+
+        The root is sent as the calldata of a zero-value transaction to the
+        service's own account: ~21k gas plus calldata for a whole batch,
+        instead of a 200k-gas contract call per driver.
+
+        Args:
+            merkle_root (str): 0x-prefixed 32-byte root
+
+        Returns:
+            dict: Anchoring result with transaction hash
+        """
+        try:
+            if self.w3 and self.private_key:
+                account = self.w3.eth.account.from_key(self.private_key)
+                transaction = {
+                    'to': account.address,
+                    'value': 0,
+                    'data': merkle_root,
+                    'nonce': self.w3.eth.get_transaction_count(account.address),
+                    'gas': Config.ATTESTATION_ANCHOR_GAS,
+                    'gasPrice': self.w3.eth.gas_price,
+                    'chainId': self.chain_id
+                }
+                signed_txn = self.w3.eth.account.sign_transaction(transaction, self.private_key)
+                tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+                receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=Config.POLYGON_RECEIPT_TIMEOUT)
+                if receipt.status != 1:
+                    # Mined but reverted: the root is not on chain
+                    return {
+                        'success': False,
+                        'transaction_hash': self.w3.to_hex(tx_hash),
+                        'error': 'Anchoring transaction reverted'
+                    }
+
+                return {
+                    'success': True,
+                    'transaction_hash': self.w3.to_hex(tx_hash),
+                    'network': self.network,
+                    'explorer_url': f"https://mumbai.polygonscan.com/tx/{self.w3.to_hex(tx_hash)}"
+                }
+
+            # Fallback to mock anchoring
+            mock_tx_hash = self._create_mock_tx_hash({'merkle_root': merkle_root})
+            return {
+                'success': True,
+                'transaction_hash': mock_tx_hash,
+                'network': self.network,
+                'explorer_url': f"https://mumbai.polygonscan.com/tx/{mock_tx_hash}",
+                'note': 'Demo anchoring (no signing key configured)'
+            }
+
+        except Exception as e:
+            print(f"Anchoring error: {e}")
+            return {
+                'success': False,
+                'error': f'Anchoring failed: {str(e)}'
+            }
+
     def verify_driver(self, wallet_address):
         """
         Verify driver on Polygon blockchain
@@ -232,7 +360,7 @@ class PolygonService:
             if self.contract:
                 try:
                     driver_data = self.contract.functions.getDriver(
-                        Web3.to_checksum_address(wallet_address)
+                        checksum_address(wallet_address)
                     ).call()
 
                     return {
@@ -281,7 +409,7 @@ class PolygonService:
                     'note': 'Demo balance'
                 }
 
-            balance_wei = self.w3.eth.get_balance(Web3.to_checksum_address(wallet_address))
+            balance_wei = self.w3.eth.get_balance(checksum_address(wallet_address))
             balance_matic = self.w3.from_wei(balance_wei, 'ether')
 
             return {
@@ -331,21 +459,8 @@ class PolygonService:
             }
 
     def _is_valid_address(self, address):
-        """Validate Polygon/Ethereum address"""
-        try:
-            if not address or not isinstance(address, str):
-                return False
-
-            # Must start with 0x and be 42 characters
-            if not address.startswith('0x') or len(address) != 42:
-                return False
-
-            # Check if valid hex
-            int(address, 16)
-            return True
-
-        except:
-            return False
+        """Validate Polygon/Ethereum address (format and EIP-55 checksum)"""
+        return is_valid_address(address)
 
     def _create_mock_tx_hash(self, data):
         """Create mock transaction hash"""
@@ -0,0 +1,398 @@
+"""
+Sliding-window congestion from GPS probe pings and sensor counts
+
+Each road segment owns a ring of time slots (SLOT_SECONDS wide, enough of
+them to cover WINDOW_SECONDS). The rings for all segments live in a few
+2-D NumPy arrays, so a batch of pings is added with np.add.at in one
+vectorized step: a slot whose epoch is stale is cleared the moment a
+newer ping lands in it, and reads simply ignore slots older than the
+window. Updates are O(1) per ping with no per-segment Python objects.
+
+Snapshots (average speed, volume and congestion level per segment) are
+recomputed at most every SNAPSHOT_SECONDS and handed to the route engine;
+segments whose congestion level changed are pushed to live subscribers.
+
+Pings on known segments are also buffered and appended to the time-series
+store (services.timeseries) every PROBE_PERSIST_SECONDS, so the history
+endpoints cover live traffic. Each worker writes its own pings; a buffer
+not yet written is lost if the worker exits.
+"""
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from config import Config
+from services.gazetteer import gazetteer
+from services.live_updates import live_update_broker
+from services.timeseries import timeseries_store
+
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def _is_number(value):
+    # bool is an int subclass but never a measurement
+    return type(value) in (int, float) and np.isfinite(value)
+
+
+def ping_error(ping):
+    """Why a ping can't be ingested, or None if it is well formed"""
+    speed = ping.get('speed_kmh')
+    if speed is not None and not (_is_number(speed) and 0 <= speed <= Config.PROBE_MAX_SPEED_KMH):
+        return f'speed_kmh must be between 0 and {Config.PROBE_MAX_SPEED_KMH:g}'
+    count = ping.get('count', 1)
+    if type(count) is not int or not 0 <= count <= Config.PROBE_MAX_COUNT:
+        return f'count must be an integer between 0 and {Config.PROBE_MAX_COUNT}'
+    for field in ('timestamp', 'lat', 'lng'):
+        if ping.get(field) is not None and not _is_number(ping[field]):
+            return f'{field} must be a number'
+    return None
+
+
+class SegmentIndex:
+    """Maps segment ids, names and coordinates onto dense row numbers"""
+
+    MAX_NAMES = 10000
+
+    def __init__(self):
+        self.ids = []
+        self._rows = {}
+        self._names = {}
+        self._coords = np.empty((0, 2))
+        self._coord_rows = np.empty(0, dtype=np.int64)
+
+    def load_places(self, places):
+        """Use gazetteer places as segments and snapping targets"""
+        self._coords = np.radians([
+            (place['coordinates']['lat'], place['coordinates']['lng']) for place in places
+        ]).reshape(-1, 2)
+        self._coord_rows = np.array([self.row(place['id']) for place in places], dtype=np.int64)
+
+    def row(self, segment_id):
+        row = self._rows.get(segment_id)
+        if row is None:
+            row = self._rows[segment_id] = len(self.ids)
+            self.ids.append(segment_id)
+        return row
+
+    def lookup(self, segment):
+        """Row for a segment id or free-text place name, -1 if unknown"""
+        row = self._rows.get(segment)
+        if row is not None:
+            return row
+        row = self._names.get(segment)
+        if row is None:
+            place = gazetteer.resolve(segment)
+            row = self._rows.get(place['id'], -1) if place else -1
+            # Names come from clients; don't let junk grow the cache forever
+            if len(self._names) < self.MAX_NAMES:
+                self._names[segment] = row
+        return row
+
+    def snap(self, lats, lngs, radius_km):
+        """Nearest known segment for each coordinate, or -1 beyond radius_km"""
+        if not len(self._coord_rows) or not len(lats):
+            return np.full(len(lats), -1, dtype=np.int64)
+        lat = np.radians(np.asarray(lats, dtype=float))[:, np.newaxis]
+        lng = np.radians(np.asarray(lngs, dtype=float))[:, np.newaxis]
+        # Haversine against every segment; the place list is small
+        a = (
+            np.sin((self._coords[:, 0] - lat) / 2) ** 2
+            + np.cos(lat) * np.cos(self._coords[:, 0]) * np.sin((self._coords[:, 1] - lng) / 2) ** 2
+        )
+        distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+        nearest = distance.argmin(axis=1)
+        within = distance[np.arange(len(nearest)), nearest] <= radius_km
+        return np.where(within, self._coord_rows[nearest], -1)
+
+
+class SlidingWindowAggregator:
+    """Per-segment ring buffers of speed and volume over a sliding window"""
+
+    def __init__(self, window_seconds=None, slot_seconds=None, free_flow_kmh=None):
+        self.slot_seconds = slot_seconds or Config.PROBE_SLOT_SECONDS
+        self.window_seconds = window_seconds or Config.PROBE_WINDOW_SECONDS
+        self.free_flow_kmh = free_flow_kmh or Config.PROBE_FREE_FLOW_KMH
+        self.n_slots = max(1, int(np.ceil(self.window_seconds / self.slot_seconds)))
+        self._lock = threading.Lock()
+        self._allocate(64)
+
+    def _allocate(self, capacity):
+        shape = (capacity, self.n_slots)
+        old = getattr(self, '_epoch', None)
+        arrays = {
+            '_epoch': np.full(shape, -1, dtype=np.int64),
+            '_speed_sum': np.zeros(shape),
+            '_speed_count': np.zeros(shape, dtype=np.int64),
+            '_volume': np.zeros(shape, dtype=np.int64)
+        }
+        if old is not None:
+            for name, array in arrays.items():
+                array[:old.shape[0]] = getattr(self, name)
+        for name, array in arrays.items():
+            setattr(self, name, array)
+
+    def add(self, rows, timestamps, speeds, volumes, now=None):
+        """
+        Add a batch of observations
+
+        Args:
+            rows: Segment row per observation
+            timestamps: Epoch seconds per observation
+            speeds: Speed in km/h (NaN for count-only sensors)
+            volumes: Vehicles counted (1 for a probe ping)
+            now: Current time, pings older than the window are dropped
+
+        Returns:
+            int: Observations accepted
+        """
+        now = time.time() if now is None else now
+        rows = np.asarray(rows, dtype=np.int64)
+        slot = (np.asarray(timestamps, dtype=float) // self.slot_seconds).astype(np.int64)
+        now_slot = int(now // self.slot_seconds)
+        keep = (rows >= 0) & (slot > now_slot - self.n_slots) & (slot <= now_slot)
+        rows, slot = rows[keep], slot[keep]
+        speeds = np.asarray(speeds, dtype=float)[keep]
+        volumes = np.asarray(volumes, dtype=np.int64)[keep]
+        if not rows.size:
+            return 0
+
+        with self._lock:
+            if rows.max() >= self._epoch.shape[0]:
+                self._allocate(max(self._epoch.shape[0] * 2, int(rows.max()) + 1))
+
+            cells = rows * self.n_slots + slot % self.n_slots
+            epoch = self._epoch.reshape(-1)
+            previous = epoch[cells]
+            np.maximum.at(epoch, cells, slot)
+
+            # A slot reused for a newer period starts from zero
+            stale = cells[epoch[cells] > previous]
+            self._speed_sum.reshape(-1)[stale] = 0.0
+            self._speed_count.reshape(-1)[stale] = 0
+            self._volume.reshape(-1)[stale] = 0
+
+            current = slot == epoch[cells]
+            has_speed = current & ~np.isnan(speeds)
+            np.add.at(self._speed_sum.reshape(-1), cells[has_speed], speeds[has_speed])
+            np.add.at(self._speed_count.reshape(-1), cells[has_speed], 1)
+            np.add.at(self._volume.reshape(-1), cells[current], volumes[current])
+            return int(current.sum())
+
+    def window(self, n_segments, now=None):
+        """Window totals per segment: (speed_sum, speed_count, volume)"""
+        now = time.time() if now is None else now
+        now_slot = int(now // self.slot_seconds)
+        with self._lock:
+            live = self._epoch[:n_segments] > now_slot - self.n_slots
+            speed_sum = np.where(live, self._speed_sum[:n_segments], 0.0).sum(axis=1)
+            speed_count = np.where(live, self._speed_count[:n_segments], 0).sum(axis=1)
+            volume = np.where(live, self._volume[:n_segments], 0).sum(axis=1)
+        return speed_sum, speed_count, volume
+
+    def congestion_level(self, avg_speed):
+        """1 (free flow) to 10 (standstill) from average speed"""
+        ratio = np.clip(1 - avg_speed / self.free_flow_kmh, 0, 1)
+        return np.clip(np.round(ratio * 10), 1, 10).astype(np.int64)
+
+
+class ProbeFeed:
+    """Ingests probe pings and sensor counts, keeps a fresh congestion snapshot"""
+
+    def __init__(self):
+        self.segments = SegmentIndex()
+        self.aggregator = SlidingWindowAggregator()
+        self._snapshot = {}
+        self._snapshot_at = 0.0
+        self._published = {}
+        self._snapshot_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+        self._unsaved = []
+        self._persisted_at = 0.0
+        self._persist_lock = threading.Lock()
+
+    def load_segments(self, places=None):
+        places = places if places is not None else [gazetteer.public(pid) for pid in gazetteer.places]
+        self.segments.load_places(places)
+        return len(self.segments.ids)
+
+    def _segment_rows(self, observations):
+        """Segment row per observation from segment ids/names or coordinates"""
+        rows = np.full(len(observations), -1, dtype=np.int64)
+        to_snap = []
+        for i, item in enumerate(observations):
+            segment = item.get('segment_id') or item.get('segment')
+            if segment is not None:
+                rows[i] = self.segments.lookup(segment)
+            elif item.get('lat') is not None and item.get('lng') is not None:
+                to_snap.append(i)
+
+        if to_snap:
+            rows[to_snap] = self.segments.snap(
+                [observations[i]['lat'] for i in to_snap],
+                [observations[i]['lng'] for i in to_snap],
+                Config.PROBE_SNAP_RADIUS_KM
+            )
+        return rows
+
+    def ingest(self, observations, now=None):
+        """
+        Ingest a batch of probe pings / sensor counts
+
+        Args:
+            observations: Dicts with segment_id (or lat/lng), speed_kmh
+                and/or count, and an optional epoch timestamp, each
+                passing ping_error()
+            now: Current epoch time (defaults to time.time())
+
+        Returns:
+            dict: Accepted and rejected counts
+        """
+        now = time.time() if now is None else now
+        rows = self._segment_rows(observations)
+        timestamps = np.fromiter(
+            (item['timestamp'] if item.get('timestamp') is not None else now for item in observations),
+            float, len(observations)
+        )
+        speeds = np.fromiter(
+            (item['speed_kmh'] if item.get('speed_kmh') is not None else np.nan for item in observations),
+            float, len(observations)
+        )
+        volumes = np.fromiter((item.get('count', 1) for item in observations), np.int64, len(observations))
+
+        accepted = self.aggregator.add(rows, timestamps, speeds, volumes, now)
+        with self._counter_lock:
+            self.accepted += accepted
+            self.rejected += len(observations) - accepted
+
+        if Config.PROBE_PERSIST_SECONDS:
+            # History takes late pings too, just not ones from the future
+            known = (rows >= 0) & (timestamps <= now)
+            if known.any():
+                with self._persist_lock:
+                    self._unsaved.append((rows[known], timestamps[known], speeds[known], volumes[known]))
+            if now - self._persisted_at >= Config.PROBE_PERSIST_SECONDS:
+                self.persist(now)
+
+        if now - self._snapshot_at >= Config.PROBE_SNAPSHOT_SECONDS:
+            self.snapshot(now)
+        return {'accepted': accepted, 'rejected': len(observations) - accepted}
+
+    def persist(self, now=None):
+        """
+        Append buffered pings to the time-series store
+
+        Returns:
+            int: Minute rows written
+        """
+        with self._persist_lock:
+            unsaved, self._unsaved = self._unsaved, []
+            self._persisted_at = time.time() if now is None else now
+        if not unsaved:
+            return 0
+
+        rows, timestamps, speeds, volumes = (np.concatenate(parts) for parts in zip(*unsaved))
+        ids = np.array([
+            gazetteer.places[segment_id]['name'] if segment_id in gazetteer.places else segment_id
+            for segment_id in self.segments.ids
+        ], dtype=object)
+        try:
+            return timeseries_store.append(pd.DataFrame({
+                'timestamp': pd.to_datetime(timestamps, unit='s'),
+                'location': ids[rows],
+                'avg_speed_kmh': speeds,
+                'road_users': volumes
+            }))['rows']
+        except Exception as e:
+            print(f"⚠️  Could not persist probe pings: {e}")
+            return 0
+
+    def snapshot(self, now=None):
+        """
+        Current congestion per segment with observations in the window
+
+        Recomputed at most every PROBE_SNAPSHOT_SECONDS; changed
+        congestion levels are published to live subscribers.
+
+        Returns:
+            dict: segment_id -> {avg_speed_kmh, volume, congestion_level, ...}
+        """
+        now = time.time() if now is None else now
+        if now - self._snapshot_at < Config.PROBE_SNAPSHOT_SECONDS:
+            return self._snapshot
+
+        with self._snapshot_lock:
+            if now - self._snapshot_at < Config.PROBE_SNAPSHOT_SECONDS:
+                return self._snapshot
+
+            n_segments = len(self.segments.ids)
+            speed_sum, speed_count, volume = self.aggregator.window(n_segments, now)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                avg_speed = speed_sum / speed_count
+            levels = self.aggregator.congestion_level(np.nan_to_num(avg_speed, nan=self.aggregator.free_flow_kmh))
+
+            snapshot = {}
+            for row in np.flatnonzero((speed_count > 0) | (volume > 0)):
+                snapshot[self.segments.ids[row]] = {
+                    'avg_speed_kmh': round(float(avg_speed[row]), 1) if speed_count[row] else None,
+                    'probes': int(speed_count[row]),
+                    'volume': int(volume[row]),
+                    'congestion_level': int(levels[row]) if speed_count[row] else None,
+                    'window_seconds': self.aggregator.window_seconds
+                }
+
+            self._snapshot = snapshot
+            self._snapshot_at = now
+            self._publish_changes(snapshot, now)
+        return snapshot
+
+    def _publish_changes(self, snapshot, now):
+        for segment_id, state in snapshot.items():
+            level = state['congestion_level']
+            if level is not None and self._published.get(segment_id) != level:
+                self._published[segment_id] = level
+                live_update_broker.publish(segment_id, 'congestion', {
+                    'segment_id': segment_id,
+                    **state,
+                    'as_of': now
+                })
+
+    def route_congestion(self, *segment_ids):
+        """Mean live congestion over the given segments, or None without data"""
+        snapshot = self.snapshot()
+        states = [snapshot.get(s) for s in segment_ids if s]
+        levels = [s['congestion_level'] for s in states if s and s['congestion_level'] is not None]
+        speeds = [s['avg_speed_kmh'] for s in states if s and s['avg_speed_kmh'] is not None]
+        if not levels:
+            return None
+        return {
+            'congestion_level': round(sum(levels) / len(levels), 1),
+            'avg_speed_kmh': round(sum(speeds) / len(speeds), 1),
+            'segments': {s: snapshot.get(s) for s in segment_ids if s}
+        }
+
+    def stats(self):
+        return {
+            'segments': len(self.segments.ids),
+            'live_segments': len(self._snapshot),
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'snapshot_age_seconds': round(time.time() - self._snapshot_at, 3) if self._snapshot_at else None
+        }
+
+
+# Create singleton instance
+probe_feed = ProbeFeed()
+probe_feed.load_segments()
\ No newline at end of file
@@ -0,0 +1,245 @@
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask import g, request
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from config import Config
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    # Trim to the package-relative part so stacks are readable
+    for marker in ('site-packages/', 'lib/python'):
+        index = filename.rfind(marker)
+        if index != -1:
+            filename = filename[index + len(marker):]
+            break
+    else:
+        filename = filename.rsplit('/', 2)[-1] if '/' in filename else filename
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+class ProfileSession:
+    """One sampling run, aggregated as folded stacks"""
+
+    def __init__(self, interval, max_seconds, thread_ids=None, label=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.thread_ids = thread_ids
+        self.stacks = {}
+        self.samples = 0
+        self.truncated = 0
+        self.started_at = time.time()
+        self.finished_at = None
+        self._stop = threading.Event()
+        self._thread = None
+        # Guards stacks against readers while the sampler thread writes
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name=f'profiler-{self.id}', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        if self.finished_at is None:
+            self.finished_at = time.time()
+        return self
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + self.max_seconds
+        max_stacks = Config.PROFILER_MAX_STACKS
+
+        while not self._stop.wait(self.interval):
+            if time.monotonic() >= deadline:
+                break
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack = ';'.join(reversed(labels))
+
+                with self._lock:
+                    if stack in self.stacks:
+                        self.stacks[stack] += 1
+                    elif len(self.stacks) < max_stacks:
+                        self.stacks[stack] = 1
+                    else:
+                        self.truncated += 1
+                    self.samples += 1
+
+        self.finished_at = time.time()
+
+    def snapshot(self):
+        """Copy of the stack counts, safe to take while sampling"""
+        with self._lock:
+            return dict(self.stacks)
+
+    def folded(self):
+        """Folded stacks, one 'frame;frame;frame count' per line (flamegraph.pl / speedscope)"""
+        return '\n'.join(
+            f'{stack} {count}'
+            for stack, count in sorted(self.snapshot().items(), key=lambda item: -item[1])
+        ) + '\n'
+
+    def summary(self):
+        return {
+            'id': self.id,
+            'label': self.label,
+            'running': self.running,
+            'interval_ms': round(self.interval * 1000, 3),
+            'samples': self.samples,
+            'unique_stacks': len(self.snapshot()),
+            'truncated_samples': self.truncated,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class SamplingProfiler:
+    """
+    Opt-in sampling profiler for production workers
+
+    A daemon thread snapshots sys._current_frames() at a fixed interval, so
+    profiled code runs unmodified. Safeguards: disabled unless
+    PROFILER_ENABLED, every session has a hard time limit, only one
+    process-wide session and a bounded number of per-request sessions run
+    at once, and the number of distinct stacks kept is capped.
+
+    Per-request profiling samples only the request's OS thread, so it needs
+    sync or gthread workers (greenlets share one thread under gevent).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._process_session = None
+        self._active_requests = 0
+        self._finished = OrderedDict()
+
+    @property
+    def enabled(self):
+        return Config.PROFILER_ENABLED
+
+    def _clamp(self, interval, max_seconds):
+        interval = max(float(interval or Config.PROFILER_INTERVAL), Config.PROFILER_MIN_INTERVAL)
+        max_seconds = min(float(max_seconds or Config.PROFILER_MAX_SECONDS), Config.PROFILER_MAX_SECONDS)
+        return interval, max_seconds
+
+    def _keep(self, session):
+        self._finished[session.id] = session
+        while len(self._finished) > Config.PROFILER_KEEP_PROFILES:
+            self._finished.popitem(last=False)
+
+    def start(self, interval=None, max_seconds=None):
+        """Start a process-wide session; returns None if one is running"""
+        if not self.enabled:
+            return None
+        interval, max_seconds = self._clamp(interval, max_seconds)
+        with self._lock:
+            if self._process_session is not None and self._process_session.running:
+                return None
+            session = ProfileSession(interval, max_seconds, label='process')
+            self._process_session = session
+            self._keep(session)
+        return session.start()
+
+    def stop(self):
+        """Stop the process-wide session"""
+        with self._lock:
+            session = self._process_session
+            self._process_session = None
+        return session.stop() if session is not None else None
+
+    def start_request(self, label):
+        """Start a session sampling only the calling thread"""
+        if not self.enabled:
+            return None
+        interval, max_seconds = self._clamp(None, None)
+        with self._lock:
+            if self._active_requests >= Config.PROFILER_MAX_CONCURRENT_REQUESTS:
+                return None
+            self._active_requests += 1
+        session = ProfileSession(interval, max_seconds, {threading.get_ident()}, label=label)
+        return session.start()
+
+    def finish_request(self, session):
+        session.stop()
+        with self._lock:
+            self._active_requests -= 1
+            self._keep(session)
+        return session
+
+    def get(self, session_id):
+        return self._finished.get(session_id)
+
+    def status(self):
+        with self._lock:
+            process = self._process_session
+            return {
+                'enabled': self.enabled,
+                'process_session': process.summary() if process else None,
+                'active_request_sessions': self._active_requests,
+                'profiles': [s.summary() for s in reversed(self._finished.values())]
+            }
+
+
+# Create singleton instance
+profiler = SamplingProfiler()
+
+
+def init_profiler(app):
+    """Profile individual requests that carry a valid X-Profile token"""
+    @app.before_request
+    def start_request_profile():
+        token = request.headers.get('X-Profile')
+        if not token or not profiler.enabled or not Config.ADMIN_TOKEN \
+                or not hmac.compare_digest(token.encode(), Config.ADMIN_TOKEN.encode()):
+            return None
+        g.profile_session = profiler.start_request(f'{request.method} {request.path}')
+
+    @app.after_request
+    def add_profile_id(response):
+        session = g.get('profile_session')
+        if session is not None:
+            response.headers['X-Profile-Id'] = session.id
+        return response
+
+    # Teardown runs even when the view raises, so the slot is always released
+    @app.teardown_request
+    def finish_request_profile(exc):
+        session = g.pop('profile_session', None)
+        if session is not None:
+            profiler.finish_request(session)
+
+    return app
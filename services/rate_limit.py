@@ -0,0 +1,244 @@
+"""
+Admission control: per-client token buckets and priority load shedding
+
+Every request is put in a priority class by path:
+
+    critical   /api/verify/*   roadside checkpoint lookups
+    normal     everything else under /api
+    bulk       probe ingestion, the live stream and admin exports
+
+Each (class, client) pair has a token bucket (RATE_LIMIT_ENABLED). A
+client is its X-API-Key when that is one of API_KEYS, otherwise its
+address (the real client address when PROXY_FIX_HOPS is set).
+
+Independently, the shedder watches queue delay and requests in flight.
+Queue delay comes from X-Request-Start, believed only from
+TRUSTED_PROXIES and capped at SHED_MAX_QUEUE_DELAY_FACTOR x the target;
+the estimate decays with time, not only with traffic. Under pressure it
+turns away bulk first, then normal, while critical requests keep a
+reserved share of the worker's capacity and are never shed for queue
+delay. Streams are shed only when they open: they run for minutes or
+hours, so they don't count as in flight.
+"""
+import os
+import sys
+import threading
+import time
+
+from flask import g, jsonify, request
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from config import Config
+from services.metrics import metrics
+from services.state_backend import state_backend
+
+
+CRITICAL = 'critical'
+NORMAL = 'normal'
+BULK = 'bulk'
+
+# Pressure above which each class is shed (critical never is)
+SHED_THRESHOLDS = {BULK: 1.0, NORMAL: 1.5}
+
+BULK_PATHS = ('/api/predict/probes', '/api/predict/stream', '/api/admin/export/')
+# Long-lived responses: admitted or shed when they open, never held in flight
+STREAM_PATHS = ('/api/predict/stream', '/api/admin/export/')
+# Admin endpoints other than exports skip admission control
+EXEMPT_PATHS = ('/health', '/metrics', '/api/admin/')
+
+admission_rejections = metrics.counter(
+    'admission_rejections_total', 'Requests refused by admission control', ('priority', 'reason')
+)
+
+
+def _parse_rate(value, default):
+    """'rate/burst' (tokens per second / capacity)"""
+    try:
+        rate, burst = (value or default).split('/')
+        return float(rate), float(burst)
+    except ValueError:
+        rate, burst = default.split('/')
+        return float(rate), float(burst)
+
+
+def priority_for(path):
+    if path.startswith('/api/verify/'):
+        return CRITICAL
+    if path.startswith(BULK_PATHS):
+        return BULK
+    return NORMAL
+
+
+def client_id():
+    # Unknown keys would let a client mint a fresh bucket per request
+    api_key = request.headers.get('X-API-Key')
+    if api_key and api_key in Config.API_KEYS:
+        return f'key:{api_key}'
+    return f'ip:{request.remote_addr}'
+
+
+def _peer_addr():
+    """Address of the host that connected to us (before ProxyFix rewrote it)"""
+    return request.environ.get('werkzeug.proxy_fix.orig', request.environ).get('REMOTE_ADDR')
+
+
+def _queue_delay():
+    """Seconds the request waited before reaching us, from a trusted proxy's X-Request-Start"""
+    if _peer_addr() not in Config.TRUSTED_PROXIES:
+        return None
+    header = request.headers.get('X-Request-Start', '')
+    try:
+        started = float(header.split('=')[-1])
+    except ValueError:
+        return None
+    # Proxies send seconds, milliseconds or microseconds since the epoch
+    while started > 1e11:
+        started /= 1000.0
+    # A skewed clock or a bad header must not pin the shedder for minutes
+    return min(max(0.0, time.time() - started), Config.SHED_TARGET_DELAY * Config.SHED_MAX_QUEUE_DELAY_FACTOR)
+
+
+class LoadShedder:
+    """Tracks queue delay and concurrency; decides which classes to shed"""
+
+    EWMA_WEIGHT = 0.2
+    # Seconds for the delay estimate to halve with no fresh samples
+    DELAY_HALF_LIFE = 1.0
+
+    def __init__(self, max_in_flight=None, reserved_critical=None, target_delay=None):
+        self.max_in_flight = max_in_flight or Config.SHED_MAX_IN_FLIGHT
+        self.reserved_critical = reserved_critical if reserved_critical is not None \
+            else Config.SHED_RESERVED_CRITICAL
+        self.target_delay = target_delay or Config.SHED_TARGET_DELAY
+        self.in_flight = 0
+        self.delay_ewma = 0.0
+        self._decayed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _decay(self):
+        now = time.monotonic()
+        self.delay_ewma *= 0.5 ** ((now - self._decayed_at) / self.DELAY_HALF_LIFE)
+        self._decayed_at = now
+
+    @property
+    def pressure(self):
+        """1.0 means at target delay or at the non-critical concurrency limit"""
+        shared = max(1, self.max_in_flight - self.reserved_critical)
+        return max(self.delay_ewma / self.target_delay, self.in_flight / shared)
+
+    def admit(self, priority, queue_delay=None, reserve=True):
+        """
+        Decide whether to serve a request
+
+        Args:
+            reserve: Hold an in-flight slot until release(); streams pass False
+
+        Returns:
+            bool: False if the request should be shed
+        """
+        with self._lock:
+            self._decay()
+            if queue_delay is not None:
+                self.delay_ewma += self.EWMA_WEIGHT * (queue_delay - self.delay_ewma)
+
+            if priority == CRITICAL:
+                admitted = self.in_flight < self.max_in_flight
+            else:
+                # Leave reserved_critical slots free for verification lookups
+                within_share = self.in_flight < self.max_in_flight - self.reserved_critical
+                admitted = within_share and self.pressure <= SHED_THRESHOLDS[priority]
+
+            if admitted and reserve:
+                self.in_flight += 1
+            return admitted
+
+    def release(self, queue_delay=None):
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._decay()
+            # Decay towards zero when the proxy sends no timing header
+            if queue_delay is None:
+                self.delay_ewma *= 1 - self.EWMA_WEIGHT
+
+    def status(self):
+        with self._lock:
+            self._decay()
+        return {
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'reserved_critical': self.reserved_critical,
+            'queue_delay_ewma_ms': round(self.delay_ewma * 1000, 2),
+            'pressure': round(self.pressure, 3)
+        }
+
+
+# Create singleton instance
+load_shedder = LoadShedder()
+
+
+def _reject(status, priority, reason, message, retry_after):
+    admission_rejections.inc(priority, reason)
+    response = jsonify({
+        'success': False,
+        'error': message
+    })
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return response
+
+
+def init_rate_limiting(app):
+    """Token-bucket rate limits and priority load shedding for /api"""
+    limits = {
+        CRITICAL: _parse_rate(Config.RATE_LIMIT_CRITICAL, '20/40'),
+        NORMAL: _parse_rate(Config.RATE_LIMIT_NORMAL, '10/20'),
+        BULK: _parse_rate(Config.RATE_LIMIT_BULK, '5/10')
+    }
+
+    @app.before_request
+    def admit_request():
+        if request.method == 'OPTIONS':
+            return None
+        path = request.path
+        streaming = path.startswith(STREAM_PATHS)
+        if not path.startswith('/api/') or (path.startswith(EXEMPT_PATHS) and not streaming):
+            return None
+
+        priority = priority_for(path)
+        if Config.RATE_LIMIT_ENABLED:
+            rate, burst = limits[priority]
+            allowed, remaining, retry_after = state_backend.take_tokens(f'{priority}:{client_id()}', rate, burst)
+            g.rate_limit = (priority, burst, remaining)
+            if not allowed:
+                return _reject(429, priority, 'rate_limited', 'Rate limit exceeded', retry_after)
+
+        if not Config.SHED_ENABLED:
+            return None
+        queue_delay = _queue_delay()
+        if not load_shedder.admit(priority, queue_delay, reserve=not streaming):
+            return _reject(503, priority, 'shed', 'Server busy, retry shortly', 1)
+        if not streaming:
+            g.admission = {'queue_delay': queue_delay}
+
+    @app.after_request
+    def add_rate_limit_headers(response):
+        limit = g.get('rate_limit')
+        if limit is not None:
+            priority, burst, remaining = limit
+            response.headers['X-RateLimit-Limit'] = str(int(burst))
+            response.headers['X-RateLimit-Remaining'] = str(int(remaining))
+            response.headers['X-Priority'] = priority
+        return response
+
+    @app.teardown_request
+    def release_slot(exc):
+        admission = g.pop('admission', None)
+        if admission is not None:
+            load_shedder.release(admission['queue_delay'])
+
+    return app
\ No newline at end of file
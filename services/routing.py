@@ -0,0 +1,543 @@
+"""
+Multi-objective route engine over the Lagos road graph
+
+The road graph (ROAD_NETWORK_PATH) links gazetteer places. For a trip the
+engine takes the k loopless shortest paths by free-flow time (Yen's
+algorithm, cached per origin and destination since the graph is static)
+and scores them all at once: the paths are padded into a k x max_links
+matrix of link indices, and per-link travel time, incident exposure and
+congestion are gathered through it and summed along each row. Every
+objective is min-max normalised across the candidates, and one matrix
+product with the profile weight table scores every candidate under every
+profile, so fastest, safest and balanced all come out of the same search.
+
+Travel time on a link slows with the congestion expected at its ends (the
+served model's forecast or the historical mean, overridden by live probe
+levels). Incident exposure is the severity-weighted number of incidents
+within INCIDENT_BUFFER_KM of the link, found through a grid index over
+the last INCIDENT_WINDOW_DAYS of TrafficIncident rows.
+"""
+import heapq
+import json
+import math
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from config import Config
+from models import db, TrafficIncident
+from services.gazetteer import gazetteer
+from services.synthetic_data import generate_incidents
+
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.195
+
+SEVERITY_WEIGHTS = {'minor': 1.0, 'moderate': 2.0, 'severe': 4.0, 'fatal': 8.0}
+DEFAULT_CONGESTION = 5.0
+# Used when no incident has been recorded yet, like the sample traffic data
+SAMPLE_INCIDENTS = 2000
+
+OBJECTIVES = ('time', 'risk', 'congestion')
+# Weight of each objective (in OBJECTIVES order) per profile
+PROFILES = {
+    'fastest': (1.0, 0.05, 0.0),
+    'safest': (0.15, 1.0, 0.1),
+    'balanced': (0.5, 0.35, 0.15),
+}
+
+# Rows of the per-link cost matrix
+_DISTANCE, _TIME, _RISK, _COUNT, _LEVEL_KM, _OBSERVED_KM = range(6)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _project(lats, lngs):
+    """Equirectangular km around Lagos; good to well under 1% across the city"""
+    scale = math.cos(math.radians(6.5))
+    return (np.asarray(lngs, dtype=float) * KM_PER_DEGREE * scale,
+            np.asarray(lats, dtype=float) * KM_PER_DEGREE)
+
+
+def congestion_speed_factor(level):
+    """Share of free-flow speed left at a congestion level (1 free flowing, 10 jammed)"""
+    return np.clip(1.0 - 0.08 * (np.asarray(level, dtype=float) - 1.0), 0.25, 1.0)
+
+
+def profile_weights(profile='balanced', weights=None):
+    """
+    Objective weights for a profile, or for caller-supplied weights
+
+    Raises:
+        ValueError: Unknown profile or unusable weights
+    """
+    if weights is not None:
+        if not isinstance(weights, dict) or set(weights) - set(OBJECTIVES):
+            raise ValueError(f"weights must be an object with keys from {', '.join(OBJECTIVES)}")
+        values = tuple(float(weights.get(name, 0)) for name in OBJECTIVES)
+        if min(values) < 0 or sum(values) <= 0:
+            raise ValueError('weights must be non-negative and not all zero')
+        return values
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile {profile!r}; choose from {', '.join(PROFILES)}")
+    return PROFILES[profile]
+
+
+class RoadNetwork:
+    """Road links between gazetteer places, with k-shortest-path search"""
+
+    def __init__(self):
+        self.node_ids = []
+        self.node_index = {}
+        self.node_names = []
+        self.node_labels = []
+        self.node_lat = np.empty(0)
+        self.node_lng = np.empty(0)
+        self.edge_from = np.empty(0, dtype=np.int64)
+        self.edge_to = np.empty(0, dtype=np.int64)
+        self.edge_road = []
+        self.distance_km = np.empty(0)
+        self.free_flow_min = np.empty(0)
+        self.adjacency = []
+        self._paths = {}
+
+    @property
+    def n_edges(self):
+        return len(self.edge_road)
+
+    def load(self, file_path=None, places=None):
+        """Load links from a JSON file onto the gazetteer's places"""
+        file_path = file_path or Config.ROAD_NETWORK_PATH
+        try:
+            with open(file_path, encoding='utf-8') as fh:
+                document = json.load(fh)
+        except Exception as e:
+            print(f"⚠️  Could not load road network: {e}")
+            document = {}
+
+        if places is None:
+            places = [gazetteer.public(place_id) for place_id in gazetteer.places]
+        self.build(places, document)
+        return {
+            'success': bool(self.n_edges),
+            'nodes': len(self.node_ids),
+            'edges': self.n_edges
+        }
+
+    def build(self, places, document):
+        self.node_ids = [place['id'] for place in places]
+        self.node_index = {place_id: i for i, place_id in enumerate(self.node_ids)}
+        self.node_names = [place['name'] for place in places]
+        self.node_labels = [[place['name']] + list(place.get('aliases', [])) for place in places]
+        self.node_lat = np.array([place['coordinates']['lat'] for place in places], dtype=float)
+        self.node_lng = np.array([place['coordinates']['lng'] for place in places], dtype=float)
+
+        circuity = document.get('circuity', 1.3)
+        speeds = document.get('free_flow_kmh', {})
+        edge_from, edge_to, roads, distances, free_flow = [], [], [], [], []
+        for edge in document.get('edges', []):
+            u = self.node_index.get(edge['from'])
+            v = self.node_index.get(edge['to'])
+            if u is None or v is None or u == v:
+                print(f"⚠️  Skipping road link {edge['from']} - {edge['to']}: unknown place")
+                continue
+            distance = edge.get('distance_km') or float(
+                haversine_km(self.node_lat[u], self.node_lng[u], self.node_lat[v], self.node_lng[v])
+            ) * circuity
+            speed = edge.get('free_flow_kmh') or speeds.get(edge.get('class'), 50)
+            edge_from.append(u)
+            edge_to.append(v)
+            roads.append(edge.get('road') or f"{edge['from']} - {edge['to']}")
+            distances.append(distance)
+            free_flow.append(distance / speed * 60)
+
+        self.edge_from = np.array(edge_from, dtype=np.int64)
+        self.edge_to = np.array(edge_to, dtype=np.int64)
+        self.edge_road = roads
+        self.distance_km = np.array(distances, dtype=float)
+        self.free_flow_min = np.array(free_flow, dtype=float)
+
+        # Links are two-way
+        self.adjacency = [[] for _ in self.node_ids]
+        for e, (u, v) in enumerate(zip(edge_from, edge_to)):
+            self.adjacency[u].append((v, e))
+            self.adjacency[v].append((u, e))
+        self._paths = {}
+
+    def _shortest_path(self, source, target, removed_edges=(), removed_nodes=()):
+        """Dijkstra on free-flow minutes; (cost, nodes, edges) or None"""
+        weight = self.free_flow_min
+        best = {source: 0.0}
+        previous = {}
+        heap = [(0.0, source)]
+        while heap:
+            cost, node = heapq.heappop(heap)
+            if node == target:
+                break
+            if cost > best[node]:
+                continue
+            for neighbour, edge in self.adjacency[node]:
+                if edge in removed_edges or neighbour in removed_nodes:
+                    continue
+                candidate = cost + weight[edge]
+                if candidate < best.get(neighbour, math.inf):
+                    best[neighbour] = candidate
+                    previous[neighbour] = (node, edge)
+                    heapq.heappush(heap, (candidate, neighbour))
+
+        if target not in best:
+            return None
+        nodes, edges = [target], []
+        while nodes[-1] != source:
+            node, edge = previous[nodes[-1]]
+            nodes.append(node)
+            edges.append(edge)
+        return best[target], tuple(reversed(nodes)), tuple(reversed(edges))
+
+    def k_shortest_paths(self, source, target, k):
+        """
+        Up to k loopless paths in order of free-flow time (Yen's algorithm)
+
+        Args:
+            source: Node index of the origin
+            target: Node index of the destination
+            k: Most paths to return
+
+        Returns:
+            list: (nodes, edges) tuples of node and link indices
+        """
+        key = (source, target, k)
+        cached = self._paths.get(key)
+        if cached is not None:
+            return cached
+
+        first = self._shortest_path(source, target) if source != target else None
+        accepted = [first] if first else []
+        pending = []
+        seen = {first[1]} if first else set()
+        while accepted and len(accepted) < k:
+            _, nodes, edges = accepted[-1]
+            for i in range(len(nodes) - 1):
+                root_nodes = nodes[:i + 1]
+                removed_edges = {path[2][i] for path in accepted if path[1][:i + 1] == root_nodes}
+                spur = self._shortest_path(nodes[i], target, removed_edges, set(root_nodes[:-1]))
+                if spur is None:
+                    continue
+                path_nodes = root_nodes[:-1] + spur[1]
+                if path_nodes in seen:
+                    continue
+                seen.add(path_nodes)
+                path_edges = edges[:i] + spur[2]
+                heapq.heappush(pending, (float(self.free_flow_min[list(path_edges)].sum()), path_nodes, path_edges))
+            if not pending:
+                break
+            accepted.append(heapq.heappop(pending))
+
+        paths = [(nodes, edges) for _, nodes, edges in accepted]
+        self._paths[key] = paths
+        return paths
+
+
+class IncidentIndex:
+    """Uniform grid over incident positions for corridor queries"""
+
+    KEY_STRIDE = 1 << 20
+
+    def __init__(self, cell_km=None):
+        self.cell_km = cell_km or Config.INCIDENT_BUFFER_KM
+        self.keys = np.empty(0, dtype=np.int64)
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+        self.weights = np.empty(0)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _cell(self, value):
+        return np.floor(np.asarray(value) / self.cell_km).astype(np.int64)
+
+    def build(self, lats, lngs, weights):
+        """Bucket incidents by grid cell, sorted so a cell is one contiguous slice"""
+        x, y = _project(lats, lngs)
+        keys = self._cell(x) * self.KEY_STRIDE + self._cell(y)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.x = x[order]
+        self.y = y[order]
+        self.weights = np.asarray(weights, dtype=float)[order]
+        return self
+
+    def near_segment(self, a, b, buffer_km):
+        """
+        Incidents within buffer_km of the segment a-b
+
+        Args:
+            a, b: (lat, lng) of the segment ends
+            buffer_km: Corridor half-width
+
+        Returns:
+            numpy.ndarray: Positions into self.x / self.y / self.weights
+        """
+        if not len(self.keys):
+            return np.empty(0, dtype=np.int64)
+        (ax, bx), (ay, by) = _project([a[0], b[0]], [a[1], b[1]])
+
+        # Only the cells under the segment's buffered bounding box are scanned
+        y_low, y_high = self._cell(min(ay, by) - buffer_km), self._cell(max(ay, by) + buffer_km)
+        columns = np.arange(self._cell(min(ax, bx) - buffer_km), self._cell(max(ax, bx) + buffer_km) + 1)
+        starts = np.searchsorted(self.keys, columns * self.KEY_STRIDE + y_low, side='left')
+        ends = np.searchsorted(self.keys, columns * self.KEY_STRIDE + y_high, side='right')
+        candidates = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends) if e > s] or [[]]).astype(np.int64)
+        if not len(candidates):
+            return candidates
+
+        dx, dy = bx - ax, by - ay
+        length2 = dx * dx + dy * dy
+        px, py = self.x[candidates] - ax, self.y[candidates] - ay
+        t = np.clip((px * dx + py * dy) / length2, 0.0, 1.0) if length2 else 0.0
+        distance = np.hypot(px - t * dx, py - t * dy)
+        return candidates[distance <= buffer_km]
+
+
+class RouteEngine:
+    """Candidate paths, incident exposure and vectorized multi-objective scoring"""
+
+    def __init__(self):
+        self.network = RoadNetwork()
+        self.index = IncidentIndex()
+        self._exposure = None
+        self._lock = threading.Lock()
+
+    def load(self, file_path=None):
+        self._exposure = None
+        return self.network.load(file_path)
+
+    def _incident_rows(self, since):
+        rows = db.session.execute(
+            db.select(TrafficIncident.latitude, TrafficIncident.longitude, TrafficIncident.severity)
+            .where(TrafficIncident.incident_date >= since)
+        ).all()
+        if rows:
+            lats, lngs, severities = zip(*rows)
+            return np.array(lats), np.array(lngs), list(severities), 'incidents'
+
+        sample = next(generate_incidents(SAMPLE_INCIDENTS, seed=7, chunk_size=SAMPLE_INCIDENTS))
+        return sample['latitude'].values, sample['longitude'].values, list(sample['severity']), 'sample'
+
+    def incident_exposure(self):
+        """
+        Severity-weighted incidents near every road link
+
+        Rebuilt only when the incidents in the window change; the scheduler
+        publishes it so request handlers normally never build it.
+
+        Returns:
+            dict: 'key', 'source', 'incidents', per-link 'weight' and 'count',
+                and the 'density_tertiles' (weight per km) that split
+                LOW / MEDIUM / HIGH risk
+        """
+        since = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) \
+            - timedelta(days=Config.INCIDENT_WINDOW_DAYS)
+        count, latest = db.session.query(
+            db.func.count(TrafficIncident.id), db.func.max(TrafficIncident.id)
+        ).filter(TrafficIncident.incident_date >= since).one()
+        key = f"{since.date()}:{count}:{latest}:{self.network.n_edges}"
+        exposure = self._exposure
+        if exposure is not None and exposure['key'] == key:
+            return exposure
+
+        with self._lock:
+            lats, lngs, severities, source = self._incident_rows(since)
+            weights = np.array([SEVERITY_WEIGHTS.get(severity, 1.0) for severity in severities])
+            self.index = IncidentIndex().build(lats, lngs, weights)
+
+            network = self.network
+            weight = np.zeros(network.n_edges)
+            counts = np.zeros(network.n_edges, dtype=np.int64)
+            for e in range(network.n_edges):
+                u, v = network.edge_from[e], network.edge_to[e]
+                near = self.index.near_segment(
+                    (network.node_lat[u], network.node_lng[u]),
+                    (network.node_lat[v], network.node_lng[v]),
+                    Config.INCIDENT_BUFFER_KM
+                )
+                weight[e] = self.index.weights[near].sum()
+                counts[e] = len(near)
+
+            density = weight / network.distance_km if network.n_edges else np.zeros(0)
+            self._exposure = {
+                'key': key,
+                'source': source,
+                'incidents': len(weights),
+                'weight': weight.round(3).tolist(),
+                'count': counts.tolist(),
+                'density_tertiles': np.quantile(density, [1 / 3, 2 / 3]).round(4).tolist()
+                if len(density) else [0.0, 0.0]
+            }
+        return self._exposure
+
+    def node_congestion(self, forecast=None, live=None):
+        """
+        Congestion level expected at every place
+
+        Args:
+            forecast: {place name: level} from the model or historical data
+            live: Probe snapshot {place id: state}; overrides the forecast
+
+        Returns:
+            tuple: (levels array, bool array of places with a real estimate)
+        """
+        network = self.network
+        levels = np.full(len(network.node_ids), np.nan)
+        for i, labels in enumerate(network.node_labels):
+            for label in labels:
+                if forecast and label in forecast:
+                    levels[i] = forecast[label]
+                    break
+
+        for place_id, state in (live or {}).items():
+            i = network.node_index.get(place_id)
+            if i is not None and state.get('congestion_level') is not None:
+                levels[i] = state['congestion_level']
+
+        observed = ~np.isnan(levels)
+        # Places with no estimate take the mean of those that have one
+        levels[~observed] = levels[observed].mean() if observed.any() else DEFAULT_CONGESTION
+        return levels, observed
+
+    def link_costs(self, levels, observed, exposure):
+        """
+        Per-link cost matrix, one row per cost, with a zero padding column
+
+        The extra last column lets padded path matrices index it freely.
+        """
+        network = self.network
+        level = (levels[network.edge_from] + levels[network.edge_to]) / 2
+        share_observed = (observed[network.edge_from].astype(float) + observed[network.edge_to]) / 2
+
+        costs = np.zeros((6, network.n_edges + 1))
+        costs[_DISTANCE, :-1] = network.distance_km
+        costs[_TIME, :-1] = network.free_flow_min / congestion_speed_factor(level)
+        costs[_RISK, :-1] = exposure['weight']
+        costs[_COUNT, :-1] = exposure['count']
+        costs[_LEVEL_KM, :-1] = level * network.distance_km
+        costs[_OBSERVED_KM, :-1] = share_observed * network.distance_km
+        return costs
+
+    def score(self, paths, costs, weight_table):
+        """
+        Totals and profile scores for all candidate paths in one pass
+
+        Args:
+            paths: Link-index tuples, one per candidate
+            costs: link_costs() matrix
+            weight_table: (profiles x objectives) array
+
+        Returns:
+            tuple: (totals (costs x candidates), scores (candidates x profiles))
+        """
+        padding = costs.shape[1] - 1
+        matrix = np.full((len(paths), max(len(edges) for edges in paths)), padding, dtype=np.int64)
+        for i, edges in enumerate(paths):
+            matrix[i, :len(edges)] = edges
+
+        totals = costs[:, matrix].sum(axis=2)
+        objectives = np.column_stack([
+            totals[_TIME],
+            totals[_RISK],
+            totals[_LEVEL_KM] / totals[_DISTANCE]
+        ])
+        low = objectives.min(axis=0)
+        span = objectives.max(axis=0) - low
+        normalised = np.divide(objectives - low, span, out=np.zeros_like(objectives), where=span > 0)
+
+        weight_table = np.asarray(weight_table, dtype=float)
+        scores = normalised @ (weight_table / weight_table.sum(axis=1, keepdims=True)).T
+        return totals, scores
+
+    def plan(self, start_id, end_id, profile='balanced', weights=None, forecast=None, live=None,
+             exposure=None, k=None):
+        """
+        Score the candidate routes between two places
+
+        Args:
+            start_id, end_id: Gazetteer place ids
+            profile: 'fastest', 'safest' or 'balanced' (ignored when weights are given)
+            weights: Optional {'time', 'risk', 'congestion'} weights
+            forecast: {place name: congestion level}
+            live: Probe snapshot {place id: state}
+            exposure: incident_exposure() result (built if omitted or stale)
+            k: Candidate paths to consider (default ROUTE_CANDIDATES)
+
+        Returns:
+            list: Routes best-first under the chosen profile, or None if
+                either place is off the network or no path joins them
+        """
+        network = self.network
+        chosen = profile_weights(profile, weights)
+        source, target = network.node_index.get(start_id), network.node_index.get(end_id)
+        if source is None or target is None:
+            return None
+        paths = network.k_shortest_paths(source, target, k or Config.ROUTE_CANDIDATES)
+        if not paths:
+            return None
+        if exposure is None or len(exposure['weight']) != network.n_edges:
+            exposure = self.incident_exposure()
+
+        levels, observed = self.node_congestion(forecast, live)
+        costs = self.link_costs(levels, observed, exposure)
+        names = list(PROFILES) + ['custom']
+        totals, scores = self.score([edges for _, edges in paths], costs, list(PROFILES.values()) + [chosen])
+        best = scores.argmin(axis=0)
+        low, high = exposure['density_tertiles']
+
+        routes = []
+        for i, (nodes, edges) in enumerate(paths):
+            distance, minutes, risk, count, level_km, observed_km = totals[:, i]
+            roads = [
+                network.edge_road[e] for j, e in enumerate(edges)
+                if j == 0 or network.edge_road[edges[j - 1]] != network.edge_road[e]
+            ]
+            density = risk / distance
+            routes.append({
+                'route_id': i + 1,
+                'name': ' → '.join([network.node_names[nodes[0]]] + roads + [network.node_names[nodes[-1]]]),
+                'via': [network.node_ids[n] for n in nodes],
+                'roads': roads,
+                'distance_km': round(float(distance), 1),
+                'estimated_time_min': max(1, int(round(minutes))),
+                'accident_risk': 'LOW' if density <= low else 'MEDIUM' if density <= high else 'HIGH',
+                'congestion_level': int(round(level_km / distance)),
+                'historical_accidents': int(count),
+                'average_speed_kmh': int(round(distance / minutes * 60)),
+                'risk_score': round(float(density), 2),
+                'scores': {name: round(float(scores[i, j]), 3) for j, name in enumerate(names)},
+                'best_for': [name for j, name in enumerate(names[:-1]) if best[j] == i],
+                'ai_confidence': round(0.6 + 0.35 * float(observed_km / distance), 2),
+                'prediction_factors': dict(zip(OBJECTIVES, chosen)),
+                'incident_source': exposure['source']
+            })
+
+        order = np.argsort(scores[:, -1], kind='stable')
+        routes = [routes[i] for i in order]
+        for rank, route in enumerate(routes):
+            route['recommended'] = rank == 0
+        return routes
+
+
+# Create singleton instance
+route_engine = RouteEngine()
+route_engine.load()
\ No newline at end of file
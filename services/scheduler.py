@@ -0,0 +1,255 @@
+"""
+Background scheduler for periodic precomputation
+
+Expensive results (hotspot rankings, statistics, the model lookup table,
+route incident exposure, zone-to-zone travel-time matrices, Polygon
+network info, time-series rollups) are computed off the request path and
+published to the shared cache; request handlers read the
+published copy and only compute inline when nothing has been published
+yet. Document-validity answers are expired in one step at the daily reset.
+
+Each job's schedule is cut into slots (interval jobs: one slot per
+interval; daily jobs: one slot per calendar day). Every worker runs the
+scheduler loop, but a job only runs in a slot on the worker that claims
+the slot's lock in the state backend, so with a shared backend each job
+runs once per slot across all nodes. With memory:// every process is its
+own cluster and runs its own jobs; gunicorn.conf.py warns about that when
+it starts more than one worker.
+
+Jobs that change files or chain state (time-series rollup, OD matrix
+files, attestation anchoring) are also exclusive: they run under a file
+lock (state_backend.host_lock), so two workers on one machine never run
+them at the same time even when the backend is not shared.
+
+A result is published as one JSON value under one key, so readers see
+either the previous result or the new one, never a partial update.
+"""
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from config import Config
+from services.ai_service import serving_model
+from services.attestation import attestation_service
+from services.cluster import shared_cache
+from services.data_analysis import data_analysis_service
+from services.metrics import metrics
+from services.od_matrix import od_matrix
+from services.polygon_service import polygon_service
+from services.routing import route_engine
+from services.state_backend import host_lock
+from services.timeseries import timeseries_store
+
+
+job_runs = metrics.counter(
+    'scheduled_job_runs_total', 'Scheduled job runs by outcome', ('job', 'result')
+)
+job_duration = metrics.histogram(
+    'scheduled_job_duration_seconds', 'Scheduled job run time', ('job',),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 15, 60, 300)
+)
+
+
+class Job:
+    """A function run every interval seconds or once a day at a local time"""
+
+    def __init__(self, name, func, interval=None, daily_at=None, publish=True, exclusive=False):
+        if (interval is None) == (daily_at is None):
+            raise ValueError('A job needs exactly one of interval or daily_at')
+        self.name = name
+        self.func = func
+        self.interval = interval
+        # (hour, minute); the slot turns over at that local time each day
+        self.daily_at = tuple(int(part) for part in daily_at.split(':')) if daily_at else None
+        self.publish = publish
+        self.exclusive = exclusive
+        self.last_slot = None
+        self.last_run = None
+
+    def slot(self, now):
+        if self.interval is not None:
+            return str(int(now // self.interval))
+        hour, minute = self.daily_at
+        local = datetime.fromtimestamp(now - hour * 3600 - minute * 60)
+        return local.date().isoformat()
+
+    @property
+    def lock_ttl(self):
+        # Outlive the slot so a slow node can't re-run a finished one
+        return 2 * (self.interval or 86400)
+
+    @property
+    def result_ttl(self):
+        # Stale results expire, and handlers fall back to computing inline
+        return 3 * (self.interval or 86400)
+
+
+class Scheduler:
+    """Runs registered jobs in a daemon thread, one worker per slot"""
+
+    def __init__(self, backend=None, tick=None):
+        self.cache = shared_cache
+        self.backend = backend or shared_cache.backend
+        self.tick = tick or Config.SCHEDULER_TICK_SECONDS
+        self.owner = uuid.uuid4().hex
+        self.jobs = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, name, func, interval=None, daily_at=None, publish=True, run_on_start=True,
+            exclusive=False):
+        """
+        Register a job
+
+        Args:
+            name: Job name; also the key its result is published under
+            func: Zero-argument callable; its return value is published
+            interval: Seconds between runs
+            daily_at: 'HH:MM' local time for once-a-day jobs
+            publish: Publish the return value for result()
+            run_on_start: Run in the current slot instead of waiting for the next
+            exclusive: Also take a file lock so one machine's workers never overlap
+        """
+        job = Job(name, func, interval, daily_at, publish, exclusive)
+        if not run_on_start:
+            job.last_slot = job.slot(time.time())
+        self.jobs[name] = job
+        return job
+
+    def published(self, name):
+        """Last published result of a job with its computed_at and duration_s, or None"""
+        return self.cache.get(f'job:{name}')
+
+    def result(self, name):
+        """Last published result of a job, or None"""
+        published = self.published(name)
+        return published['value'] if published else None
+
+    def run_due(self, now=None):
+        """Run every job whose slot has turned over and whose lock we win"""
+        now = time.time() if now is None else now
+        ran = []
+        for job in self.jobs.values():
+            slot = job.slot(now)
+            if slot == job.last_slot:
+                continue
+            job.last_slot = slot
+            try:
+                claimed = self.backend.set(f'lock:job:{job.name}:{slot}', self.owner, ttl=job.lock_ttl, nx=True)
+            except Exception as e:
+                print(f"⚠️  Could not claim job {job.name}: {e}")
+                continue
+            if not claimed:
+                job_runs.inc(job.name, 'skipped')
+                continue
+            if job.exclusive:
+                with host_lock(f'job-{job.name}') as held:
+                    if not held:
+                        job_runs.inc(job.name, 'skipped')
+                        continue
+                    self.run(job)
+            else:
+                self.run(job)
+            ran.append(job.name)
+        return ran
+
+    def run(self, job):
+        """Run one job now and publish its result"""
+        started = time.perf_counter()
+        try:
+            value = job.func()
+            if job.publish:
+                self.cache.set(f'job:{job.name}', {
+                    'value': value,
+                    'computed_at': datetime.utcnow().isoformat(),
+                    'duration_s': round(time.perf_counter() - started, 4)
+                }, ttl=job.result_ttl)
+            job.last_run = time.time()
+            job_runs.inc(job.name, 'ok')
+        except Exception as e:
+            job_runs.inc(job.name, 'error')
+            print(f"⚠️  Scheduled job {job.name} failed: {e}")
+        finally:
+            job_duration.observe(time.perf_counter() - started, job.name)
+
+    def _loop(self, app):
+        while not self._stop.wait(self.tick):
+            with app.app_context():
+                self.run_due()
+
+    def start(self, app):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(app,), name='scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        return {
+            name: {
+                'interval': job.interval,
+                'daily_at': '%02d:%02d' % job.daily_at if job.daily_at else None,
+                'last_slot': job.last_slot,
+                'last_run_here': datetime.utcfromtimestamp(job.last_run).isoformat() if job.last_run else None
+            }
+            for name, job in self.jobs.items()
+        }
+
+
+# Create singleton instance
+scheduler = Scheduler()
+
+
+def _refresh_network_info():
+    # Written where blockchain-status reads it, ahead of its TTL
+    shared_cache.set('polygon:network_info', polygon_service.get_network_info(), ttl=Config.NETWORK_INFO_TTL)
+
+
+def _refresh_od_matrix():
+    table = scheduler.result('model_table')
+    if not (table and table['version'] == serving_model.version):
+        table = serving_model.lookup_table()
+    return od_matrix.refresh(table, scheduler.result('incident_exposure'))
+
+
+def _roll_up_timeseries():
+    timeseries_store.rollup()
+    timeseries_store.apply_retention()
+
+
+def init_scheduler(app):
+    """Register the precomputation jobs and start the scheduler thread"""
+    scheduler.add('hotspots', lambda: data_analysis_service.identify_hotspots(limit=None),
+                  interval=Config.HOTSPOTS_REFRESH_SECONDS)
+    scheduler.add('statistics', data_analysis_service.get_accident_statistics,
+                  interval=Config.STATISTICS_REFRESH_SECONDS)
+    scheduler.add('model_table', serving_model.lookup_table,
+                  interval=Config.MODEL_TABLE_REFRESH_SECONDS)
+    scheduler.add('incident_exposure', route_engine.incident_exposure,
+                  interval=Config.INCIDENT_EXPOSURE_REFRESH_SECONDS)
+    scheduler.add('od_matrix', _refresh_od_matrix, interval=Config.OD_MATRIX_REFRESH_SECONDS, exclusive=True)
+    scheduler.add('network_info', _refresh_network_info,
+                  interval=max(1, Config.NETWORK_INFO_TTL // 3), publish=False)
+    scheduler.add('timeseries_rollup', _roll_up_timeseries,
+                  interval=Config.TIMESERIES_ROLLUP_SECONDS, publish=False, exclusive=True)
+    if Config.ATTESTATION_MODE == 'batch':
+        scheduler.add('attestation_batch', attestation_service.flush_all,
+                      interval=Config.ATTESTATION_BATCH_SECONDS, publish=False, exclusive=True)
+    scheduler.add('validity_reset', lambda: shared_cache.invalidate('validity'),
+                  daily_at=Config.VALIDITY_CACHE_RESET_AT, publish=False, run_on_start=False)
+
+    if Config.SCHEDULER_ENABLED:
+        scheduler.start(app)
+    return app
\ No newline at end of file
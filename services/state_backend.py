@@ -0,0 +1,300 @@
+"""
+Shared state backends: key/value cache, locks and token buckets
+
+memory://              state lives in this process (the default)
+sqlite:///path.db      shared by every worker process on one machine
+redis://host:6379/0    shared by every node (requires redis-py)
+
+All backends expose the same small, Redis-shaped interface (get, set with
+TTL and NX, delete, incr, take_tokens), so the SQLite file works as a
+local stand-in for Redis in tests and single-machine deployments.
+
+host_lock() is a file lock in LOCK_DIR for work that changes files or
+chain state; it keeps the workers of one machine apart whatever the
+backend.
+"""
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, host_lock() always succeeds
+    fcntl = None
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from config import Config
+
+
+class InProcessBackend:
+    """State held in a dict guarded by a lock"""
+
+    MAX_BUCKETS = 100000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._values = {}
+
+    def _live(self, key, now):
+        item = self._values.get(key)
+        if item is not None and item[1] is not None and item[1] <= now:
+            del self._values[key]
+            return None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            item = self._live(key, time.time())
+        return item[0] if item else None
+
+    def set(self, key, value, ttl=None, nx=False):
+        """Store a value; with nx only if the key is absent. Returns True if stored"""
+        now = time.time()
+        with self._lock:
+            if nx and self._live(key, now) is not None:
+                return False
+            self._values[key] = (value, now + ttl if ttl else None)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            return self._values.pop(key, None) is not None
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            item = self._live(key, time.time())
+            value = int(item[0]) + amount if item else amount
+            self._values[key] = (value, item[1] if item else None)
+        return value
+
+    def take_tokens(self, key, rate, burst, cost=1.0, now=None):
+        """
+        Token-bucket admission
+
+        Args:
+            key: Bucket name (e.g. 'normal:203.0.113.7')
+            rate: Tokens added per second
+            burst: Bucket capacity
+            cost: Tokens this request needs
+            now: Current time (defaults to time.monotonic())
+
+        Returns:
+            tuple: (allowed, tokens left, seconds until enough tokens)
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            if len(self._buckets) >= self.MAX_BUCKETS and key not in self._buckets:
+                self._evict_full(now, rate, burst)
+            self._buckets[key] = (tokens, now)
+        retry_after = 0.0 if allowed else (cost - tokens) / rate
+        return allowed, tokens, retry_after
+
+    def _evict_full(self, now, rate, burst):
+        # A refilled bucket is indistinguishable from a missing one
+        for key, (tokens, updated) in list(self._buckets.items()):
+            if tokens + (now - updated) * rate >= burst:
+                del self._buckets[key]
+
+
+class SQLiteBackend:
+    """State in a local SQLite file so all worker processes share it"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS token_buckets '
+                '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS kv '
+                '(key TEXT PRIMARY KEY, value BLOB, expires REAL)'
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, fn):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = fn(conn)
+            conn.execute('COMMIT')
+            return result
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT value FROM kv WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl=None, nx=False):
+        """Store a value; with nx only if the key is absent. Returns True if stored"""
+        now = time.time()
+        expires = now + ttl if ttl else None
+
+        def write(conn):
+            if nx:
+                conn.execute('DELETE FROM kv WHERE key = ? AND expires <= ?', (key, now))
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO kv (key, value, expires) VALUES (?, ?, ?)', (key, value, expires)
+                )
+                return cursor.rowcount == 1
+            conn.execute('INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)', (key, value, expires))
+            return True
+
+        return self._transaction(write)
+
+    def delete(self, key):
+        return self._transaction(lambda conn: conn.execute('DELETE FROM kv WHERE key = ?', (key,)).rowcount == 1)
+
+    def incr(self, key, amount=1):
+        def update(conn):
+            row = conn.execute(
+                'SELECT value, expires FROM kv WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (key, time.time())
+            ).fetchone()
+            value = int(row[0]) + amount if row else amount
+            conn.execute(
+                'INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)',
+                (key, value, row[1] if row else None)
+            )
+            return value
+
+        return self._transaction(update)
+
+    def take_tokens(self, key, rate, burst, cost=1.0, now=None):
+        """Token-bucket admission (see InProcessBackend.take_tokens)"""
+        # Wall clock: monotonic clocks are not comparable across processes
+        now = time.time() if now is None else now
+
+        def update(conn):
+            row = conn.execute('SELECT tokens, updated FROM token_buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute(
+                'INSERT OR REPLACE INTO token_buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                (key, tokens, now)
+            )
+            return allowed, tokens
+
+        allowed, tokens = self._transaction(update)
+        retry_after = 0.0 if allowed else (cost - tokens) / rate
+        return allowed, tokens, retry_after
+
+
+class RedisBackend:
+    """State in Redis, shared by every node (requires redis-py)"""
+
+    # Refill and take atomically on the server; returns {allowed, tokens*1000}
+    TOKEN_BUCKET_SCRIPT = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local rate, burst, cost, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, math.floor(tokens * 1000)}
+"""
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('Redis state backend requires redis-py (pip install redis)')
+        self.client = redis.Redis.from_url(url, socket_timeout=Config.STATE_BACKEND_TIMEOUT)
+        self._token_bucket = self.client.register_script(self.TOKEN_BUCKET_SCRIPT)
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl=None, nx=False):
+        """Store a value; with nx only if the key is absent. Returns True if stored"""
+        return bool(self.client.set(key, value, ex=int(ttl) if ttl else None, nx=nx))
+
+    def delete(self, key):
+        return self.client.delete(key) == 1
+
+    def incr(self, key, amount=1):
+        return self.client.incrby(key, amount)
+
+    def take_tokens(self, key, rate, burst, cost=1.0, now=None):
+        """Token-bucket admission (see InProcessBackend.take_tokens)"""
+        now = time.time() if now is None else now
+        allowed, tokens = self._token_bucket(keys=[f'bucket:{key}'], args=[rate, burst, cost, now])
+        tokens = tokens / 1000.0
+        retry_after = 0.0 if allowed else (cost - tokens) / rate
+        return bool(allowed), tokens, retry_after
+
+
+def create_backend(url=None):
+    """Build a backend from a URL (memory://, sqlite:///path or redis://...)"""
+    url = url or Config.STATE_BACKEND_URL
+    if url.startswith('memory://'):
+        return InProcessBackend()
+    if url.startswith('sqlite:///'):
+        return SQLiteBackend(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://')):
+        return RedisBackend(url)
+    raise ValueError(f'Unsupported state backend: {url}')
+
+
+@contextmanager
+def host_lock(name):
+    """
+    Non-blocking lock shared by every process on this machine
+
+    Yields:
+        bool: True if this process holds the lock until the block exits
+    """
+    if fcntl is None:
+        yield True
+        return
+    os.makedirs(Config.LOCK_DIR, exist_ok=True)
+    with open(os.path.join(Config.LOCK_DIR, f'{name}.lock'), 'a') as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+# Create singleton instance
+state_backend = create_backend()
\ No newline at end of file
@@ -0,0 +1,336 @@
+"""
+Seeded, vectorized synthetic data for load and capacity testing
+
+Generates traffic observations, incidents and drivers in fixed-size
+chunks, so tens of millions of rows can be streamed to CSV, Parquet or the
+database without holding them in memory.
+
+    python -m services.synthetic_data traffic --rows 20000000 --out traffic.csv
+    python -m services.synthetic_data incidents --rows 1000000 --out sqlite:///load.db
+    python -m services.synthetic_data drivers --rows 500000 --out drivers.parquet
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from services.time_buckets import time_of_day_for
+
+
+# Locations used by the sample dataset, with a relative traffic weight and
+# a base congestion level (busy business districts and bridges score higher)
+LOCATIONS = np.array([
+    'Victoria Island', 'Lekki Phase 1', 'Ikeja', 'Surulere',
+    'Yaba', 'VI-Lekki', 'Ikoyi', 'Marina', 'Ajah', 'Festac',
+    'Apapa', 'Maryland', 'Oshodi', 'Ojuelegba', 'Allen Avenue',
+    'Berger', 'Ketu', 'Mile 2', 'Egbeda', 'Isolo'
+])
+LOCATION_WEIGHTS = np.array([
+    9, 7, 8, 5, 6, 6, 4, 5, 6, 3, 7, 6, 9, 7, 4, 6, 5, 5, 3, 4
+], dtype=float)
+LOCATION_WEIGHTS /= LOCATION_WEIGHTS.sum()
+LOCATION_BASE_CONGESTION = np.array([
+    6.5, 5.5, 6.0, 4.5, 5.0, 6.0, 3.5, 5.5, 5.5, 3.5,
+    7.0, 5.5, 7.0, 6.0, 4.0, 5.5, 5.0, 6.0, 3.5, 4.0
+])
+
+# Hour-of-day traffic profile: commuter peaks at 7-9 and 17-19
+HOURLY_VOLUME = np.array([
+    0.2, 0.1, 0.1, 0.1, 0.2, 0.6, 1.4, 2.0, 2.0, 1.4, 1.0, 1.0,
+    1.1, 1.1, 1.0, 1.1, 1.5, 2.0, 2.0, 1.5, 1.0, 0.7, 0.5, 0.3
+])
+HOURLY_VOLUME /= HOURLY_VOLUME.sum()
+HOURLY_CONGESTION = (HOURLY_VOLUME / HOURLY_VOLUME.max()) * 3.0 - 1.5
+
+# Accident hotspots (lat, lng, share of incidents, spread in degrees)
+HOTSPOTS = np.array([
+    (6.4474, 3.4647, 0.12, 0.006),   # Lekki Toll Gate
+    (6.5027, 3.3692, 0.10, 0.005),   # Ojuelegba Under Bridge
+    (6.5074, 3.3801, 0.10, 0.012),   # Third Mainland Bridge
+    (6.5355, 3.3361, 0.11, 0.006),   # Oshodi Interchange
+    (6.5775, 3.3619, 0.08, 0.010),   # Ikorodu Road
+    (6.4698, 3.3528, 0.09, 0.010),   # Apapa-Oshodi Expressway
+    (6.4541, 3.3947, 0.06, 0.004),   # CMS Roundabout
+    (6.5698, 3.3661, 0.07, 0.005),   # Maryland Junction
+])
+HOTSPOT_NAMES = np.array([
+    'Lekki Toll Gate', 'Ojuelegba Under Bridge', 'Third Mainland Bridge',
+    'Oshodi Interchange', 'Ikorodu Road', 'Apapa-Oshodi Expressway',
+    'CMS Roundabout', 'Maryland Junction'
+])
+LAGOS_BOUNDS = (6.39, 6.70, 3.10, 3.70)  # lat_min, lat_max, lng_min, lng_max
+
+INCIDENT_TYPES = np.array(['collision', 'breakdown', 'pedestrian', 'motorcycle', 'rollover'])
+INCIDENT_TYPE_P = np.array([0.45, 0.25, 0.12, 0.14, 0.04])
+SEVERITIES = np.array(['minor', 'moderate', 'severe', 'fatal'])
+SEVERITY_P = np.array([0.55, 0.28, 0.13, 0.04])
+SEVERITY_CASUALTY_RATE = np.array([0.05, 0.6, 1.8, 2.5])
+WEATHER = np.array(['clear', 'rain', 'heavy_rain', 'fog'])
+WEATHER_P = np.array([0.68, 0.2, 0.07, 0.05])
+ROAD_CONDITIONS = np.array(['good', 'fair', 'poor', 'under_construction'])
+ROAD_CONDITION_P = np.array([0.4, 0.33, 0.2, 0.07])
+
+INSURERS = np.array(['Leadway', 'AXA Mansard', 'AIICO', 'Cornerstone', 'NEM', 'Custodian'])
+FIRST_NAMES = np.array(['Adebayo', 'Chinedu', 'Emeka', 'Funke', 'Ngozi', 'Tunde', 'Aisha', 'Ibrahim', 'Kemi', 'Segun'])
+LAST_NAMES = np.array(['Okafor', 'Adeyemi', 'Balogun', 'Eze', 'Ogunleye', 'Bello', 'Nwosu', 'Lawal', 'Okonkwo', 'Afolabi'])
+
+LETTERS = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'), dtype=object)
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+def _timestamps(rng, rows, start, days):
+    """Timestamps spread over days, following the hourly volume profile"""
+    day = rng.integers(0, days, rows)
+    hour = rng.choice(24, rows, p=HOURLY_VOLUME)
+    minute = rng.integers(0, 60, rows)
+    seconds = day * 86400 + hour * 3600 + minute * 60
+    return np.datetime64(start, 's') + seconds.astype('timedelta64[s]'), hour
+
+
+def _chunks(rows, chunk_size):
+    for offset in range(0, rows, chunk_size):
+        yield offset, min(chunk_size, rows - offset)
+
+
+def generate_traffic(rows, seed=42, chunk_size=DEFAULT_CHUNK_SIZE, start=None, days=365):
+    """
+    Traffic observations with the columns of data/traffic_data.csv plus a timestamp
+
+    Congestion combines a per-location base, the hour-of-day profile, a
+    weekday effect and weather; speed falls and accidents rise with it.
+
+    Yields:
+        pandas.DataFrame chunks of at most chunk_size rows
+    """
+    start = start or (datetime.utcnow() - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    for offset, size in _chunks(rows, chunk_size):
+        rng = np.random.default_rng([seed, offset])
+
+        location = rng.choice(len(LOCATIONS), size, p=LOCATION_WEIGHTS)
+        timestamp, hour = _timestamps(rng, size, start, days)
+        day_of_week = ((timestamp.astype('datetime64[D]').astype(np.int64) + 3) % 7).astype(np.int8)
+        weather_score = np.clip(rng.normal(8.0, 1.2, size).round(), 5, 9).astype(np.int8)
+
+        weekend = day_of_week >= 5
+        congestion = (
+            LOCATION_BASE_CONGESTION[location]
+            + HOURLY_CONGESTION[hour]
+            - 1.5 * weekend
+            + 0.45 * (8 - weather_score)
+            + rng.normal(0, 1.0, size)
+        )
+        congestion = np.clip(congestion.round(), 1, 9).astype(np.int8)
+
+        avg_speed = np.clip(70 - congestion * 6 + rng.normal(0, 4, size), 5, 80).round().astype(np.int16)
+        accidents = rng.poisson(0.15 + 0.12 * congestion + 0.2 * (9 - weather_score)).astype(np.int16)
+        road_users = np.clip(
+            (HOURLY_VOLUME[hour] * 24 * 1500 * (0.6 + congestion / 9) * rng.lognormal(0, 0.25, size)).round(),
+            50, 20000
+        ).astype(np.int32)
+
+        yield pd.DataFrame({
+            'timestamp': timestamp,
+            'location': LOCATIONS[location],
+            'time_of_day': time_of_day_for(hour),
+            'day_of_week': day_of_week,
+            'weather_score': weather_score,
+            'congestion_level': congestion,
+            'accident_count': accidents,
+            'avg_speed_kmh': avg_speed,
+            'road_users': road_users
+        })
+
+
+def generate_incidents(rows, seed=42, chunk_size=DEFAULT_CHUNK_SIZE, start=None, days=365, background=0.3):
+    """
+    Incidents clustered around known hotspots with a uniform city-wide background
+
+    Yields:
+        pandas.DataFrame chunks with the traffic_incidents columns
+    """
+    start = start or (datetime.utcnow() - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    shares = HOTSPOTS[:, 2] / HOTSPOTS[:, 2].sum()
+    lat_min, lat_max, lng_min, lng_max = LAGOS_BOUNDS
+
+    for offset, size in _chunks(rows, chunk_size):
+        rng = np.random.default_rng([seed, offset, 1])
+
+        spot = rng.choice(len(HOTSPOTS), size, p=shares)
+        in_background = rng.random(size) < background
+        latitude = np.where(
+            in_background,
+            rng.uniform(lat_min, lat_max, size),
+            HOTSPOTS[spot, 0] + rng.normal(0, 1, size) * HOTSPOTS[spot, 3]
+        )
+        longitude = np.where(
+            in_background,
+            rng.uniform(lng_min, lng_max, size),
+            HOTSPOTS[spot, 1] + rng.normal(0, 1, size) * HOTSPOTS[spot, 3]
+        )
+        location = np.where(in_background, LOCATIONS[rng.integers(0, len(LOCATIONS), size)], HOTSPOT_NAMES[spot])
+
+        incident_date, hour = _timestamps(rng, size, start, days)
+        severity = rng.choice(len(SEVERITIES), size, p=SEVERITY_P)
+        weather = rng.choice(len(WEATHER), size, p=WEATHER_P)
+
+        yield pd.DataFrame({
+            'location': location,
+            'latitude': latitude.round(6),
+            'longitude': longitude.round(6),
+            'incident_type': INCIDENT_TYPES[rng.choice(len(INCIDENT_TYPES), size, p=INCIDENT_TYPE_P)],
+            'severity': SEVERITIES[severity],
+            'casualties': rng.poisson(SEVERITY_CASUALTY_RATE[severity]).astype(np.int16),
+            'time_of_day': time_of_day_for(hour),
+            'weather_condition': WEATHER[weather],
+            'road_condition': ROAD_CONDITIONS[rng.choice(len(ROAD_CONDITIONS), size, p=ROAD_CONDITION_P)],
+            'incident_date': incident_date,
+            'created_at': incident_date
+        })
+
+
+def generate_drivers(rows, seed=42, chunk_size=DEFAULT_CHUNK_SIZE, start_index=0, today=None):
+    """
+    Drivers with realistic document expiries
+
+    Licences run five years from a uniformly distributed issue date;
+    insurance and road-worthiness renew yearly, with a lapsed tail so
+    roughly 10-15% of each document is expired.
+
+    Yields:
+        pandas.DataFrame chunks with the drivers columns
+    """
+    today = np.datetime64(today or datetime.utcnow().date(), 'D')
+
+    for offset, size in _chunks(rows, chunk_size):
+        rng = np.random.default_rng([seed, offset, 2])
+        index = np.arange(start_index + offset, start_index + offset + size)
+        ids = pd.Series(index).astype(str).str.zfill(9)
+
+        license_expiry = today + (rng.integers(0, 5 * 365, size) - 180).astype('timedelta64[D]')
+        insurance_expiry = today + (rng.integers(0, 365, size) - rng.exponential(20, size).astype(int)).astype('timedelta64[D]')
+        cert_expiry = today + (rng.integers(0, 365, size) - rng.exponential(30, size).astype(int)).astype('timedelta64[D]')
+        created_at = np.datetime64(today, 's') - rng.integers(0, 3 * 365 * 86400, size).astype('timedelta64[s]')
+        # One hex string sliced into 40-character addresses, no per-row formatting
+        wallets = np.array([rng.bytes(20 * size).hex()]).view('<U40')
+        plate_suffix = rng.integers(0, 26 * 26, size)
+
+        yield pd.DataFrame({
+            'first_name': FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), size)],
+            'last_name': LAST_NAMES[rng.integers(0, len(LAST_NAMES), size)],
+            'email': 'driver' + ids + '@example.com',
+            'phone': '+23480' + ids.str[-8:],
+            'license_number': 'LAG' + ids,
+            # datetime64[D] -> datetime.date so Date columns store plain dates
+            'license_expiry': license_expiry.astype(object),
+            'vehicle_plate': 'LND-' + ids.str[-3:] + '-' + LETTERS[plate_suffix // 26] + LETTERS[plate_suffix % 26],
+            'insurance_provider': INSURERS[rng.integers(0, len(INSURERS), size)],
+            'insurance_expiry': insurance_expiry.astype(object),
+            'road_cert_number': 'RC' + ids,
+            'cert_expiry': cert_expiry.astype(object),
+            'blockchain_tx': None,
+            'wallet_address': np.char.add('0x', wallets),
+            'created_at': created_at,
+            'updated_at': created_at
+        })
+
+
+GENERATORS = {
+    'traffic': (generate_traffic, None),
+    'incidents': (generate_incidents, 'traffic_incidents'),
+    'drivers': (generate_drivers, 'drivers'),
+}
+
+
+def write_csv(chunks, path):
+    """Stream chunks into one CSV file"""
+    rows = 0
+    for i, chunk in enumerate(chunks):
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        rows += len(chunk)
+    return rows
+
+
+def write_parquet(chunks, path):
+    """Stream chunks into one Parquet file (requires pyarrow)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError('Parquet output requires pyarrow (pip install pyarrow)')
+
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def write_database(chunks, url, table):
+    """Stream chunks into an existing table of the app's schema"""
+    from sqlalchemy import create_engine
+
+    engine = create_engine(url)
+    if table in ('drivers', 'traffic_incidents'):
+        from models import db
+        db.metadata.create_all(engine, tables=[db.metadata.tables[table]])
+
+    rows = 0
+    with engine.begin() as conn:
+        for chunk in chunks:
+            chunk.to_sql(table, conn, if_exists='append', index=False, chunksize=50_000)
+            rows += len(chunk)
+    engine.dispose()
+    return rows
+
+
+def write(kind, rows, out, seed=42, chunk_size=DEFAULT_CHUNK_SIZE, table=None):
+    """Generate rows of a kind and stream them to a CSV/Parquet path or database URL"""
+    generator, default_table = GENERATORS[kind]
+    chunks = generator(rows, seed=seed, chunk_size=chunk_size)
+
+    if '://' in out:
+        table = table or default_table or 'traffic_observations'
+        return write_database(chunks, out, table)
+    if out.endswith('.parquet'):
+        return write_parquet(chunks, out)
+    return write_csv(chunks, out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('kind', choices=sorted(GENERATORS))
+    parser.add_argument('--rows', type=int, required=True)
+    parser.add_argument('--out', required=True, help='.csv, .parquet or a database URL')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--table', help='target table for database output')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    rows = write(args.kind, args.rows, args.out, args.seed, args.chunk_size, args.table)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Wrote {rows} {args.kind} rows to {args.out} in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
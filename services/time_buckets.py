@@ -0,0 +1,27 @@
+"""
+Time-of-day and weekday buckets shared by the dataset, the model and the OD matrices
+"""
+import numpy as np
+
+
+TIMES_OF_DAY = ('morning', 'afternoon', 'evening', 'night')
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+def time_of_day_for(hours):
+    """
+    The dataset's time-of-day label for an hour
+
+    Args:
+        hours: Hour of day (0-23), or an array of them
+
+    Returns:
+        str for a single hour, numpy array of labels for an array
+    """
+    hours = np.asarray(hours)
+    buckets = np.full(hours.shape, 3)
+    buckets[(hours >= 5) & (hours < 12)] = 0
+    buckets[(hours >= 12) & (hours < 17)] = 1
+    buckets[(hours >= 17) & (hours < 21)] = 2
+    labels = np.array(TIMES_OF_DAY)[buckets]
+    return str(labels) if labels.ndim == 0 else labels
\ No newline at end of file
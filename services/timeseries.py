@@ -0,0 +1,442 @@
+"""
+Day-partitioned time-series store for per-location speed and volume
+
+Observations are aggregated on write into 1 minute buckets and kept as
+columnar NumPy partitions, one directory per resolution and day:
+
+    data/timeseries/1m/2026-10-18/<segment>.npz
+    data/timeseries/15m/2026-10-18/compact.npz
+    data/timeseries/1h/2026-10-18/compact.npz
+
+Buckets store counts, speed sum/min/max and volume, so rolling 1m up to
+15m and 15m up to 1h is exact. Each resolution has its own retention;
+queries pick the finest resolution that keeps the result under
+MAX_POINTS, so a three-month chart reads hourly rows instead of raw data.
+
+Segment names start with their write time in nanoseconds. A rollup
+records the newest 1m segment it covered as the day's watermark, and
+coarse reads fold in 1m segments written after it, so they include data
+appended since the last rollup. Live probe pings reach the store through
+services.probe_feed; history is loaded with the import command.
+
+    python -m services.timeseries import traffic.csv
+    python -m services.timeseries rollup
+    python -m services.timeseries retention
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from config import Config
+
+
+# Resolution name -> bucket width in seconds, finest first
+RESOLUTIONS = {'1m': 60, '15m': 900, '1h': 3600}
+COLUMNS = ('bucket', 'count', 'speed_count', 'speed_sum', 'speed_min', 'speed_max', 'volume')
+COMPACT_FILE = 'compact.npz'
+WATERMARK_FILE = 'watermark.json'
+
+
+def _retention_days():
+    return {
+        '1m': Config.TIMESERIES_RETENTION_1M_DAYS,
+        '15m': Config.TIMESERIES_RETENTION_15M_DAYS,
+        '1h': Config.TIMESERIES_RETENTION_1H_DAYS
+    }
+
+
+def _aggregate(frame, seconds):
+    """Re-bucket aggregated rows to a coarser (or the same) resolution"""
+    if frame.empty:
+        return frame
+    frame = frame.assign(bucket=frame['bucket'] // seconds * seconds)
+    return frame.groupby(['location', 'bucket'], sort=True, observed=True).agg(
+        count=('count', 'sum'),
+        speed_count=('speed_count', 'sum'),
+        speed_sum=('speed_sum', 'sum'),
+        speed_min=('speed_min', 'min'),
+        speed_max=('speed_max', 'max'),
+        volume=('volume', 'sum')
+    ).reset_index()
+
+
+def _epoch(moment):
+    """Epoch seconds, reading naive datetimes as UTC"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def to_utc(moment):
+    """Naive UTC datetime; aware datetimes are converted, naive ones read as UTC"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _segment_time(name):
+    """Write time (ns) a segment name starts with; None for compacted files"""
+    if name == COMPACT_FILE or not name.endswith('.npz') or name.startswith('.'):
+        return None
+    try:
+        return int(name.split('-', 1)[0])
+    except ValueError:
+        return None
+
+
+def _empty_frame():
+    return pd.DataFrame({
+        'location': pd.Series(dtype=object),
+        'bucket': pd.Series(dtype=np.int64),
+        'count': pd.Series(dtype=np.int64),
+        'speed_count': pd.Series(dtype=np.int64),
+        'speed_sum': pd.Series(dtype=np.float64),
+        'speed_min': pd.Series(dtype=np.float32),
+        'speed_max': pd.Series(dtype=np.float32),
+        'volume': pd.Series(dtype=np.int64)
+    })
+
+
+class TimeSeriesStore:
+    """Append, roll up, expire and query day-partitioned traffic aggregates"""
+
+    MAX_POINTS = 2000
+
+    def __init__(self, root=None):
+        self.root = root or Config.TIMESERIES_DIR
+        self._lock = threading.Lock()
+
+    def _day_dir(self, resolution, day):
+        return os.path.join(self.root, resolution, day.isoformat())
+
+    def days(self, resolution):
+        """Days with a partition at a resolution, oldest first"""
+        path = os.path.join(self.root, resolution)
+        if not os.path.isdir(path):
+            return []
+        return sorted(date.fromisoformat(name) for name in os.listdir(path) if len(name) == 10)
+
+    def _write_segment(self, directory, frame, name=None):
+        os.makedirs(directory, exist_ok=True)
+        locations, codes = np.unique(frame['location'].to_numpy(dtype=str), return_inverse=True)
+        name = name or f'{time.time_ns()}-{uuid.uuid4().hex[:8]}.npz'
+        tmp_path = os.path.join(directory, f'.{name}.tmp')
+        with open(tmp_path, 'wb') as fh:
+            np.savez(
+                fh,
+                locations=locations,
+                location=codes.astype(np.int32),
+                **{column: frame[column].to_numpy() for column in COLUMNS}
+            )
+        os.replace(tmp_path, os.path.join(directory, name))
+
+    def _read_dir(self, directory, location=None, names=None):
+        if names is None:
+            names = os.listdir(directory) if os.path.isdir(directory) else []
+        frames = []
+        for name in sorted(names):
+            if not name.endswith('.npz') or name.startswith('.'):
+                continue
+            with np.load(os.path.join(directory, name)) as part:
+                locations = part['locations']
+                codes = part['location']
+                mask = slice(None)
+                if location is not None:
+                    match = np.flatnonzero(locations == location)
+                    if not match.size:
+                        continue
+                    mask = codes == match[0]
+                frame = pd.DataFrame({column: part[column][mask] for column in COLUMNS})
+                frame.insert(0, 'location', locations[codes[mask]])
+                frames.append(frame)
+        return pd.concat(frames, ignore_index=True) if frames else _empty_frame()
+
+    def watermark(self, resolution, day):
+        """Write time (ns) of the newest 1m segment merged into a day's partition, -1 if none"""
+        try:
+            with open(os.path.join(self._day_dir(resolution, day), WATERMARK_FILE)) as fh:
+                return json.load(fh)['watermark']
+        except (OSError, ValueError, KeyError):
+            return -1
+
+    def _set_watermark(self, resolution, day, watermark):
+        directory = self._day_dir(resolution, day)
+        tmp_path = os.path.join(directory, f'.{WATERMARK_FILE}.tmp')
+        with open(tmp_path, 'w') as fh:
+            json.dump({'watermark': watermark}, fh)
+        os.replace(tmp_path, os.path.join(directory, WATERMARK_FILE))
+
+    def _segments_after(self, day, watermark):
+        """1m segment names written after a watermark"""
+        directory = self._day_dir('1m', day)
+        names = os.listdir(directory) if os.path.isdir(directory) else []
+        return [name for name in names if (_segment_time(name) or -1) > watermark]
+
+    def read_day(self, resolution, day, location=None):
+        """
+        Aggregated rows for one day at a resolution
+
+        A rolled-up day also takes in the 1m segments appended since its
+        rollup, and a day not yet rolled up is derived on the fly from the
+        next finer resolution, so queries never miss recent data.
+        """
+        directory = self._day_dir(resolution, day)
+        if os.path.isdir(directory):
+            names = [name for name in os.listdir(directory) if name.endswith('.npz')]
+            frame = self._read_dir(directory, location, names)
+            fresh = []
+            if resolution != '1m':
+                fresh = self._segments_after(day, self.watermark(resolution, day))
+                if fresh:
+                    frame = pd.concat([frame, self._read_dir(self._day_dir('1m', day), location, fresh)],
+                                      ignore_index=True)
+            # Uncompacted segments may repeat buckets
+            return _aggregate(frame, RESOLUTIONS[resolution]) if len(names) + len(fresh) > 1 else frame
+
+        names = list(RESOLUTIONS)
+        index = names.index(resolution)
+        if index == 0:
+            return _empty_frame()
+        return _aggregate(self.read_day(names[index - 1], day, location), RESOLUTIONS[resolution])
+
+    def append(self, df):
+        """
+        Add observations to the 1 minute partitions
+
+        Args:
+            df: Rows with timestamp, location and avg_speed_kmh and/or
+                road_users (raw points), or already aggregated rows with
+                the bucket columns
+
+        Returns:
+            dict: Rows written and days touched
+        """
+        if df.empty:
+            return {'rows': 0, 'days': []}
+
+        if 'bucket' in df.columns:
+            frame = df[['location', *COLUMNS]]
+        else:
+            speed = df['avg_speed_kmh'].to_numpy(dtype=np.float64) if 'avg_speed_kmh' in df.columns \
+                else np.full(len(df), np.nan)
+            frame = pd.DataFrame({
+                'location': df['location'].to_numpy(dtype=str),
+                'bucket': pd.to_datetime(df['timestamp']).to_numpy('datetime64[s]').astype(np.int64),
+                'count': np.ones(len(df), dtype=np.int64),
+                # Volume-only sensor rows carry no speed
+                'speed_count': (~np.isnan(speed)).astype(np.int64),
+                'speed_sum': np.nan_to_num(speed),
+                'speed_min': speed.astype(np.float32),
+                'speed_max': speed.astype(np.float32),
+                'volume': df['road_users'].to_numpy(dtype=np.int64) if 'road_users' in df.columns
+                else np.zeros(len(df), dtype=np.int64)
+            })
+
+        frame = _aggregate(frame, RESOLUTIONS['1m'])
+        day_index = frame['bucket'] // 86400
+        touched = []
+        for day_number, part in frame.groupby(day_index):
+            day = date(1970, 1, 1) + timedelta(days=int(day_number))
+            self._write_segment(self._day_dir('1m', day), part)
+            touched.append(day.isoformat())
+        return {'rows': len(frame), 'days': touched}
+
+    def compact(self, resolution, day, names=None):
+        """
+        Merge a day's segments into one partition file
+
+        Args:
+            names: Segment names to merge (default: all of them)
+
+        Returns:
+            bool: Whether anything was merged
+        """
+        directory = self._day_dir(resolution, day)
+        if names is None:
+            names = [n for n in os.listdir(directory) if n.endswith('.npz')] if os.path.isdir(directory) else []
+        if len(names) <= 1:
+            return False
+        # Merge exactly the segments about to be removed; one appended
+        # meanwhile stays for the next compaction instead of counting twice
+        frame = _aggregate(self._read_dir(directory, names=names), RESOLUTIONS[resolution])
+        merged = max((_segment_time(name) or -1 for name in names), default=-1)
+        self._write_segment(directory, frame, COMPACT_FILE)
+        # Recorded after the merged file is in place and before its
+        # segments go, so a read never counts a segment twice
+        self._set_watermark(resolution, day, max(merged, self.watermark(resolution, day)))
+        for name in names:
+            if name != COMPACT_FILE:
+                os.remove(os.path.join(directory, name))
+        return True
+
+    def rollup(self):
+        """
+        Compact 1m partitions and roll every changed day up to 15m and 1h
+
+        Both coarse partitions are built from the compacted 1m day and
+        stamped with the newest segment it covers.
+
+        Returns:
+            dict: Days rolled up per target resolution
+        """
+        coarse = list(RESOLUTIONS)[1:]
+        rolled = {resolution: [] for resolution in coarse}
+        with self._lock:
+            for day in self.days('1m'):
+                source = self._day_dir('1m', day)
+                names = [name for name in os.listdir(source) if name.endswith('.npz')]
+                watermark = max(
+                    [self.watermark('1m', day)] + [_segment_time(name) or -1 for name in names]
+                )
+                if all(os.path.isdir(self._day_dir(resolution, day))
+                       and self.watermark(resolution, day) >= watermark for resolution in coarse):
+                    continue
+
+                if self.compact('1m', day, names):
+                    names = [COMPACT_FILE]
+                frame = self._read_dir(source, names=names)
+                for resolution in coarse:
+                    self._write_segment(
+                        self._day_dir(resolution, day), _aggregate(frame, RESOLUTIONS[resolution]), COMPACT_FILE
+                    )
+                    self._set_watermark(resolution, day, watermark)
+                    rolled[resolution].append(day.isoformat())
+        return rolled
+
+    def apply_retention(self, today=None):
+        """Drop partitions older than each resolution's retention"""
+        today = today or datetime.utcnow().date()
+        removed = {}
+        with self._lock:
+            for resolution, keep_days in _retention_days().items():
+                cutoff = today - timedelta(days=keep_days)
+                expired = [day for day in self.days(resolution) if day < cutoff]
+                for day in expired:
+                    shutil.rmtree(self._day_dir(resolution, day), ignore_errors=True)
+                removed[resolution] = [day.isoformat() for day in expired]
+        return removed
+
+    def choose_resolution(self, start, end, today=None):
+        """Finest retained resolution that keeps the point count under MAX_POINTS"""
+        today = today or datetime.utcnow().date()
+        span = max((end - start).total_seconds(), 1)
+        retention = _retention_days()
+        for resolution, seconds in RESOLUTIONS.items():
+            retained = start.date() >= today - timedelta(days=retention[resolution])
+            if retained and span / seconds <= self.MAX_POINTS:
+                return resolution
+        return list(RESOLUTIONS)[-1]
+
+    def query(self, location, start, end, resolution=None):
+        """
+        Speed and volume series for a location
+
+        Args:
+            location: Location label as stored
+            start: Range start (datetime, inclusive)
+            end: Range end (datetime, exclusive)
+            resolution: '1m', '15m', '1h' or None to choose automatically
+
+        Returns:
+            dict: Resolution used and the points in time order
+
+        Raises:
+            ValueError: Unknown resolution, or one that would return more
+                than MAX_POINTS points over the range
+        """
+        start, end = to_utc(start), to_utc(end)
+        resolution = resolution or self.choose_resolution(start, end)
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f'Unknown resolution: {resolution}')
+        if (end - start).total_seconds() / RESOLUTIONS[resolution] > self.MAX_POINTS:
+            raise ValueError(
+                f'Range too long for {resolution} resolution (at most {self.MAX_POINTS} points); '
+                'use a coarser resolution or a shorter range'
+            )
+
+        lo, hi = _epoch(start), _epoch(end)
+        frames = []
+        day = start.date()
+        while day <= end.date():
+            frame = self.read_day(resolution, day, location)
+            if not frame.empty:
+                frames.append(frame[(frame['bucket'] >= lo) & (frame['bucket'] < hi)])
+            day += timedelta(days=1)
+
+        points = []
+        if frames:
+            frame = pd.concat(frames, ignore_index=True).sort_values('bucket')
+            with np.errstate(invalid='ignore', divide='ignore'):
+                average = np.round(frame['speed_sum'] / frame['speed_count'], 2)
+            for bucket, count, avg, low, high, volume in zip(
+                frame['bucket'], frame['count'], average,
+                frame['speed_min'], frame['speed_max'], frame['volume']
+            ):
+                points.append({
+                    'time': datetime.utcfromtimestamp(int(bucket)).isoformat() + 'Z',
+                    'observations': int(count),
+                    'avg_speed_kmh': None if np.isnan(avg) else float(avg),
+                    'min_speed_kmh': None if np.isnan(low) else float(low),
+                    'max_speed_kmh': None if np.isnan(high) else float(high),
+                    'volume': int(volume)
+                })
+
+        return {
+            'location': location,
+            'resolution': resolution,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'points': points
+        }
+
+
+# Create singleton instance
+timeseries_store = TimeSeriesStore()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['import', 'rollup', 'retention'])
+    parser.add_argument('path', nargs='?', help='CSV with timestamp, location, avg_speed_kmh, road_users')
+    parser.add_argument('--root', help='store directory')
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    store = TimeSeriesStore(args.root)
+    started = time.perf_counter()
+    if args.command == 'import':
+        if not args.path:
+            parser.error('import needs a CSV path')
+        rows = 0
+        for chunk in pd.read_csv(
+            args.path, usecols=['timestamp', 'location', 'avg_speed_kmh', 'road_users'],
+            chunksize=args.chunk_rows
+        ):
+            rows += store.append(chunk)['rows']
+        result = {'minute_rows': rows}
+    elif args.command == 'rollup':
+        result = store.rollup()
+    else:
+        result = store.apply_retention()
+
+    result['seconds'] = round(time.perf_counter() - started, 2)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
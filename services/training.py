@@ -0,0 +1,372 @@
+"""
+Incremental training pipeline for TrafficPredictor
+
+New traffic data lands as partition files (one CSV per day, e.g.
+data/partitions/2026-10-18.csv). Each run reads only partitions the
+manifest has not seen, warm-starts extra trees on them and promotes the
+candidate only if it does at least as well on a holdout as the current
+model. Promoted models are also exported as a compiled forest
+(services.compiled_forest) for memory-mapped serving, and the cluster
+model pointer is moved to it (services.cluster).
+
+A --full retrain is held to the same holdout comparison; the current
+model has usually seen the holdout rows already, so the check favours it
+and --force skips it. A window that cannot be read or trained on is
+recorded as failed in the manifest and is not retried by incremental
+runs (a --full run reads it again).
+
+Partitions are streamed in chunks with compact dtypes and can be sampled,
+so a full retrain on a year of data only holds the sampled rows in memory.
+Forests fit on every core; --search runs a hyperparameter grid across a
+process pool before the final fit.
+
+    python -m services.training            # incremental run
+    python -m services.training --full     # retrain from every partition
+    python -m services.training --full --force   # ...and promote it regardless
+    python -m services.training --full --max-rows 5000000 --search
+"""
+import argparse
+import copy
+import itertools
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from config import Config
+from services.ai_service import TRAINING_DTYPES, TrafficPredictor
+from services.cluster import version_coordinator
+
+
+# Grid for --search; each candidate is a small forest fitted in its own process
+SEARCH_GRID = {
+    'max_depth': [None, 12, 20],
+    'min_samples_leaf': [1, 5],
+    'max_features': ['sqrt', None]
+}
+SEARCH_TREES = 30
+
+# Set in each pool worker by _init_search_worker so the matrices are
+# inherited once instead of pickled with every task
+_search_data = None
+
+
+def _init_search_worker(X_train, y_train, X_val, y_val):
+    global _search_data
+    _search_data = (X_train, y_train, X_val, y_val)
+
+
+def _evaluate_params(params):
+    from sklearn.ensemble import RandomForestClassifier
+
+    X_train, y_train, X_val, y_val = _search_data
+    model = RandomForestClassifier(n_estimators=SEARCH_TREES, random_state=42, n_jobs=1, **params)
+    model.fit(X_train, y_train)
+    return params, float((model.predict(X_val) == y_val).mean())
+
+
+def peak_memory_mb():
+    """Peak resident set size of this process and of finished pool workers"""
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'self': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        'children': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1)
+    }
+
+
+def _concat(chunks):
+    """Concatenate chunks, keeping categorical columns categorical"""
+    if not chunks:
+        return pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in TRAINING_DTYPES.items()})
+    columns = {}
+    for name in chunks[0].columns:
+        parts = [chunk[name] for chunk in chunks]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            columns[name] = pd.api.types.union_categoricals(parts, ignore_order=True)
+        else:
+            columns[name] = np.concatenate([part.to_numpy() for part in parts])
+    return pd.DataFrame(columns)
+
+
+class TrainingPipeline:
+    """Reads new partitions, trains a candidate and promotes it after validation"""
+
+    def __init__(self, partitions_dir=None, model_path=None, manifest_path=None,
+                 n_jobs=None, chunk_rows=None, compiled_path=None):
+        self.partitions_dir = partitions_dir or Config.TRAINING_PARTITIONS_DIR
+        self.model_path = model_path or Config.MODEL_PATH
+        self.compiled_path = compiled_path or Config.COMPILED_MODEL_PATH
+        self.manifest_path = manifest_path or Config.TRAINING_MANIFEST_PATH
+        self.n_jobs = n_jobs or Config.TRAINING_N_JOBS
+        self.chunk_rows = chunk_rows or Config.TRAINING_CHUNK_ROWS
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path) as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return {'model_version': 0, 'partitions': {}, 'history': []}
+
+    def _save_manifest(self, manifest):
+        os.makedirs(os.path.dirname(self.manifest_path) or '.', exist_ok=True)
+        tmp_path = f'{self.manifest_path}.tmp'
+        with open(tmp_path, 'w') as fh:
+            json.dump(manifest, fh, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def list_partitions(self):
+        if not os.path.isdir(self.partitions_dir):
+            return []
+        return sorted(f for f in os.listdir(self.partitions_dir) if f.endswith('.csv'))
+
+    def new_partitions(self, manifest=None):
+        manifest = manifest or self.load_manifest()
+        return [p for p in self.list_partitions() if p not in manifest['partitions']]
+
+    def iter_chunks(self, names):
+        """Stream the model's columns from each partition in compact chunks"""
+        for name in names:
+            yield from pd.read_csv(
+                os.path.join(self.partitions_dir, name),
+                usecols=list(TRAINING_DTYPES),
+                dtype=TRAINING_DTYPES,
+                chunksize=self.chunk_rows
+            )
+
+    def estimate_rows(self, names):
+        """Row count estimated from file sizes and the first partition's line length"""
+        paths = [os.path.join(self.partitions_dir, name) for name in names]
+        if not paths:
+            return 0
+        with open(paths[0], 'rb') as fh:
+            fh.readline()
+            head = fh.read(1 << 16)
+        lines = max(head.count(b'\n'), 1)
+        return int(sum(os.path.getsize(path) for path in paths) / (len(head) / lines))
+
+    def read_partitions(self, names, sample_fraction=1.0, max_rows=None, seed=42):
+        """
+        Read partitions chunk by chunk, keeping a random sample of rows
+
+        Args:
+            names: Partition file names
+            sample_fraction: Share of rows to keep (Bernoulli sample per chunk)
+            max_rows: Upper bound on rows kept; lowers the sample fraction
+                from an estimate of the total so the sample stays spread
+                across every partition instead of the first few
+
+        Returns:
+            DataFrame: Sampled rows in TRAINING_DTYPES
+        """
+        if max_rows:
+            sample_fraction = min(sample_fraction, max_rows / max(self.estimate_rows(names), 1))
+
+        rng = np.random.default_rng(seed)
+        chunks = []
+        kept = 0
+        for chunk in self.iter_chunks(names):
+            if sample_fraction < 1.0:
+                chunk = chunk[rng.random(len(chunk)) < sample_fraction]
+            if max_rows and kept + len(chunk) > max_rows:
+                chunk = chunk.iloc[:max_rows - kept]
+            chunks.append(chunk)
+            kept += len(chunk)
+            if max_rows and kept >= max_rows:
+                break
+        return _concat(chunks)
+
+    @staticmethod
+    def split_holdout(df, fraction, seed=42):
+        """Random train/holdout split"""
+        rng = np.random.default_rng(seed)
+        mask = rng.random(len(df)) < fraction
+        return df[~mask], df[mask]
+
+    def search(self, df, grid=None, holdout_fraction=0.2):
+        """
+        Evaluate a hyperparameter grid in parallel processes
+
+        Args:
+            df: Training rows (a further validation split is taken from them)
+            grid: Parameter name -> candidate values (defaults to SEARCH_GRID)
+            holdout_fraction: Share of df used to score each candidate
+
+        Returns:
+            dict: Best parameters and every candidate's validation accuracy
+        """
+        grid = grid or SEARCH_GRID
+        candidates = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+        train_df, val_df = self.split_holdout(df, holdout_fraction, seed=7)
+        encoder = TrafficPredictor()
+        encoder.fit_encoders(train_df)
+        known = (
+            val_df['location'].isin(encoder.label_encoders['location'].classes_)
+            & val_df['time_of_day'].isin(encoder.label_encoders['time'].classes_)
+        )
+        val_df = val_df[known]
+        initargs = (
+            encoder._features(train_df), train_df[TrafficPredictor.TARGET].to_numpy(),
+            encoder._features(val_df), val_df[TrafficPredictor.TARGET].to_numpy()
+        )
+
+        workers = os.cpu_count() if self.n_jobs < 0 else self.n_jobs
+        with ProcessPoolExecutor(
+            max_workers=max(1, min(workers, len(candidates))),
+            initializer=_init_search_worker,
+            initargs=initargs
+        ) as pool:
+            results = list(pool.map(_evaluate_params, candidates))
+
+        best_params, best_score = max(results, key=lambda item: item[1])
+        return {
+            'best_params': best_params,
+            'best_accuracy': round(best_score, 4),
+            'candidates': [{'params': p, 'accuracy': round(a, 4)} for p, a in results]
+        }
+
+    def _record(self, manifest, names, status, **details):
+        for name in names:
+            manifest['partitions'][name] = {
+                'status': status,
+                'consumed_at': datetime.utcnow().isoformat()
+            }
+        entry = {
+            'status': status,
+            'partitions': names,
+            'model_version': manifest['model_version'],
+            'at': datetime.utcnow().isoformat(),
+            **details
+        }
+        manifest['history'] = (manifest['history'] + [entry])[-50:]
+        self._save_manifest(manifest)
+        return entry
+
+    def run(self, full=False, n_new_trees=None, max_trees=None, holdout_fraction=None,
+            sample_fraction=None, max_rows=None, search=False, force=False):
+        """
+        Run one training cycle
+
+        Args:
+            full: Refit from every partition instead of only new ones
+            n_new_trees: Trees to warm-start on the new window
+            max_trees: Cap on forest size (oldest trees are dropped)
+            holdout_fraction: Share of the new rows held out for validation
+            sample_fraction: Share of partition rows to train on
+            max_rows: Cap on rows read across all partitions
+            search: Run the hyperparameter search before a full fit
+            force: Promote without comparing against the current model
+
+        Returns:
+            dict: Outcome ('promoted', 'rejected', 'failed' or 'up_to_date')
+        """
+        n_new_trees = n_new_trees or Config.TRAINING_NEW_TREES
+        max_trees = max_trees or Config.TRAINING_MAX_TREES
+        if holdout_fraction is None:
+            holdout_fraction = Config.TRAINING_HOLDOUT_FRACTION
+        if sample_fraction is None:
+            sample_fraction = Config.TRAINING_SAMPLE_FRACTION
+        max_rows = max_rows or Config.TRAINING_MAX_ROWS or None
+
+        manifest = self.load_manifest()
+        current = None
+        if os.path.exists(self.model_path):
+            current = TrafficPredictor.load(self.model_path)
+
+        mode = 'full' if full or current is None else 'incremental'
+        names = self.list_partitions() if mode == 'full' else self.new_partitions(manifest)
+        if not names:
+            return {'success': True, 'status': 'up_to_date', 'model_version': manifest['model_version']}
+
+        started = time.perf_counter()
+        search_result = None
+        try:
+            df = self.read_partitions(names, sample_fraction, max_rows)
+            read_seconds = time.perf_counter() - started
+            train_df, holdout_df = self.split_holdout(df, holdout_fraction)
+            del df
+
+            if mode == 'full':
+                params = {}
+                if search:
+                    search_result = self.search(train_df)
+                    params = search_result['best_params']
+                candidate = TrafficPredictor(n_jobs=self.n_jobs, **params).fit(train_df)
+            else:
+                candidate = copy.deepcopy(current)
+                candidate.n_jobs = self.n_jobs
+                candidate.update(train_df, n_new_trees, max_trees)
+        except ValueError as e:
+            # Bad data fails the same way every time, so incremental runs
+            # skip the window from now on; partitions a promoted model
+            # already consumed keep their status
+            failed = [name for name in names if name not in manifest['partitions']]
+            entry = self._record(manifest, failed, 'failed', mode=mode, error=str(e))
+            return {'success': False, 'error': str(e), **entry}
+
+        candidate_score = candidate.score(holdout_df)
+        current_score = current.score(holdout_df) if current is not None and not force else None
+        details = {
+            'mode': mode,
+            'rows': len(train_df) + len(holdout_df),
+            'holdout_rows': len(holdout_df),
+            'trees': len(candidate.model.estimators_),
+            'candidate_accuracy': round(candidate_score, 4),
+            'current_accuracy': round(current_score, 4) if current_score is not None else None,
+            'training_seconds': round(time.perf_counter() - started, 3),
+            'read_seconds': round(read_seconds, 3),
+            'peak_memory_mb': peak_memory_mb(),
+            'n_jobs': self.n_jobs
+        }
+        if search_result is not None:
+            details['search'] = search_result
+
+        if current_score is not None and candidate_score < current_score - Config.TRAINING_PROMOTION_TOLERANCE:
+            entry = self._record(manifest, names, 'rejected', **details)
+            return {'success': True, **entry}
+
+        candidate.save(self.model_path)
+        candidate.export_compiled(self.compiled_path)
+        manifest['model_version'] += 1
+        # Every node switches to the new forest on its next version sync
+        details['serving_version'] = version_coordinator.promote('model', path=self.compiled_path)['version']
+        entry = self._record(manifest, names, 'promoted', **details)
+        return {'success': True, **entry}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--full', action='store_true', help='retrain from every partition')
+    parser.add_argument('--new-trees', type=int, help='trees to add per incremental run')
+    parser.add_argument('--max-trees', type=int, help='cap on forest size')
+    parser.add_argument('--sample-fraction', type=float, help='share of rows to train on')
+    parser.add_argument('--max-rows', type=int, help='cap on rows read across partitions')
+    parser.add_argument('--search', action='store_true', help='hyperparameter search before a full fit')
+    parser.add_argument('--force', action='store_true', help='promote without the holdout comparison')
+    parser.add_argument('--n-jobs', type=int, help='cores to use (-1 for all)')
+    parser.add_argument('--chunk-rows', type=int, help='rows per streamed chunk')
+    args = parser.parse_args(argv)
+
+    pipeline = TrainingPipeline(n_jobs=args.n_jobs, chunk_rows=args.chunk_rows)
+    result = pipeline.run(
+        args.full, args.new_trees, args.max_trees,
+        sample_fraction=args.sample_fraction, max_rows=args.max_rows, search=args.search,
+        force=args.force
+    )
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Config is read at import time; keep tests off the network and the real database
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('POLYGON_RPC_URL', 'http://127.0.0.1:9')
+os.environ.setdefault('STATE_BACKEND_URL', 'memory://')
+os.environ.setdefault('SCHEDULER_ENABLED', 'False')
+os.environ.setdefault('TIMESERIES_DIR', tempfile.mkdtemp(prefix='timeseries-'))
+os.environ.setdefault('LOCK_DIR', tempfile.mkdtemp(prefix='locks-'))
+
+
+@pytest.fixture
+def db_app(tmp_path):
+    """Bare Flask app with the models on a throwaway SQLite database"""
+    from flask import Flask
+    from models import db
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'test.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
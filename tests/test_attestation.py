@@ -0,0 +1,131 @@
+from datetime import date
+
+import pytest
+from eth_utils import keccak
+
+from benchmarks.stub_rpc import StubRPCServer
+from config import Config
+from models import db, AttestationBatch, Driver
+from services import attestation
+from services.attestation import MerkleTree, leaf_hash, record_hash, verify_proof
+from services.polygon_service import PolygonService
+
+
+def _records(n):
+    return ['0x' + keccak(str(i).encode()).hex() for i in range(n)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 7, 8, 13])
+def test_every_proof_verifies(size):
+    records = _records(size)
+    tree = MerkleTree([leaf_hash(record) for record in records])
+    for index, record in enumerate(records):
+        assert verify_proof(record, tree.proof(index), tree.root)
+
+
+def test_odd_node_is_carried_up():
+    records = _records(5)
+    tree = MerkleTree([leaf_hash(record) for record in records])
+    # The fifth leaf has no sibling on the first two levels
+    assert len(tree.proof(4)) == 1
+    assert verify_proof(records[4], tree.proof(4), tree.root)
+
+
+def test_tampered_record_or_proof_fails():
+    records = _records(6)
+    tree = MerkleTree([leaf_hash(record) for record in records])
+    proof = tree.proof(2)
+
+    assert not verify_proof(records[3], proof, tree.root)
+    assert not verify_proof('0x' + keccak(b'forged').hex(), proof, tree.root)
+    assert not verify_proof(records[2], proof[:-1], tree.root)
+    assert not verify_proof(records[2], list(reversed(proof)) + [proof[0]], tree.root)
+    assert not verify_proof(records[2], ['not hex'], tree.root)
+
+
+def test_empty_tree_is_rejected():
+    with pytest.raises(ValueError):
+        MerkleTree([])
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    """PolygonService against the stub RPC node, signing with a throwaway key"""
+    def connect(receipt_status=1):
+        stub = StubRPCServer(receipt_status=receipt_status).start()
+        stubs.append(stub)
+        monkeypatch.setattr(Config, 'POLYGON_RPC_URL', stub.url)
+        monkeypatch.setattr(Config, 'PRIVATE_KEY', '0x' + '11' * 32)
+        service = PolygonService()
+        monkeypatch.setattr(attestation, 'polygon_service', service)
+        return stub
+
+    stubs = []
+    yield connect
+    for stub in stubs:
+        stub.stop()
+
+
+def _add_drivers(n):
+    drivers = []
+    for i in range(n):
+        driver = Driver(
+            first_name='Ada', last_name=f'Driver{i}', email=f'driver{i}@example.com', phone='+2348000000000',
+            license_number=f'LIC{i:05d}', license_expiry=date(2030, 1, 1), vehicle_plate=f'LAG-{i:03d}-AA',
+            insurance_provider='Leadway', insurance_expiry=date(2030, 1, 1), road_cert_number=f'RC{i}',
+            cert_expiry=date(2030, 1, 1), wallet_address='0x' + f'{i:040x}'
+        )
+        driver.record_hash = record_hash(driver)
+        db.session.add(driver)
+        drivers.append(driver)
+    db.session.commit()
+    return drivers
+
+
+def test_flush_anchors_pending_records(db_app, chain):
+    stub = chain()
+    drivers = _add_drivers(5)
+
+    result = attestation.attestation_service.flush()
+
+    assert result['success']
+    assert len(stub.transactions) == 1
+    batch = db.session.get(AttestationBatch, result['batch']['id'])
+    assert batch.size == 5 and batch.transaction_hash in stub.transactions
+    for driver in drivers:
+        assert attestation.attestation_service.verify(driver)['verified']
+    assert attestation.attestation_service.pending_count() == 0
+    assert attestation.attestation_service.flush() is None
+
+
+def test_flush_respects_max_size(db_app, chain):
+    chain()
+    _add_drivers(5)
+
+    batches = [attestation.attestation_service.flush(max_size=2) for _ in range(3)]
+
+    assert [batch['batch']['size'] for batch in batches] == [2, 2, 1]
+    assert attestation.attestation_service.pending_count() == 0
+
+
+def test_edited_record_no_longer_verifies(db_app, chain):
+    chain()
+    driver = _add_drivers(3)[1]
+    attestation.attestation_service.flush()
+
+    driver.vehicle_plate = 'LAG-999-ZZ'
+    db.session.commit()
+
+    assert not attestation.attestation_service.verify(driver)['verified']
+
+
+def test_reverted_anchor_leaves_records_pending(db_app, chain):
+    stub = chain(receipt_status=0)
+    _add_drivers(3)
+
+    result = attestation.attestation_service.flush()
+
+    assert not result['success']
+    assert len(stub.transactions) == 1
+    assert AttestationBatch.query.count() == 0
+    assert attestation.attestation_service.pending_count() == 3
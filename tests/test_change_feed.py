@@ -0,0 +1,67 @@
+from datetime import date
+
+from services.change_feed import DriverChangeFeed
+
+
+def _driver(license_number):
+    from models import Driver
+
+    return Driver(
+        first_name='Ada', last_name='Okafor', email=f'{license_number}@example.com',
+        phone='+2348000000000', license_number=license_number, license_expiry=date(2030, 1, 1),
+        vehicle_plate='KJA-123AA', insurance_provider='Leadway', insurance_expiry=date(2030, 1, 1),
+        road_cert_number='RW-0001', cert_expiry=date(2030, 1, 1)
+    )
+
+
+def _ops(page):
+    return [
+        (change['op'], change['driver']['license_number'] if change['op'] == 'upsert' else change['license_number'])
+        for change in page['changes']
+    ]
+
+
+def test_upserts_and_tombstones_come_back_in_seq_order(db_app):
+    from models import db
+
+    feed = DriverChangeFeed()
+    assert feed.changes() == {'changes': [], 'cursor': 0, 'more': False}
+
+    first, second, third = _driver('LAG-1'), _driver('LAG-2'), _driver('LAG-3')
+    db.session.add_all([first, second, third])
+    db.session.commit()
+    first.phone = '+2348111111111'
+    db.session.commit()
+    db.session.delete(second)
+    db.session.commit()
+
+    page = feed.changes()
+    seqs = [change['seq'] for change in page['changes']]
+    assert seqs == sorted(seqs) and len(set(seqs)) == 3
+    # An updated driver appears once, at its latest seq, after the untouched one
+    assert _ops(page) == [('upsert', 'LAG-3'), ('upsert', 'LAG-1'), ('delete', 'LAG-2')]
+    assert page['changes'][1]['driver']['phone'] == '+2348111111111'
+    assert page['cursor'] == seqs[-1] == feed.latest_seq()
+    assert feed.changes(since=page['cursor']) == {'changes': [], 'cursor': page['cursor'], 'more': False}
+
+
+def test_paging_resumes_from_the_cursor(db_app):
+    from models import Driver, db
+
+    feed = DriverChangeFeed()
+    db.session.add_all([_driver(f'LAG-{i}') for i in range(5)])
+    db.session.commit()
+    db.session.delete(Driver.query.filter_by(license_number='LAG-0').one())
+    db.session.commit()
+
+    seen, cursor, more = [], 0, True
+    while more:
+        page = feed.changes(since=cursor, limit=2)
+        assert len(page['changes']) <= 2
+        seen += [change['seq'] for change in page['changes']]
+        cursor, more = page['cursor'], page['more']
+
+    assert seen == sorted(seen)
+    # Four live drivers and one tombstone
+    assert len(seen) == 5
+    assert cursor == feed.latest_seq()
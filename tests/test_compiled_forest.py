@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from services.compiled_forest import CompiledForest
+
+
+@pytest.fixture(scope='module')
+def forest():
+    rng = np.random.default_rng(7)
+    # Integer-valued features, like the encoded traffic columns, so many
+    # rows sit exactly on a split threshold
+    X = np.column_stack([
+        rng.integers(0, 30, 3000), rng.integers(0, 4, 3000),
+        rng.integers(0, 7, 3000), rng.integers(1, 11, 3000)
+    ]).astype(np.float32)
+    y = (X[:, 0] + 3 * X[:, 1] + X[:, 2] * X[:, 3] + rng.integers(0, 5, 3000)).astype(int) % 10
+    model = RandomForestClassifier(n_estimators=25, max_depth=12, random_state=0).fit(X, y)
+    X_test = np.vstack([X[:500], rng.uniform(-1, 31, (1500, 4)).astype(np.float32)])
+    return model, X_test
+
+
+def assert_matches(compiled, model, X):
+    assert np.array_equal(compiled.predict_proba(X), model.predict_proba(X))
+    assert np.array_equal(compiled.predict(X), model.predict(X))
+
+
+def test_compiled_forest_matches_sklearn(forest):
+    model, X = forest
+    assert_matches(CompiledForest.compile(model), model, X)
+
+
+def test_compiled_forest_matches_across_row_blocks(forest, monkeypatch):
+    model, X = forest
+    monkeypatch.setattr(CompiledForest, 'BLOCK_ROWS', 64)
+    assert_matches(CompiledForest.compile(model), model, X)
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_saved_forest_matches_sklearn(forest, tmp_path, mmap):
+    model, X = forest
+    path = str(tmp_path / 'forest.json')
+    CompiledForest.compile(model).save(path)
+
+    loaded, header = CompiledForest.load(path, mmap=mmap)
+    assert isinstance(loaded.nodes, np.memmap) == mmap
+    assert header['version']
+    assert_matches(loaded, model, X)
+
+
+def test_save_keeps_previous_generation(forest, tmp_path):
+    model, X = forest
+    path = str(tmp_path / 'forest.json')
+    smaller = RandomForestClassifier(n_estimators=3, random_state=1).fit(X[:200], model.predict(X[:200]))
+    other = RandomForestClassifier(n_estimators=4, random_state=2).fit(X[:200], model.predict(X[:200]))
+
+    first = CompiledForest.compile(model).save(path)
+    second = CompiledForest.compile(smaller).save(path)
+    # A worker that read the first header can still open its node file
+    assert os.path.exists(first) and os.path.exists(second)
+
+    third = CompiledForest.compile(other).save(path)
+    assert not os.path.exists(first)
+    assert os.path.exists(second) and os.path.exists(third)
@@ -0,0 +1,114 @@
+import zlib
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from config import Config
+from services.credentials import (
+    CredentialService, b45decode, b45encode, decode_credential, is_revoked, verify_credential
+)
+
+
+NOW = datetime(2026, 10, 18, 8, 0, 0)
+SIGNING_KEY = '0x' + '22' * 32
+
+
+@pytest.fixture
+def service():
+    return CredentialService(signing_key=SIGNING_KEY)
+
+
+def _driver(license_number='LAG-0001', expiry=date(2030, 1, 1), **fields):
+    from models import Driver, db
+
+    driver = Driver(
+        first_name='Ada', last_name='Okafor', email=f'{license_number}@example.com',
+        phone='+2348000000000', license_number=license_number, license_expiry=expiry,
+        vehicle_plate='KJA-123AA', insurance_provider='Leadway', insurance_expiry=date(2030, 1, 1),
+        road_cert_number='RW-0001', cert_expiry=date(2030, 1, 1), **fields
+    )
+    db.session.add(driver)
+    db.session.commit()
+    return driver
+
+
+@pytest.mark.parametrize('data', [b'', b'\x00', b'\xff\xff', b'TRAC credential \x00\x01\x02'])
+def test_base45_round_trip(data):
+    encoded = b45encode(data)
+    assert set(encoded) <= set('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:')
+    assert b45decode(encoded) == data
+
+
+def test_issued_credential_verifies_offline(db_app, service):
+    tx = '0x' + 'ab' * 32
+    driver = _driver(blockchain_tx=tx)
+    issued = service.issue(driver, now=NOW)
+
+    result = verify_credential(issued['credential'], service.issuer, now=NOW + timedelta(days=1))
+    assert result['valid']
+    credential = result['credential']
+    assert credential['serial'] == issued['serial']
+    assert credential['license_number'] == 'LAG-0001'
+    assert credential['full_name'] == 'Ada Okafor'
+    assert (credential['anchor_type'], credential['anchor']) == ('transaction', tx)
+    assert credential['expires_at'] == NOW + timedelta(days=Config.CREDENTIAL_TTL_DAYS)
+
+
+def test_expiry_is_cut_short_by_documents(db_app, service):
+    driver = _driver(expiry=(NOW + timedelta(days=3)).date())
+    issued = service.issue(driver, now=NOW)
+
+    # Documents lapse at the start of their expiry date
+    assert issued['expires_at'] == datetime(2026, 10, 21)
+    later = verify_credential(issued['credential'], service.issuer, now=NOW + timedelta(days=4))
+    assert later['reason'] == 'credential_expired'
+
+
+def test_other_issuer_or_tampering_fails(db_app, service):
+    issued = service.issue(_driver(), now=NOW)
+    other = CredentialService(signing_key='0x' + '33' * 32)
+
+    assert verify_credential(issued['credential'], other.issuer, now=NOW)['reason'] == 'bad_signature'
+
+    raw = bytearray(b45decode(issued['credential'][len('TRAC1:'):]))
+    raw[-70] ^= 1
+    tampered = 'TRAC1:' + b45encode(bytes(raw))
+    assert verify_credential(tampered, service.issuer, now=NOW)['reason'] == 'bad_signature'
+    assert verify_credential('TRAC1:%%', service.issuer, now=NOW)['reason'].startswith('malformed')
+
+
+def test_revocation_round_trip(db_app, service):
+    first, second = _driver('LAG-0001'), _driver('LAG-0002')
+    kept = service.issue(first, now=NOW)
+    revoked = [service.issue(second, now=NOW), service.issue(second, now=NOW)]
+
+    assert service.revoke_driver(second, reason='fraud') == [c['serial'] for c in revoked]
+    assert service.revoke_driver(second) == []
+
+    seq, bitmap = service.revocation_bitmap()
+    assert seq == 2
+    assert zlib.decompress(service.export_bitmap()[1]) == bitmap
+    assert [is_revoked(bitmap, c['serial']) for c in [kept] + revoked] == [False, True, True]
+    assert service.revocations_since(1) == [revoked[1]['serial']]
+
+    check = verify_credential(revoked[0]['credential'], service.issuer, bitmap, now=NOW)
+    assert check['reason'] == 'revoked'
+    assert verify_credential(kept['credential'], service.issuer, bitmap, now=NOW)['valid']
+
+    with pytest.raises(ValueError):
+        service.issue(second, now=NOW)
+
+
+def test_disabled_without_a_key(monkeypatch):
+    monkeypatch.setattr(Config, 'CREDENTIAL_SIGNING_KEY', None)
+    monkeypatch.setattr(Config, 'DEBUG', False)
+    service = CredentialService()
+
+    assert not service.enabled
+    with pytest.raises(RuntimeError):
+        service.issue(None)
+
+
+def test_decode_rejects_other_prefixes():
+    with pytest.raises(ValueError):
+        decode_credential('HC1:abc')
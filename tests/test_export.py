@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from config import Config
+
+
+ADMIN = {'X-Admin-Token': 'test-admin'}
+
+
+@pytest.fixture
+def client(db_app, monkeypatch):
+    from routes.admin import admin_bp
+
+    monkeypatch.setattr(Config, 'ADMIN_TOKEN', 'test-admin')
+    db_app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    return db_app.test_client()
+
+
+def _incidents(*locations):
+    from models import TrafficIncident, db
+
+    db.session.add_all([
+        TrafficIncident(
+            location=location, latitude=6.6, longitude=-3.35, incident_type='collision',
+            severity='minor', time_of_day='morning', incident_date=datetime(2026, 10, 18, 8, 0)
+        )
+        for location in locations
+    ])
+    db.session.commit()
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_ndjson_export_sends_last_id_and_end_line(client, monkeypatch):
+    monkeypatch.setattr(Config, 'EXPORT_CHUNK_ROWS', 2)
+    _incidents('Ikeja', 'Yaba', 'Lekki', 'Ikoyi', 'Surulere')
+
+    response = client.get('/api/admin/export/incidents', headers=ADMIN)
+    lines = _lines(response)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['X-Last-Id'] == '5'
+    assert [line['location'] for line in lines[:-1]] == ['Ikeja', 'Yaba', 'Lekki', 'Ikoyi', 'Surulere']
+    assert lines[-1] == {'op': 'end', 'rows': 5, 'last_id': 5}
+
+
+def test_resume_after_id_with_limit(client):
+    _incidents('Ikeja', 'Yaba', 'Lekki', 'Ikoyi', 'Surulere')
+
+    response = client.get('/api/admin/export/incidents?after_id=2&limit=2', headers=ADMIN)
+    lines = _lines(response)
+
+    assert response.headers['X-Last-Id'] == '4'
+    assert [line['id'] for line in lines[:-1]] == [3, 4]
+    assert lines[-1] == {'op': 'end', 'rows': 2, 'last_id': 4}
+
+
+def test_empty_export(client):
+    response = client.get('/api/admin/export/incidents', headers=ADMIN)
+
+    assert response.headers['X-Last-Id'] == ''
+    assert _lines(response) == [{'op': 'end', 'rows': 0, 'last_id': None}]
+
+
+def test_csv_export_quotes_formula_cells(client):
+    _incidents('=HYPERLINK("http://evil")', '+1', '@SUM(A1)', '-2', 'Ikeja')
+
+    response = client.get('/api/admin/export/incidents?format=csv', headers=ADMIN)
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+
+    assert response.mimetype == 'text/csv'
+    assert response.headers['X-Last-Id'] == '5'
+    assert rows[0][:3] == ['id', 'location', 'latitude']
+    assert [row[1] for row in rows[1:]] == ["'=HYPERLINK(\"http://evil\")", "'+1", "'@SUM(A1)", "'-2", 'Ikeja']
+    # Only text is quoted; a negative number is left alone
+    row = dict(zip(rows[0], rows[-1]))
+    assert (row['id'], row['longitude'], row['incident_date']) == ('5', '-3.35', '2026-10-18T08:00:00')
+
+
+def test_unknown_dataset_or_format_and_missing_token(client):
+    assert client.get('/api/admin/export/users', headers=ADMIN).status_code == 400
+    assert client.get('/api/admin/export/incidents?format=xml', headers=ADMIN).status_code == 400
+    assert client.get('/api/admin/export/incidents').status_code == 403
@@ -0,0 +1,63 @@
+import pytest
+
+from services.gazetteer import Gazetteer, normalize_place_name
+
+
+PLACES = [
+    {'id': 'ikeja', 'name': 'Ikeja', 'aliases': ['Ikeja GRA'], 'lat': 6.60, 'lng': 3.35},
+    {'id': 'ikoyi', 'name': 'Ikoyi', 'lat': 6.45, 'lng': 3.43},
+    {'id': 'ikorodu', 'name': 'Ikorodu', 'lat': 6.62, 'lng': 3.51},
+    {'id': 'vi', 'name': 'Victoria Island', 'aliases': ['VI', 'V.I.'], 'lat': 6.43, 'lng': 3.42},
+    {'id': 'yaba', 'name': 'Yaba', 'lat': 6.51, 'lng': 3.38, 'kind': 'district'},
+]
+
+
+@pytest.fixture
+def gazetteer():
+    index = Gazetteer()
+    index.build(PLACES)
+    return index
+
+
+def test_normalize_strips_punctuation_and_case():
+    assert normalize_place_name('  V.I.,  Lagos ') == 'v i lagos'
+    assert normalize_place_name(None) == ''
+
+
+def test_autocomplete_walks_the_prefix_in_rank_order(gazetteer):
+    assert [place['id'] for place in gazetteer.autocomplete('ik')] == ['ikeja', 'ikoyi', 'ikorodu']
+    assert [place['id'] for place in gazetteer.autocomplete('iko')] == ['ikoyi', 'ikorodu']
+    assert [place['id'] for place in gazetteer.autocomplete('IK', limit=1)] == ['ikeja']
+
+
+def test_autocomplete_matches_aliases(gazetteer):
+    assert [place['id'] for place in gazetteer.autocomplete('v i')] == ['vi']
+
+
+def test_autocomplete_falls_back_to_fuzzy(gazetteer):
+    assert gazetteer.autocomplete('yabba')[0]['id'] == 'yaba'
+    assert gazetteer.autocomplete('') == []
+
+
+def test_resolve_exact_alias_and_misspelling(gazetteer):
+    assert gazetteer.resolve('Victoria Island')['id'] == 'vi'
+    assert gazetteer.resolve('v.i.')['id'] == 'vi'
+    assert gazetteer.resolve('Ikorodo')['id'] == 'ikorodu'
+    assert gazetteer.resolve('Victoria Islnd')['id'] == 'vi'
+
+
+def test_resolve_refuses_distant_text(gazetteer):
+    assert gazetteer.resolve('Abuja Central') is None
+    assert gazetteer.canonical_name('Abuja Central') == 'Abuja Central'
+    assert gazetteer.canonical_name('ikeja gra') == 'Ikeja'
+
+
+def test_public_hides_rank(gazetteer):
+    place = gazetteer.resolve('Yaba')
+    assert place == {
+        'id': 'yaba',
+        'name': 'Yaba',
+        'aliases': [],
+        'coordinates': {'lat': 6.51, 'lng': 3.38},
+        'kind': 'district'
+    }
@@ -0,0 +1,100 @@
+import gzip
+from datetime import datetime
+
+import pytest
+from flask import Flask, jsonify
+
+from services import http_cache
+from services.http_cache import conditional, init_compression
+
+
+@pytest.fixture
+def state():
+    return {'version': 'v1', 'calls': 0}
+
+
+@pytest.fixture
+def client(state):
+    app = Flask(__name__)
+
+    def version():
+        return state['version'], datetime(2026, 10, 18, 8, 0, 0, 123456)
+
+    @app.route('/hotspots')
+    @conditional(version)
+    def hotspots():
+        state['calls'] += 1
+        return jsonify({'rows': ['x' * 40] * 50})
+
+    @app.route('/uncached')
+    @conditional(lambda: (None, None))
+    def uncached():
+        return jsonify({'ok': True})
+
+    init_compression(app)
+    return app.test_client()
+
+
+def test_etag_round_trip_answers_304_without_running_the_view(client, state):
+    first = client.get('/hotspots')
+    etag = first.headers['ETag']
+
+    assert first.status_code == 200
+    assert etag.startswith('W/"')
+    assert first.headers['Cache-Control'] == 'no-cache'
+    assert first.headers['Last-Modified'] == 'Sun, 18 Oct 2026 08:00:00 GMT'
+
+    again = client.get('/hotspots', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == etag
+    assert state['calls'] == 1
+
+
+def test_etag_changes_with_version_and_query(client, state):
+    etag = client.get('/hotspots').headers['ETag']
+
+    assert client.get('/hotspots?limit=5').headers['ETag'] != etag
+    state['version'] = 'v2'
+    changed = client.get('/hotspots', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+def test_if_modified_since_without_etag(client):
+    fresh = client.get('/hotspots', headers={'If-Modified-Since': 'Sun, 18 Oct 2026 08:00:00 GMT'})
+    stale = client.get('/hotspots', headers={'If-Modified-Since': 'Sun, 18 Oct 2026 07:59:59 GMT'})
+
+    assert fresh.status_code == 304
+    assert stale.status_code == 200
+
+
+def test_unversioned_response_has_no_validators(client):
+    response = client.get('/uncached', headers={'If-None-Match': '*'})
+
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip', 'gzip'),
+    ('gzip;q=1.0, br;q=0.5', 'gzip'),
+    ('br;q=0.2, gzip;q=0.8', 'gzip'),
+    ('gzip;q=0, identity', None),
+    ('deflate', None),
+])
+def test_compression_follows_accept_encoding_q_values(client, monkeypatch, header, expected):
+    monkeypatch.setattr(http_cache, 'brotli', None)
+    response = client.get('/hotspots', headers={'Accept-Encoding': header})
+
+    assert response.headers.get('Content-Encoding') == expected
+    assert 'Accept-Encoding' in response.headers['Vary']
+    if expected == 'gzip':
+        assert gzip.decompress(response.get_data()).startswith(b'{"rows"')
+
+
+def test_brotli_wins_a_tie_when_available(client):
+    pytest.importorskip('brotli')
+    response = client.get('/hotspots', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    lower = client.get('/hotspots', headers={'Accept-Encoding': 'br;q=0.2, gzip;q=0.8'})
+    assert lower.headers['Content-Encoding'] == 'gzip'
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from services.live_updates import LiveUpdateBroker
+
+
+@pytest.fixture
+def broker():
+    return LiveUpdateBroker()
+
+
+def _drain(subscription):
+    messages = []
+    while True:
+        message = subscription.get(timeout=0)
+        if message is None:
+            return messages
+        messages.append(message)
+
+
+def _sequences(messages):
+    return [json.loads(m.decode().split('data: ', 1)[1])['sequence'] for m in messages]
+
+
+def test_publish_reaches_topic_and_wildcard_subscribers(broker):
+    ikeja = broker.subscribe(['ikeja'])
+    yaba = broker.subscribe(['yaba'])
+    everything = broker.subscribe([])
+
+    assert broker.publish('ikeja', 'congestion', {'level': 7}) == 2
+
+    message = _drain(ikeja)
+    assert len(message) == 1
+    assert message[0].startswith(b'id: 1\nevent: congestion\ndata: ')
+    assert json.loads(message[0].decode().split('data: ', 1)[1]) == {
+        'topic': 'ikeja', 'sequence': 1, 'data': {'level': 7}
+    }
+    assert _drain(yaba) == []
+    assert _drain(everything) == message
+
+
+def test_unsubscribe_stops_delivery(broker):
+    subscription = broker.subscribe(['ikeja'])
+    subscription.close()
+
+    assert broker.publish('ikeja', 'congestion', {}) == 0
+    assert broker.stats()['subscriptions'] == 0
+
+
+def test_reconnect_replays_only_missed_topic_messages(broker):
+    broker.publish('ikeja', 'congestion', {})
+    broker.publish('yaba', 'congestion', {})
+    broker.publish('ikeja', 'incident', {})
+    broker.publish('lekki', 'congestion', {})
+
+    assert _sequences(_drain(broker.subscribe(['ikeja', 'yaba'], last_event_id=1))) == [2, 3]
+    assert _sequences(_drain(broker.subscribe(['*'], last_event_id=2))) == [3, 4]
+    assert _drain(broker.subscribe(['ikeja'])) == []
+
+
+def test_lagging_subscriber_drops_oldest(broker):
+    broker.MAX_PENDING = 2
+    subscription = broker.subscribe(['ikeja'])
+    for _ in range(3):
+        broker.publish('ikeja', 'congestion', {})
+
+    assert _sequences(_drain(subscription)) == [2, 3]
+    assert subscription.dropped == 1
+
+
+def test_stream_heartbeats_and_unsubscribes_on_close(broker):
+    broker.HEARTBEAT_SECONDS = 0
+    subscription = broker.subscribe(['ikeja'])
+    stream = broker.stream(subscription)
+
+    assert next(stream) == b'retry: 5000\n\n'
+    assert next(stream).startswith(b': heartbeat ')
+    broker.publish('ikeja', 'congestion', {})
+    assert next(stream).startswith(b'id: 1\n')
+
+    stream.close()
+    assert broker.stats()['topics'] == {}
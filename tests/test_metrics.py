@@ -0,0 +1,64 @@
+import pytest
+
+from services.metrics import MetricsRegistry
+
+
+def _worker(directory):
+    registry = MetricsRegistry()
+    registry.directory = str(directory)
+    requests = registry.counter('requests_total', 'Requests', ('endpoint',))
+    latency = registry.histogram('latency_seconds', 'Latency', (), buckets=(0.1, 1.0))
+    return registry, requests, latency
+
+
+def _series(text):
+    return dict(line.rsplit(' ', 1) for line in text.splitlines() if not line.startswith('#'))
+
+
+def test_render_sums_worker_snapshots(tmp_path, monkeypatch):
+    first, first_requests, first_latency = _worker(tmp_path)
+    second, second_requests, second_latency = _worker(tmp_path)
+
+    first_requests.inc('a', amount=2)
+    first_latency.observe(0.05)
+    monkeypatch.setattr('os.getpid', lambda: 1001)
+    first.flush(force=True)
+
+    second_requests.inc('a')
+    second_requests.inc('b')
+    second_latency.observe(0.5)
+    monkeypatch.setattr('os.getpid', lambda: 1002)
+
+    # The answering worker uses its live values, not its own (absent) snapshot
+    series = _series(second.render())
+    assert series['requests_total{endpoint="a"}'] == '3'
+    assert series['requests_total{endpoint="b"}'] == '1'
+    assert series['latency_seconds_bucket{le="0.1"}'] == '1'
+    assert series['latency_seconds_bucket{le="1"}'] == '2'
+    assert series['latency_seconds_count'] == '2'
+    assert float(series['latency_seconds_sum']) == pytest.approx(0.55)
+
+
+def test_flush_is_throttled(tmp_path, monkeypatch):
+    registry, requests, _ = _worker(tmp_path)
+    registry.flush_seconds = 60
+    monkeypatch.setattr('os.getpid', lambda: 1001)
+
+    requests.inc('a')
+    registry.flush(force=True)
+    requests.inc('a')
+    registry.flush()
+    registry._pending.cancel()
+
+    reader, _, _ = _worker(tmp_path)
+    monkeypatch.setattr('os.getpid', lambda: 1002)
+    assert _series(reader.render())['requests_total{endpoint="a"}'] == '1'
+
+
+def test_without_directory_only_local_values(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter('requests_total', 'Requests').inc()
+    registry.flush(force=True)
+
+    assert list(tmp_path.iterdir()) == []
+    assert _series(registry.render())['requests_total'] == '1'
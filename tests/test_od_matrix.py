@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from scipy.sparse.csgraph import dijkstra
+
+from services.od_matrix import ODMatrix, all_pairs
+from services.routing import route_engine, _TIME
+
+
+def _dijkstra_minutes(n, edge_from, edge_to, minutes):
+    dense = np.full((n, n), np.inf)
+    np.minimum.at(dense, (edge_from, edge_to), minutes)
+    np.minimum.at(dense, (edge_to, edge_from), minutes)
+    return dijkstra(np.where(np.isinf(dense), 0, dense), directed=True)
+
+
+def test_all_pairs_matches_dijkstra_on_random_graph():
+    rng = np.random.default_rng(3)
+    n = 12
+    edge_from = rng.integers(0, n, 40)
+    edge_to = (edge_from + rng.integers(1, n, 40)) % n
+    minutes = rng.uniform(1, 20, 40)
+
+    matrix = all_pairs(n, edge_from, edge_to, minutes, minutes * 0.5, np.zeros(40))
+
+    assert np.allclose(matrix[0], _dijkstra_minutes(n, edge_from, edge_to, minutes))
+    # Distance and risk follow the chosen path
+    assert np.allclose(matrix[1], matrix[0] * 0.5)
+
+
+def test_query_matches_route_search_on_road_network(db_app):
+    network = route_engine.network
+    if network.n_edges == 0:
+        pytest.skip('road network not available')
+
+    od = ODMatrix()
+    exposure = route_engine.incident_exposure()
+    od.matrix = od.build(None, exposure)
+
+    forecast = od._forecasts(None)[od.bucket('evening', 4)]
+    costs = route_engine.link_costs(*route_engine.node_congestion(forecast), exposure)
+    expected = _dijkstra_minutes(len(network.node_ids), network.edge_from, network.edge_to, costs[_TIME, :-1])
+
+    zones = list(range(min(8, len(network.node_ids))))
+    result = od.query(zones, zones, 'evening', 4)
+    for i in zones:
+        for j in zones:
+            value = result['time_min'][i][j]
+            if np.isinf(expected[i, j]):
+                assert value is None
+            else:
+                assert value == pytest.approx(expected[i, j], abs=0.01)
+    assert result['distance_km'][0][0] == 0
+
+
+def test_unreadable_pointer_is_served_locally_and_retried(tmp_path, monkeypatch):
+    builds = []
+
+    def build(self, table=None, exposure=None):
+        builds.append(1)
+        return np.zeros((3, 28, 2, 2), dtype=np.float32)
+
+    monkeypatch.setattr(ODMatrix, 'build', build)
+    od = ODMatrix()
+    pointer = {'version': 'published', 'path': str(tmp_path / 'missing.npy'),
+               'zones': ['a', 'b'], 'source': 'model'}
+
+    od.ensure(pointer)
+    assert od.version != 'published'
+    assert od.source == 'historical'
+    od.ensure(pointer)
+    assert len(builds) == 1
+
+    np.save(pointer['path'], np.ones((3, 28, 2, 2), dtype=np.float32))
+    od.ensure(pointer)
+    assert od.version == 'published'
+    assert od.matrix[0, 0, 0, 1] == 1
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from services.probe_feed import SlidingWindowAggregator, ping_error
+
+
+NOW = 1_000_000.0
+
+
+@pytest.fixture
+def aggregator():
+    return SlidingWindowAggregator(window_seconds=300, slot_seconds=60, free_flow_kmh=60)
+
+
+def test_window_sums_speed_and_volume_per_segment(aggregator):
+    accepted = aggregator.add(
+        rows=[0, 0, 1, 1],
+        timestamps=[NOW - 10, NOW - 70, NOW - 5, NOW],
+        speeds=[20.0, 40.0, np.nan, 50.0],
+        volumes=[1, 1, 12, 1],
+        now=NOW
+    )
+    speed_sum, speed_count, volume = aggregator.window(2, NOW)
+
+    assert accepted == 4
+    assert speed_sum.tolist() == [60.0, 50.0]
+    assert speed_count.tolist() == [2, 1]
+    assert volume.tolist() == [2, 13]
+
+
+def test_pings_outside_the_window_are_dropped(aggregator):
+    accepted = aggregator.add([0, 0, -1], [NOW - 400, NOW + 120, NOW], [30.0] * 3, [1] * 3, NOW)
+
+    assert accepted == 0
+    assert aggregator.window(1, NOW)[2].tolist() == [0]
+
+
+def test_reused_slot_starts_from_zero(aggregator):
+    aggregator.add([0], [NOW], [30.0], [5], NOW)
+    later = NOW + 300
+    aggregator.add([0], [later], [10.0], [2], later)
+
+    speed_sum, speed_count, volume = aggregator.window(1, later)
+    assert (speed_sum.tolist(), speed_count.tolist(), volume.tolist()) == ([10.0], [1], [2])
+
+
+def test_window_expires_old_slots(aggregator):
+    aggregator.add([0], [NOW], [30.0], [5], NOW)
+
+    assert aggregator.window(1, NOW + 240)[2].tolist() == [5]
+    assert aggregator.window(1, NOW + 360)[2].tolist() == [0]
+
+
+def test_congestion_level_scales_with_speed(aggregator):
+    levels = aggregator.congestion_level(np.array([60.0, 30.0, 0.0, 90.0]))
+    assert levels.tolist() == [1, 5, 10, 1]
+
+
+@pytest.mark.parametrize('ping', [
+    {'segment': 'Ikeja', 'speed_kmh': 30},
+    {'segment': 'Ikeja', 'count': 0},
+    {'lat': 6.6, 'lng': 3.35, 'speed_kmh': 42.5, 'timestamp': NOW},
+])
+def test_well_formed_pings_pass(ping):
+    assert ping_error(ping) is None
+
+
+@pytest.mark.parametrize('ping, field', [
+    ({'segment': 'Ikeja', 'count': -5}, 'count'),
+    ({'segment': 'Ikeja', 'count': 10 ** 9}, 'count'),
+    ({'segment': 'Ikeja', 'count': 2.5}, 'count'),
+    ({'segment': 'Ikeja', 'count': True}, 'count'),
+    ({'segment': 'Ikeja', 'speed_kmh': -1}, 'speed_kmh'),
+    ({'segment': 'Ikeja', 'speed_kmh': 900}, 'speed_kmh'),
+    ({'segment': 'Ikeja', 'speed_kmh': float('nan')}, 'speed_kmh'),
+    ({'segment': 'Ikeja', 'speed_kmh': '30'}, 'speed_kmh'),
+    ({'segment': 'Ikeja', 'timestamp': 'now'}, 'timestamp'),
+    ({'lat': 'x', 'lng': 3.35}, 'lat'),
+])
+def test_invalid_pings_are_refused(ping, field):
+    assert ping_error(ping).startswith(field)
@@ -0,0 +1,120 @@
+import time
+
+import pytest
+from flask import Flask, Response, jsonify
+
+from config import Config
+from services import rate_limit
+from services.rate_limit import BULK, CRITICAL, NORMAL, LoadShedder, init_rate_limiting, priority_for
+from services.state_backend import InProcessBackend
+
+
+def test_priority_classes():
+    assert priority_for('/api/verify/ABC123') == CRITICAL
+    assert priority_for('/api/predict/route') == NORMAL
+    assert priority_for('/api/predict/probes') == BULK
+    assert priority_for('/api/predict/stream') == BULK
+    assert priority_for('/api/admin/export/drivers') == BULK
+
+
+def test_shedder_keeps_reserved_slots_for_critical():
+    shedder = LoadShedder(max_in_flight=4, reserved_critical=2, target_delay=0.1)
+
+    assert shedder.admit(NORMAL) and shedder.admit(NORMAL)
+    assert not shedder.admit(NORMAL)
+    assert shedder.admit(CRITICAL) and shedder.admit(CRITICAL)
+    assert not shedder.admit(CRITICAL)
+
+    shedder.release()
+    assert shedder.admit(CRITICAL)
+
+
+def test_shedder_turns_away_bulk_before_normal():
+    shedder = LoadShedder(max_in_flight=100, reserved_critical=0, target_delay=0.1)
+    # Each sample pulls the estimate 20% of the way to 0.15s (1.5x target)
+    for _ in range(20):
+        shedder.admit(CRITICAL, queue_delay=0.15)
+        shedder.release(queue_delay=0.15)
+
+    assert 1.0 < shedder.pressure <= 1.5
+    assert not shedder.admit(BULK)
+    assert shedder.admit(NORMAL)
+    assert shedder.admit(CRITICAL, queue_delay=10.0)
+
+
+def test_shedder_delay_decays_with_time(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(rate_limit.time, 'monotonic', lambda: clock[0])
+    shedder = LoadShedder(max_in_flight=100, reserved_critical=0, target_delay=0.1)
+    shedder.admit(CRITICAL, queue_delay=1.0)
+    assert not shedder.admit(BULK)
+
+    clock[0] += 10 * LoadShedder.DELAY_HALF_LIFE
+    assert shedder.admit(BULK)
+
+
+def test_unreserved_admission_holds_no_slot():
+    shedder = LoadShedder(max_in_flight=3, reserved_critical=1, target_delay=0.1)
+    for _ in range(10):
+        assert shedder.admit(BULK, reserve=False)
+    assert shedder.in_flight == 0
+
+
+@pytest.fixture
+def limited_app(monkeypatch):
+    monkeypatch.setattr(Config, 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setattr(Config, 'RATE_LIMIT_NORMAL', '1/2')
+    monkeypatch.setattr(Config, 'API_KEYS', {'known-key'})
+    monkeypatch.setattr(rate_limit, 'state_backend', InProcessBackend())
+    monkeypatch.setattr(rate_limit, 'load_shedder', LoadShedder(max_in_flight=8, reserved_critical=2))
+
+    app = Flask(__name__)
+    init_rate_limiting(app)
+
+    @app.route('/api/predict/route')
+    def route():
+        return jsonify({'success': True})
+
+    @app.route('/api/predict/stream')
+    def stream():
+        assert rate_limit.load_shedder.in_flight == 0
+        return Response(iter(['data: x\n\n']), mimetype='text/event-stream')
+
+    return app.test_client()
+
+
+def test_token_bucket_per_client(limited_app):
+    first = {'REMOTE_ADDR': '10.0.0.1'}
+    statuses = [limited_app.get('/api/predict/route', environ_base=first).status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+
+    response = limited_app.get('/api/predict/route', environ_base=first)
+    assert response.headers['Retry-After'] == '1'
+    assert limited_app.get('/api/predict/route', environ_base={'REMOTE_ADDR': '10.0.0.2'}).status_code == 200
+
+
+def test_unknown_api_keys_share_the_address_bucket(limited_app):
+    spoofed = [
+        limited_app.get('/api/predict/route', headers={'X-API-Key': f'made-up-{i}'},
+                        environ_base={'REMOTE_ADDR': '10.0.0.3'}).status_code
+        for i in range(3)
+    ]
+    assert spoofed == [200, 200, 429]
+
+    known = limited_app.get('/api/predict/route', headers={'X-API-Key': 'known-key'},
+                            environ_base={'REMOTE_ADDR': '10.0.0.3'})
+    assert known.status_code == 200
+
+
+def test_stream_is_not_counted_in_flight(limited_app):
+    response = limited_app.get('/api/predict/stream')
+    assert response.status_code == 200
+    assert rate_limit.load_shedder.in_flight == 0
+
+
+def test_untrusted_request_start_header_is_ignored(limited_app, monkeypatch):
+    monkeypatch.setattr(Config, 'TRUSTED_PROXIES', set())
+    stale = f't={time.time() - 3600:.3f}'
+    response = limited_app.get('/api/predict/route', headers={'X-Request-Start': stale})
+    assert response.status_code == 200
+    assert rate_limit.load_shedder.delay_ewma == 0
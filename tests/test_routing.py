@@ -0,0 +1,135 @@
+from itertools import permutations
+
+import numpy as np
+import pytest
+
+from services.routing import RoadNetwork, RouteEngine
+
+
+def _place(place_id, lat, lng):
+    return {'id': place_id, 'name': place_id.title(), 'coordinates': {'lat': lat, 'lng': lng}}
+
+
+PLACES = [_place('a', 6.50, 3.30), _place('b', 6.51, 3.31), _place('c', 6.49, 3.31), _place('d', 6.50, 3.32)]
+
+# At 60 km/h a link's free-flow minutes equal its length in km
+LINKS = [('a', 'b', 1.0), ('b', 'd', 1.0), ('a', 'c', 2.0), ('c', 'd', 2.2), ('b', 'c', 0.5)]
+
+
+def _network(links=LINKS, places=PLACES):
+    network = RoadNetwork()
+    network.build(places, {'edges': [
+        {'from': u, 'to': v, 'distance_km': km, 'free_flow_kmh': 60, 'road': f'{u}{v}'} for u, v, km in links
+    ]})
+    return network
+
+
+def _minutes(network, edges):
+    return round(float(network.free_flow_min[list(edges)].sum()), 6)
+
+
+def _all_simple_paths(network, source, target):
+    """Every loopless path by brute force, as node tuples"""
+    others = [n for n in range(len(network.node_ids)) if n not in (source, target)]
+    linked = {frozenset((u, v)) for u, v in zip(network.edge_from, network.edge_to)}
+    paths = []
+    for size in range(len(others) + 1):
+        for middle in permutations(others, size):
+            nodes = (source,) + middle + (target,)
+            if all(frozenset(pair) in linked for pair in zip(nodes, nodes[1:])):
+                paths.append(nodes)
+    return paths
+
+
+def test_paths_come_back_loopless_in_free_flow_order():
+    network = _network()
+    a, d = network.node_index['a'], network.node_index['d']
+    paths = network.k_shortest_paths(a, d, 10)
+
+    names = [''.join(network.node_ids[n] for n in nodes) for nodes, _ in paths]
+    assert names == ['abd', 'acbd', 'abcd', 'acd']
+    assert [_minutes(network, edges) for _, edges in paths] == [2.0, 3.5, 3.7, 4.2]
+    assert sorted(nodes for nodes, _ in paths) == sorted(_all_simple_paths(network, a, d))
+    for nodes, edges in paths:
+        assert len(set(nodes)) == len(nodes)
+        assert [{network.edge_from[e], network.edge_to[e]} for e in edges] == \
+            [set(pair) for pair in zip(nodes, nodes[1:])]
+
+
+def test_k_caps_the_paths_and_is_cached():
+    network = _network()
+    paths = network.k_shortest_paths(0, 3, 2)
+
+    assert [_minutes(network, edges) for _, edges in paths] == [2.0, 3.5]
+    assert network.k_shortest_paths(0, 3, 2) is paths
+
+
+def test_unreachable_or_same_place_has_no_paths():
+    network = _network(LINKS[:1] + LINKS[2:3], PLACES)
+    assert network.k_shortest_paths(0, 3, 3) == []
+    assert network.k_shortest_paths(0, 0, 3) == []
+
+
+@pytest.fixture
+def engine():
+    engine = RouteEngine()
+    engine.network = _network()
+    return engine
+
+
+def _exposure(network, weight):
+    return {
+        'key': 'test', 'source': 'incidents', 'incidents': int(sum(weight)),
+        'weight': list(weight), 'count': [int(w) for w in weight], 'density_tertiles': [0.5, 1.0]
+    }
+
+
+def test_plan_trades_time_against_risk(engine):
+    network = engine.network
+    # Incidents on the direct link b-d only
+    weight = [0.0] * network.n_edges
+    weight[network.edge_road.index('bd')] = 10.0
+    exposure = _exposure(network, weight)
+
+    fastest = engine.plan('a', 'd', 'fastest', exposure=exposure)
+    safest = engine.plan('a', 'd', 'safest', exposure=exposure)
+
+    assert fastest[0]['via'] == ['a', 'b', 'd'] and fastest[0]['recommended']
+    # The quickest detour around b-d
+    assert safest[0]['via'] == ['a', 'b', 'c', 'd']
+    assert [route['recommended'] for route in safest] == [True] + [False] * (len(safest) - 1)
+    assert 'fastest' in fastest[0]['best_for']
+
+
+def test_plan_with_a_single_route(engine):
+    engine.network = _network(LINKS[:2], PLACES[:2] + PLACES[3:])
+    routes = engine.plan('a', 'd', exposure=_exposure(engine.network, [0.0, 0.0]))
+
+    assert len(routes) == 1
+    route = routes[0]
+    assert route['recommended']
+    assert route['via'] == ['a', 'b', 'd']
+    assert route['distance_km'] == 2.0
+    assert set(route['best_for']) == {'fastest', 'safest', 'balanced'}
+    assert not np.isnan(list(route['scores'].values())).any()
+    assert engine.plan('a', 'zz') is None
+
+
+def test_route_endpoint_with_a_single_route(db_app, monkeypatch):
+    import routes.prediction as prediction
+
+    single = {
+        'name': 'Ikeja → Allen Avenue → Yaba', 'congestion_level': 4, 'historical_accidents': 2,
+        'estimated_time_min': 18, 'distance_km': 9.5, 'accident_risk': 'LOW', 'recommended': True
+    }
+    monkeypatch.setattr(prediction, 'predict_best_route', lambda *args, **kwargs: [single])
+    db_app.register_blueprint(prediction.prediction_bp, url_prefix='/api/predict')
+
+    response = db_app.test_client().post('/api/predict/route', json={'start': 'Ikeja', 'end': 'Yaba'})
+    data = response.get_json()['data']
+
+    assert response.status_code == 200
+    assert data['recommendation'] == 'main'
+    assert data['alternative_route'] is None
+    assert data['time_difference_minutes'] == 0
+    assert data['main_route']['estimated_time_minutes'] == 18
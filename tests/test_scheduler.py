@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+from config import Config
+from services.scheduler import Scheduler
+from services.state_backend import InProcessBackend, host_lock
+
+
+@pytest.fixture(autouse=True)
+def lock_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'LOCK_DIR', str(tmp_path))
+
+
+def test_exclusive_job_does_not_overlap_across_unshared_backends():
+    # Two workers with memory:// backends both claim the slot
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def rollup():
+        runs.append(threading.current_thread().name)
+        started.set()
+        release.wait(5)
+
+    first, second = Scheduler(backend=InProcessBackend()), Scheduler(backend=InProcessBackend())
+    for scheduler in (first, second):
+        scheduler.add('rollup', rollup, interval=60, publish=False, exclusive=True)
+
+    worker = threading.Thread(target=first.run_due, kwargs={'now': 120.0})
+    worker.start()
+    assert started.wait(5)
+    assert second.run_due(now=120.0) == []
+    release.set()
+    worker.join()
+
+    assert len(runs) == 1
+
+
+def test_exclusive_job_runs_when_lock_is_free():
+    scheduler = Scheduler(backend=InProcessBackend())
+    runs = []
+    scheduler.add('rollup', lambda: runs.append(1), interval=60, publish=False, exclusive=True)
+
+    assert scheduler.run_due(now=120.0) == ['rollup']
+    assert scheduler.run_due(now=180.0) == ['rollup']
+    assert runs == [1, 1]
+
+
+def test_host_lock_is_exclusive():
+    with host_lock('job') as held:
+        assert held
+        with host_lock('job') as again:
+            assert not again
+        with host_lock('other') as other:
+            assert other
+    with host_lock('job') as held:
+        assert held
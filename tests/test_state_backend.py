@@ -0,0 +1,141 @@
+import os
+
+import pytest
+
+from services import state_backend as backends
+from services.state_backend import InProcessBackend, SQLiteBackend, RedisBackend
+
+
+class Clock:
+    """Stands in for time.time so TTL expiry needs no sleeping"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(backends.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return InProcessBackend()
+    if request.param == 'sqlite':
+        return SQLiteBackend(str(tmp_path / 'state.db'))
+    url = os.environ.get('TEST_REDIS_URL')
+    if not url:
+        pytest.skip('TEST_REDIS_URL not set')
+    redis_backend = RedisBackend(url)
+    redis_backend.client.flushdb()
+    return redis_backend
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def test_get_set_delete(backend):
+    assert backend.get('missing') is None
+    assert backend.set('key', 'one')
+    assert _text(backend.get('key')) == 'one'
+    assert backend.set('key', 'two')
+    assert _text(backend.get('key')) == 'two'
+    assert backend.delete('key')
+    assert not backend.delete('key')
+    assert backend.get('key') is None
+
+
+def test_set_nx_only_when_absent(backend):
+    assert backend.set('lock', 'a', nx=True)
+    assert not backend.set('lock', 'b', nx=True)
+    assert _text(backend.get('lock')) == 'a'
+    backend.delete('lock')
+    assert backend.set('lock', 'b', nx=True)
+
+
+def test_ttl_expiry(backend, clock):
+    if isinstance(backend, RedisBackend):
+        pytest.skip('Redis expires keys on its own clock')
+    backend.set('short', 'x', ttl=10)
+    backend.set('forever', 'y')
+    clock.now += 9
+    assert _text(backend.get('short')) == 'x'
+    clock.now += 2
+    assert backend.get('short') is None
+    assert _text(backend.get('forever')) == 'y'
+
+
+def test_set_nx_takes_over_expired_key(backend, clock):
+    if isinstance(backend, RedisBackend):
+        pytest.skip('Redis expires keys on its own clock')
+    assert backend.set('lock', 'a', ttl=5, nx=True)
+    clock.now += 6
+    assert backend.set('lock', 'b', ttl=5, nx=True)
+    assert _text(backend.get('lock')) == 'b'
+
+
+def test_incr(backend):
+    assert backend.incr('counter') == 1
+    assert backend.incr('counter') == 2
+    assert backend.incr('counter', 5) == 7
+    assert int(backend.get('counter')) == 7
+
+
+def test_incr_keeps_ttl(backend, clock):
+    if isinstance(backend, RedisBackend):
+        pytest.skip('Redis expires keys on its own clock')
+    backend.set('counter', 1, ttl=10)
+    assert backend.incr('counter') == 2
+    clock.now += 11
+    assert backend.get('counter') is None
+    assert backend.incr('counter') == 1
+
+
+def test_take_tokens_burst_then_refill(backend):
+    now = 1000.0
+    results = [backend.take_tokens('client', rate=2, burst=3, now=now) for _ in range(4)]
+
+    assert [allowed for allowed, _, _ in results] == [True, True, True, False]
+    allowed, tokens, retry_after = results[-1]
+    assert tokens == pytest.approx(0)
+    assert retry_after == pytest.approx(0.5)
+
+    # Half a second refills one token at 2/s
+    assert backend.take_tokens('client', rate=2, burst=3, now=now + 0.5)[0]
+    assert not backend.take_tokens('client', rate=2, burst=3, now=now + 0.5)[0]
+
+    # A long idle period refills only up to burst
+    allowed, tokens, _ = backend.take_tokens('client', rate=2, burst=3, now=now + 100)
+    assert allowed and tokens == pytest.approx(2)
+
+
+def test_take_tokens_buckets_are_independent(backend):
+    for _ in range(2):
+        backend.take_tokens('a', rate=1, burst=2, now=10.0)
+    assert not backend.take_tokens('a', rate=1, burst=2, now=10.0)[0]
+    assert backend.take_tokens('b', rate=1, burst=2, now=10.0)[0]
+
+
+def test_take_tokens_cost(backend):
+    allowed, tokens, _ = backend.take_tokens('bulk', rate=1, burst=10, cost=4, now=0.0)
+    assert allowed and tokens == pytest.approx(6)
+    allowed, tokens, retry_after = backend.take_tokens('bulk', rate=1, burst=10, cost=8, now=0.0)
+    assert not allowed and retry_after == pytest.approx(2)
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'shared.db')
+    first, second = SQLiteBackend(path), SQLiteBackend(path)
+
+    assert first.set('lock', 'a', nx=True)
+    assert not second.set('lock', 'b', nx=True)
+    assert first.incr('n') == 1 and second.incr('n') == 2
+    first.take_tokens('client', rate=1, burst=1, now=5.0)
+    assert not second.take_tokens('client', rate=1, burst=1, now=5.0)[0]
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from services.timeseries import TimeSeriesStore
+
+
+START = datetime(2026, 10, 18, 8, 0)
+
+
+def _pings(minute, volume, speed=30.0, location='Ikeja'):
+    return pd.DataFrame({
+        'timestamp': [START + timedelta(minutes=minute)],
+        'location': [location],
+        'avg_speed_kmh': [speed],
+        'road_users': [volume]
+    })
+
+
+def _volumes(store, resolution):
+    series = store.query('Ikeja', START, START + timedelta(hours=2), resolution)
+    return [point['volume'] for point in series['points']]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TimeSeriesStore(str(tmp_path))
+
+
+def test_coarse_reads_include_segments_appended_after_rollup(store):
+    store.append(_pings(1, 10))
+    store.rollup()
+    store.append(_pings(70, 5))
+
+    assert _volumes(store, '1m') == [10, 5]
+    assert _volumes(store, '15m') == [10, 5]
+    assert _volumes(store, '1h') == [10, 5]
+
+    # The next rollup takes them in without counting anything twice
+    assert store.rollup() == {'15m': ['2026-10-18'], '1h': ['2026-10-18']}
+    assert _volumes(store, '15m') == [10, 5]
+    assert _volumes(store, '1h') == [10, 5]
+    assert store.rollup() == {'15m': [], '1h': []}
+
+
+def test_same_bucket_appended_after_rollup_is_summed(store):
+    store.append(_pings(1, 10, speed=20.0))
+    store.rollup()
+    store.append(_pings(2, 4, speed=40.0))
+
+    point, = store.query('Ikeja', START, START + timedelta(hours=1), '1h')['points']
+    assert point['volume'] == 14
+    assert point['observations'] == 2
+    assert point['avg_speed_kmh'] == 30.0
+
+
+def test_day_without_rollup_is_derived_from_minutes(store):
+    store.append(_pings(1, 3))
+    store.append(_pings(20, 4))
+    store.append(_pings(20, 1, location='Yaba'))
+
+    assert _volumes(store, '15m') == [3, 4]
+    assert _volumes(store, '1h') == [7]
+
+
+def test_query_rejects_resolution_over_max_points(store):
+    with pytest.raises(ValueError):
+        store.query('Ikeja', START, START + timedelta(days=3), '1m')
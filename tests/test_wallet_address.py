@@ -0,0 +1,82 @@
+import pytest
+
+from config import Config
+from services.polygon_service import checksum_address, is_valid_address, normalize_address
+
+
+CHECKSUMMED = '0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed'
+LOWER = CHECKSUMMED.lower()
+BAD_CHECKSUM = CHECKSUMMED[:-1] + 'D'
+
+DRIVER = {
+    'first_name': 'Ada',
+    'last_name': 'Okafor',
+    'email': 'ada@example.com',
+    'phone': '+2348000000000',
+    'license_number': 'LAG-0001',
+    'license_expiry': '2030-01-01',
+    'vehicle_plate': 'KJA-123AA',
+    'insurance_provider': 'Leadway',
+    'insurance_expiry': '2030-01-01',
+    'road_cert_number': 'RW-0001',
+    'cert_expiry': '2030-01-01'
+}
+
+
+@pytest.mark.parametrize('address, expected', [
+    (CHECKSUMMED, LOWER),
+    (LOWER, LOWER),
+    ('0x' + LOWER[2:].upper(), LOWER),
+    ('  0X' + LOWER[2:] + ' ', LOWER),
+    (BAD_CHECKSUM, None),
+    (LOWER[:-1], None),
+    ('0x' + 'g' * 40, None),
+    (None, None),
+])
+def test_normalize_address(address, expected):
+    assert normalize_address(address) == expected
+
+
+def test_checksum_round_trip():
+    assert checksum_address(LOWER) == CHECKSUMMED
+    assert is_valid_address(CHECKSUMMED)
+    assert not is_valid_address(BAD_CHECKSUM)
+
+
+@pytest.fixture
+def client(db_app, monkeypatch):
+    from routes.auth import auth_bp
+    from routes.verification import verification_bp
+    from services.polygon_service import polygon_service
+
+    # Batch mode defers the on-chain write, so registration stays off the network
+    monkeypatch.setattr(Config, 'ATTESTATION_MODE', 'batch')
+    monkeypatch.setattr(polygon_service, 'verify_driver', lambda address: {'success': False})
+    db_app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    db_app.register_blueprint(verification_bp, url_prefix='/api/verify')
+    return db_app.test_client()
+
+
+def test_register_stores_canonical_form_and_any_spelling_verifies(client):
+    from models import Driver
+
+    response = client.post('/api/auth/register', json={**DRIVER, 'wallet_address': CHECKSUMMED})
+    assert response.status_code == 201
+    assert Driver.query.one().wallet_address == LOWER
+
+    for spelling in (CHECKSUMMED, LOWER, '0x' + LOWER[2:].upper()):
+        response = client.get(f'/api/verify/wallet/{spelling}')
+        assert response.status_code == 200
+        assert response.get_json()['data']['blockchain_info']['wallet_address'] == CHECKSUMMED
+
+
+def test_bad_checksum_is_rejected_at_register_and_verify(client):
+    from models import Driver
+
+    response = client.post('/api/auth/register', json={**DRIVER, 'wallet_address': BAD_CHECKSUM})
+    assert response.status_code == 400
+    assert 'EIP-55' in response.get_json()['error']
+    assert Driver.query.count() == 0
+
+    assert client.get(f'/api/verify/wallet/{BAD_CHECKSUM}').status_code == 400
+    assert client.get(f'/api/verify/wallet/{LOWER}').status_code == 404